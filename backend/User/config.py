@@ -1,8 +1,21 @@
 # backend/config.py
 import os
+from dataclasses import dataclass
+
 from dotenv import load_dotenv
 
-load_dotenv()  # 加载.env文件
+_env_loaded = False
+
+
+def load_env() -> None:
+    """加载根目录 .env；进程内只执行一次（database.py 导入时调用，其他模块无需再调）。"""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+load_env()
 
 MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
 MYSQL_PORT = os.getenv("MYSQL_PORT", "3308")
@@ -13,3 +26,46 @@ MYSQL_DB = os.getenv("MYSQL_DB", "pillsalert")
 DATABASE_URL = (
     f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
 )
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    create_app 的运行参数。默认值读环境变量（Settings.from_env()），
+    测试 / 脚本可以直接构造 Settings(warmup=False, ...)。
+    """
+
+    # 启动预热：预先建立连接池连接、加载 jose / 鉴权路径、预取 Vertex token
+    warmup: bool = True
+    warmup_db_connections: int = 2
+    warmup_vertex_token: bool = True
+    # 共享 Vertex HTTP session 的连接池大小（每个 worker）
+    vertex_http_pool_size: int = 10
+    # pantry tombstone / 过期刷新令牌的清理间隔（秒），0 表示不启动后台清理
+    pantry_compaction_interval: float = 3600.0
+    # 响应压缩（br / gzip，按 Accept-Encoding 协商）；小于 compression_minimum_size 字节的响应不压缩
+    compression: bool = True
+    compression_minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    # GET /metrics/ 需要带 X-Metrics-Token: <metrics_token>；为空时该接口返回 404（默认关闭）
+    metrics_token: str = ""
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            warmup=_env_flag("APP_WARMUP", "1"),
+            warmup_db_connections=int(os.getenv("WARMUP_DB_CONNECTIONS", "2")),
+            warmup_vertex_token=_env_flag("WARMUP_VERTEX_TOKEN", "1"),
+            vertex_http_pool_size=int(os.getenv("VERTEX_HTTP_POOL_SIZE", "10")),
+            pantry_compaction_interval=float(os.getenv("PANTRY_COMPACTION_INTERVAL_SECONDS", "3600")),
+            compression=_env_flag("RESPONSE_COMPRESSION", "1"),
+            compression_minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+            gzip_level=int(os.getenv("GZIP_LEVEL", "6")),
+            brotli_quality=int(os.getenv("BROTLI_QUALITY", "4")),
+            metrics_token=os.getenv("METRICS_TOKEN", ""),
+        )
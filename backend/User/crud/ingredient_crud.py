@@ -0,0 +1,113 @@
+# backend/User/crud/ingredient_crud.py
+
+from __future__ import annotations
+
+from typing import Iterable, List, Sequence, Tuple
+
+from sqlalchemy import select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.User.models.ingredient import Ingredient, IngredientAlias
+from backend.User.utils.ingredients import INGREDIENT_INDEX, normalize_name
+
+# 初始食材目录：(标准名称, 分类, 别名)。init_db 会按名称增量写入，可重复执行。
+SEED_CATALOG: Sequence[Tuple[str, str, Sequence[str]]] = (
+    ("egg", "dairy & eggs", ("eggs", "large egg", "whole egg", "鸡蛋", "蛋")),
+    ("milk", "dairy & eggs", ("whole milk", "skim milk", "牛奶")),
+    ("butter", "dairy & eggs", ("unsalted butter", "salted butter", "黄油")),
+    ("cheese", "dairy & eggs", ("cheddar", "cheddar cheese", "芝士", "奶酪")),
+    ("yogurt", "dairy & eggs", ("yoghurt", "greek yogurt", "酸奶")),
+    ("cream", "dairy & eggs", ("heavy cream", "whipping cream", "淡奶油")),
+    ("tomato", "produce", ("cherry tomato", "番茄", "西红柿")),
+    ("onion", "produce", ("yellow onion", "red onion", "洋葱")),
+    ("garlic", "produce", ("garlic clove", "clove garlic", "大蒜", "蒜")),
+    ("potato", "produce", ("土豆", "马铃薯")),
+    ("carrot", "produce", ("胡萝卜",)),
+    ("scallion", "produce", ("green onion", "spring onion", "葱", "小葱")),
+    ("ginger", "produce", ("fresh ginger", "姜", "生姜")),
+    ("cucumber", "produce", ("黄瓜",)),
+    ("bell pepper", "produce", ("red pepper", "green pepper", "capsicum", "青椒", "彩椒")),
+    ("cabbage", "produce", ("白菜", "卷心菜")),
+    ("spinach", "produce", ("菠菜",)),
+    ("mushroom", "produce", ("button mushroom", "shiitake", "蘑菇", "香菇")),
+    ("lemon", "produce", ("柠檬",)),
+    ("apple", "produce", ("苹果",)),
+    ("banana", "produce", ("香蕉",)),
+    ("chicken breast", "meat", ("boneless chicken breast", "鸡胸肉")),
+    ("chicken", "meat", ("whole chicken", "chicken thigh", "鸡肉")),
+    ("beef", "meat", ("ground beef", "beef mince", "牛肉")),
+    ("pork", "meat", ("pork belly", "ground pork", "猪肉")),
+    ("shrimp", "seafood", ("prawn", "虾", "虾仁")),
+    ("salmon", "seafood", ("salmon fillet", "三文鱼")),
+    ("tofu", "soy", ("firm tofu", "silken tofu", "豆腐")),
+    ("rice", "grains", ("white rice", "jasmine rice", "大米", "米饭")),
+    ("pasta", "grains", ("spaghetti", "penne", "意面")),
+    ("noodle", "grains", ("面条",)),
+    ("bread", "grains", ("white bread", "toast", "面包")),
+    ("flour", "baking", ("all purpose flour", "all-purpose flour", "plain flour", "面粉")),
+    ("sugar", "baking", ("white sugar", "granulated sugar", "糖", "白糖")),
+    ("salt", "seasoning", ("sea salt", "table salt", "kosher salt", "盐")),
+    ("black pepper", "seasoning", ("pepper", "ground black pepper", "黑胡椒")),
+    ("soy sauce", "seasoning", ("light soy sauce", "dark soy sauce", "酱油", "生抽", "老抽")),
+    ("vinegar", "seasoning", ("rice vinegar", "醋")),
+    ("olive oil", "oil", ("extra virgin olive oil", "橄榄油")),
+    ("vegetable oil", "oil", ("cooking oil", "canola oil", "食用油", "植物油")),
+)
+
+
+def _alias_pairs_stmt():
+    """标准名称本身也算一个别名。"""
+    return union_all(
+        select(Ingredient.name, Ingredient.id),
+        select(IngredientAlias.alias, IngredientAlias.ingredient_id),
+    )
+
+
+def load_alias_pairs(db: Session) -> List[Tuple[str, int]]:
+    return [tuple(row) for row in db.execute(_alias_pairs_stmt())]
+
+
+def reload_index(db: Session) -> int:
+    """从数据库重新加载 INGREDIENT_INDEX，返回别名条数。"""
+    INGREDIENT_INDEX.load(load_alias_pairs(db))
+    return len(INGREDIENT_INDEX)
+
+
+def seed_catalog(db: Session, catalog: Iterable[Tuple[str, str, Sequence[str]]] = SEED_CATALOG) -> int:
+    """
+    把 catalog 中数据库里还没有的食材 / 别名写入（按归一化名称去重）。
+    返回新增的食材数。
+    """
+    existing = {name: ingredient_id for name, ingredient_id in db.execute(select(Ingredient.name, Ingredient.id))}
+    taken = set(existing) | set(db.scalars(select(IngredientAlias.alias)))
+    added = 0
+    for name, category, aliases in catalog:
+        key = normalize_name(name)
+        ingredient_id = existing.get(key)
+        if ingredient_id is None:
+            ingredient = Ingredient(name=key, category=category)
+            db.add(ingredient)
+            db.flush()
+            ingredient_id = existing[key] = ingredient.id
+            taken.add(key)
+            added += 1
+        for alias in aliases:
+            alias_key = normalize_name(alias)
+            if alias_key and alias_key not in taken:
+                db.add(IngredientAlias(alias=alias_key, ingredient_id=ingredient_id))
+                taken.add(alias_key)
+    db.commit()
+    return added
+
+
+# ---------- async 版本 ----------
+
+async def load_alias_pairs_async(db: AsyncSession) -> List[Tuple[str, int]]:
+    result = await db.execute(_alias_pairs_stmt())
+    return [tuple(row) for row in result]
+
+
+async def reload_index_async(db: AsyncSession) -> int:
+    INGREDIENT_INDEX.load(await load_alias_pairs_async(db))
+    return len(INGREDIENT_INDEX)
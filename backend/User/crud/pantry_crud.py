@@ -2,29 +2,522 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List, Optional
+import base64
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import Integer, bindparam, delete, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from backend.User.models.pantry_item import PantryItem
+from backend.User.models.pantry_tombstone import PantryTombstone
+from backend.User.models.pantry_version import PantryVersion
+from backend.User.utils.ingredients import INGREDIENT_INDEX, canonical_amount
 
 
-def list_items(db: Session, user_id: int) -> List[PantryItem]:
-    stmt = select(PantryItem).where(PantryItem.user_id == user_id).order_by(PantryItem.added_at.asc())
-    return list(db.scalars(stmt))
+# 批量导入时每条 INSERT 语句最多包含的行数（控制单条语句的参数个数）
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("PANTRY_BULK_INSERT_CHUNK_SIZE", "500"))
 
 
-def get_item(db: Session, user_id: int, item_id: int) -> Optional[PantryItem]:
-    stmt = select(PantryItem).where(
+# ---------- SQL 语句（sync / async 两套函数共用）----------
+
+def _version_stmt(user_id: int):
+    return select(PantryVersion.version).where(PantryVersion.user_id == user_id)
+
+
+def _bump_version_stmt(user_id: int):
+    return (
+        update(PantryVersion)
+        .where(PantryVersion.user_id == user_id)
+        .values(version=PantryVersion.version + 1)
+    )
+
+
+# 支持原生 upsert 的方言；其他方言退回 UPDATE，没有行时再 INSERT
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+    "mysql": mysql_insert,
+    "mariadb": mysql_insert,
+}
+
+
+def _upsert_version_stmt(dialect_name: str, user_id: int):
+    """
+    单条 INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE version = version + 1：
+    用户的前两次 pantry 写入并发时不会再都去 INSERT 而撞上主键。方言不支持时返回 None。
+    """
+    make_insert = _UPSERT_INSERTS.get(dialect_name)
+    if make_insert is None:
+        return None
+    stmt = make_insert(PantryVersion).values(user_id=user_id, version=1)
+    if make_insert is mysql_insert:
+        return stmt.on_duplicate_key_update(version=PantryVersion.version + 1)
+    return stmt.on_conflict_do_update(
+        index_elements=[PantryVersion.user_id],
+        set_={"version": PantryVersion.version + 1},
+    )
+
+
+def _upsert_returns_version(db, dialect_name: str) -> bool:
+    """SQLite ≥ 3.35 / PostgreSQL：upsert 直接 RETURNING 新版本号；MySQL 需再 SELECT 一次。"""
+    return dialect_name not in ("mysql", "mariadb") and bool(db.get_bind().dialect.insert_returning)
+
+
+def _list_items_stmt(user_id: int):
+    return (
+        select(PantryItem)
+        .where(PantryItem.user_id == user_id)
+        .order_by(PantryItem.added_at.asc(), PantryItem.id.asc())
+    )
+
+
+def _page_items_stmt(
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    name_prefix: Optional[str] = None,
+    unit: Optional[str] = None,
+):
+    """
+    keyset 分页：(added_at, id) > 游标，走 (user_id, added_at, id) 复合索引，
+    翻到第几页都只扫描 limit + 1 行（OFFSET 则要先跳过前面所有行）。
+    多取一行用来判断是否还有下一页。
+    """
+    stmt = _list_items_stmt(user_id)
+    if after is not None:
+        added_at, item_id = after
+        # added_at >= ? 给索引一个范围起点，OR 只在起点附近过滤同一时刻的行；
+        # 不用行值比较 (a, b) > (?, ?)：MySQL 对它不一定能用上索引
+        stmt = stmt.where(
+            PantryItem.added_at >= added_at,
+            or_(PantryItem.added_at > added_at, PantryItem.id > item_id),
+        )
+    if name_prefix:
+        stmt = stmt.where(PantryItem.name.startswith(name_prefix, autoescape=True))
+    if unit:
+        stmt = stmt.where(PantryItem.unit == unit)
+    return stmt.limit(limit + 1)
+
+
+def encode_cursor(item: PantryItem) -> str:
+    raw = f"{item.added_at.isoformat()}|{item.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析 encode_cursor 生成的游标；格式不对时抛 ValueError。"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        added_at, item_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(added_at), int(item_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid pantry cursor") from exc
+
+
+def _split_page(items: List[PantryItem], limit: int) -> Tuple[List[PantryItem], Optional[str]]:
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1])
+    return items, None
+
+
+def _ingredient_dicts_stmt(user_id: int):
+    return (
+        select(PantryItem.name, PantryItem.quantity, PantryItem.unit, PantryItem.notes)
+        .where(PantryItem.user_id == user_id)
+        .order_by(PantryItem.added_at.asc(), PantryItem.id.asc())
+    )
+
+
+def _chunks(rows: List[dict], size: int) -> Iterator[List[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _supports_insert_returning(db) -> bool:
+    """SQLite ≥ 3.35 / MariaDB：一条多行 INSERT ... RETURNING 即可拿回 id 和 added_at。"""
+    return bool(db.get_bind().dialect.insert_executemany_returning)
+
+
+def _insert_returning_stmt():
+    # 不用 sort_by_parameter_order：SQLite 的 rowid 主键不能作为排序哨兵，
+    # SQLAlchemy 会退化成逐行 INSERT。同一条多行 INSERT 内 id 按 VALUES 顺序递增，
+    # 所以按 id 排序即可还原输入顺序。
+    return insert(PantryItem).returning(PantryItem)
+
+
+def _by_id(item: PantryItem) -> int:
+    return item.id
+
+
+def _inserted_rows_stmt(user_id: int, seq: int):
+    """
+    MySQL 没有 RETURNING：全部分块插入后，按本次写入的 change_seq 一条 SELECT 读回
+    （含 server default 的 added_at）。不依赖 lastrowid 连续：innodb_autoinc_lock_mode=2
+    或并发插入时同一批的自增 id 可能不连续。seq 由 _bump_version 分配，版本行锁住到提交，
+    别的写入不会用到同一个 seq。
+    """
+    return (
+        select(PantryItem)
+        .where(PantryItem.user_id == user_id, PantryItem.change_seq == seq)
+        .order_by(PantryItem.id.asc())
+    )
+
+
+def _check_inserted(created: List[PantryItem], expected: int) -> List[PantryItem]:
+    if len(created) != expected:
+        raise RuntimeError(f"Bulk insert read back {len(created)} rows, expected {expected}")
+    return created
+
+
+def _get_item_stmt(user_id: int, item_id: int):
+    return select(PantryItem).where(
         PantryItem.user_id == user_id,
         PantryItem.id == item_id,
     )
-    return db.scalar(stmt)
+
+
+def _owned_ids_stmt(user_id: int, item_ids: Sequence[int]):
+    return select(PantryItem.id).where(PantryItem.user_id == user_id, PantryItem.id.in_(item_ids))
+
+
+def _owned_amounts_stmt(user_id: int, item_ids: Sequence[int]):
+    """归属检查的同时取回当前 quantity / unit，部分更新时用来重新计算解析列。"""
+    return select(PantryItem.id, PantryItem.quantity, PantryItem.unit).where(
+        PantryItem.user_id == user_id, PantryItem.id.in_(item_ids)
+    )
+
+
+def _amount_fields(quantity: Any, unit: Any) -> Dict[str, Any]:
+    value, unit_canonical = canonical_amount(quantity, unit)
+    return {"quantity_value": value, "unit_canonical": unit_canonical}
+
+
+def _with_amount(data: dict) -> dict:
+    """新建条目：由 quantity / unit 填充 quantity_value / unit_canonical，由 name 解析 ingredient_id。"""
+    return dict(
+        data,
+        ingredient_id=INGREDIENT_INDEX.resolve(data.get("name")),
+        **_amount_fields(data.get("quantity"), data.get("unit")),
+    )
+
+
+def _delete_items_stmt(user_id: int, item_ids: Optional[Sequence[int]] = None):
+    """单条 DELETE ... WHERE user_id = ?（可选再加 id IN (...)），不把行加载进 session。"""
+    stmt = delete(PantryItem).where(PantryItem.user_id == user_id)
+    if item_ids is not None:
+        stmt = stmt.where(PantryItem.id.in_(item_ids))
+    return stmt
+
+
+def _items_by_ids_stmt(user_id: int, item_ids: Sequence[int]):
+    return (
+        select(PantryItem)
+        .where(PantryItem.user_id == user_id, PantryItem.id.in_(item_ids))
+        .execution_options(populate_existing=True)
+    )
+
+
+def _update_params(updates: Iterable[dict], owned: Dict[int, Tuple[Any, Any]]) -> List[dict]:
+    """
+    ORM bulk UPDATE by primary key 的参数：每行一个 dict（含 id）。
+    只保留属于该用户的行；同一 id 出现多次时后面的覆盖前面的；没有字段要改的行跳过。
+    owned 是 {id: (当前 quantity, 当前 unit)}：改了其中之一时一并重算解析列；
+    改了 name 时重新解析 ingredient_id。
+    """
+    merged: Dict[int, dict] = {}
+    for data in updates:
+        item_id = data["id"]
+        if item_id in owned:
+            merged.setdefault(item_id, {}).update(data)
+    params = []
+    for item_id, data in merged.items():
+        if len(data) == 1:
+            continue
+        if "quantity" in data or "unit" in data:
+            quantity, unit = owned[item_id]
+            data.update(_amount_fields(data.get("quantity", quantity), data.get("unit", unit)))
+        if "name" in data:
+            data["ingredient_id"] = INGREDIENT_INDEX.resolve(data["name"])
+        params.append(data)
+    return params
+
+
+def _totals_stmt(user_id: int, name_prefix: Optional[str] = None):
+    """按 (小写名称, 标准单位) 汇总数量，例如面粉一共多少 g；无法解析数量的条目不计入。"""
+    name = func.lower(PantryItem.name)
+    stmt = (
+        select(
+            name.label("name"),
+            PantryItem.unit_canonical.label("unit"),
+            func.sum(PantryItem.quantity_value).label("total"),
+            func.count().label("items"),
+        )
+        .where(PantryItem.user_id == user_id, PantryItem.quantity_value.isnot(None))
+        .group_by(name, PantryItem.unit_canonical)
+        .order_by(name, PantryItem.unit_canonical)
+    )
+    if name_prefix:
+        stmt = stmt.where(PantryItem.name.startswith(name_prefix, autoescape=True))
+    return stmt
+
+
+def _low_stock_stmt(user_id: int, threshold: float, unit: Optional[str] = None):
+    """quantity_value <= threshold 的条目；指定 unit 时阈值先换算到标准单位（1 kg → 1000 g）。"""
+    stmt = select(PantryItem).where(
+        PantryItem.user_id == user_id, PantryItem.quantity_value.isnot(None)
+    )
+    if unit:
+        threshold, unit_canonical = canonical_amount(threshold, unit)
+        stmt = stmt.where(PantryItem.unit_canonical == unit_canonical)
+    return stmt.where(PantryItem.quantity_value <= threshold).order_by(
+        PantryItem.quantity_value.asc(), PantryItem.id.asc()
+    )
+
+
+def _backfill_batch_stmt(after_id: int, limit: int):
+    return (
+        select(PantryItem.id, PantryItem.quantity, PantryItem.unit)
+        .where(
+            PantryItem.id > after_id,
+            PantryItem.quantity_value.is_(None),
+            PantryItem.unit_canonical.is_(None),
+            or_(PantryItem.quantity.isnot(None), PantryItem.unit.isnot(None)),
+        )
+        .order_by(PantryItem.id.asc())
+        .limit(limit)
+    )
+
+
+def _backfill_update_stmt():
+    # Core executemany；显式 SET updated_at = updated_at，避免 onupdate 把回填当成用户修改
+    table = PantryItem.__table__
+    return (
+        update(table)
+        .where(table.c.id == bindparam("item_id"))
+        .values(
+            quantity_value=bindparam("value"),
+            unit_canonical=bindparam("unit_canonical"),
+            updated_at=table.c.updated_at,
+        )
+    )
+
+
+def _unresolved_batch_stmt(after_id: int, limit: int):
+    return (
+        select(PantryItem.id, PantryItem.name)
+        .where(PantryItem.id > after_id, PantryItem.ingredient_id.is_(None))
+        .order_by(PantryItem.id.asc())
+        .limit(limit)
+    )
+
+
+def _ingredient_update_stmt():
+    table = PantryItem.__table__
+    return (
+        update(table)
+        .where(table.c.id == bindparam("item_id"))
+        .values(ingredient_id=bindparam("ingredient_id"), updated_at=table.c.updated_at)
+    )
+
+
+def _tombstones_stmt(user_id: int, change_seq: int, item_ids: Optional[Sequence[int]] = None):
+    """INSERT ... SELECT：在同一事务里先为将被删除的行写 tombstone，再执行 DELETE。"""
+    source = select(
+        PantryItem.user_id, PantryItem.id, literal(change_seq, Integer)
+    ).where(PantryItem.user_id == user_id)
+    if item_ids is not None:
+        source = source.where(PantryItem.id.in_(item_ids))
+    return insert(PantryTombstone).from_select(["user_id", "item_id", "change_seq"], source)
+
+
+def _sync_state_stmt(user_id: int):
+    return select(PantryVersion.version, PantryVersion.compacted_seq).where(
+        PantryVersion.user_id == user_id
+    )
+
+
+def _changed_items_stmt(user_id: int, since: int):
+    return (
+        select(PantryItem)
+        .where(PantryItem.user_id == user_id, PantryItem.change_seq > since)
+        .order_by(PantryItem.change_seq.asc(), PantryItem.id.asc())
+    )
+
+
+def _deleted_ids_stmt(user_id: int, since: int):
+    return select(PantryTombstone.item_id).where(
+        PantryTombstone.user_id == user_id, PantryTombstone.change_seq > since
+    )
+
+
+def _compact_versions_stmt(cutoff: datetime):
+    expired = (
+        select(func.max(PantryTombstone.change_seq))
+        .where(
+            PantryTombstone.user_id == PantryVersion.user_id,
+            PantryTombstone.deleted_at < cutoff,
+        )
+        .scalar_subquery()
+    )
+    return (
+        update(PantryVersion)
+        .where(expired.isnot(None))
+        .values(compacted_seq=expired)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _expired_tombstones_stmt(cutoff: datetime):
+    return delete(PantryTombstone).where(PantryTombstone.deleted_at < cutoff)
+
+
+def _tombstone_cutoff(older_than: timedelta) -> datetime:
+    # CURRENT_TIMESTAMP 是 UTC，且 SQLite / MySQL 存的都是不带时区的时间
+    return datetime.now(timezone.utc).replace(tzinfo=None) - older_than
+
+
+class PantryChanges(NamedTuple):
+    """
+    /pantry/changes 的结果。cursor 是当前版本号，下次作为 since 传回。
+    reset=True 表示 since 太旧（对应的 tombstone 已被清理）或未提供，
+    items 是完整列表的一页，next_page 不为空时带上它继续取，全部取完后客户端整体替换本地数据。
+    """
+
+    cursor: int
+    reset: bool
+    items: List[PantryItem]
+    deleted: List[int]
+    next_page: Optional[str] = None
+
+
+def _changes(version: int, since: Optional[int], items, deleted_ids) -> PantryChanges:
+    live = {item.id for item in items}
+    # SQLite 可能复用被删掉的最大 id：同一 id 既有 tombstone 又是现存条目时以现存条目为准
+    deleted = sorted({item_id for item_id in deleted_ids if item_id not in live})
+    return PantryChanges(cursor=version, reset=False, items=items, deleted=deleted)
+
+
+def _needs_reset(since: Optional[int], version: int, compacted_seq: int) -> bool:
+    return since is None or since < compacted_seq or since > version
+
+
+def encode_snapshot_page(version: int, next_cursor: Optional[str]) -> Optional[str]:
+    """
+    reset 快照的翻页令牌："快照版本号.keyset 游标"（keyset 游标是 urlsafe base64，不含 "."）。
+    后续页沿用第一页的版本号作为 cursor：翻页期间发生的写入 change_seq 都更大，
+    会出现在下一次以该 cursor 为 since 的增量里，不会丢。
+    """
+    if next_cursor is None:
+        return None
+    return f"{version}.{next_cursor}"
+
+
+def decode_snapshot_page(page: str) -> Tuple[int, Tuple[datetime, int]]:
+    """解析 encode_snapshot_page 生成的令牌；格式不对时抛 ValueError。"""
+    version, sep, cursor = page.partition(".")
+    if not sep or not version.isdigit():
+        raise ValueError("Invalid pantry page token")
+    return int(version), decode_cursor(cursor)
+
+
+def _snapshot_page(version: int, items: List[PantryItem], next_cursor: Optional[str]) -> PantryChanges:
+    return PantryChanges(
+        cursor=version,
+        reset=True,
+        items=items,
+        deleted=[],
+        next_page=encode_snapshot_page(version, next_cursor),
+    )
+
+
+# ---------- sync 版本（Session）----------
+
+def get_version(db: Session, user_id: int) -> int:
+    """当前 pantry 版本号；从未写过 pantry 的用户为 0。"""
+    return db.scalar(_version_stmt(user_id)) or 0
+
+
+def _bump_version(db: Session, user_id: int) -> int:
+    """
+    与 pantry 写入放在同一事务里，使依赖版本号的缓存自动失效。
+    返回新的版本号，用作本次写入的 change_seq。upsert 会锁住该用户的版本行，
+    并发写入因此按版本号串行提交。
+    """
+    dialect_name = db.get_bind().dialect.name
+    stmt = _upsert_version_stmt(dialect_name, user_id)
+    if stmt is None:
+        result = db.execute(_bump_version_stmt(user_id))
+        if result.rowcount == 0:
+            db.add(PantryVersion(user_id=user_id, version=1))
+            return 1
+    elif _upsert_returns_version(db, dialect_name):
+        return db.scalar(stmt.returning(PantryVersion.version))
+    else:
+        db.execute(stmt)
+    return db.scalar(_version_stmt(user_id))
+
+
+def list_items(db: Session, user_id: int) -> List[PantryItem]:
+    return list(db.scalars(_list_items_stmt(user_id)))
+
+
+def list_items_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    name_prefix: Optional[str] = None,
+    unit: Optional[str] = None,
+) -> Tuple[List[PantryItem], Optional[str]]:
+    """返回 (本页条目, 下一页游标)；没有下一页时游标为 None。"""
+    items = list(db.scalars(_page_items_stmt(user_id, limit, after, name_prefix, unit)))
+    return _split_page(items, limit)
+
+
+def list_ingredient_dicts(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """Only the columns the shopping-list prompt needs, as plain dicts (no ORM objects)."""
+    return [dict(row) for row in db.execute(_ingredient_dicts_stmt(user_id)).mappings()]
+
+
+def get_item(db: Session, user_id: int, item_id: int) -> Optional[PantryItem]:
+    return db.scalar(_get_item_stmt(user_id, item_id))
+
+
+def get_changes(
+    db: Session,
+    user_id: int,
+    since: Optional[int],
+    limit: int,
+    page: Optional[str] = None,
+) -> PantryChanges:
+    """
+    since 之后新增 / 修改的条目和被删除的 id。没有变化时只有一次主键查询；
+    有变化时查询量与变化条数成正比，与 pantry 大小无关（(user_id, change_seq) 索引）。
+    需要 reset 时按 limit 分页返回完整列表（与 list_items_page 同一套 keyset），
+    page 是上一页的 next_page；page 格式不对时抛 ValueError。
+    """
+    if page is not None:
+        version, after = decode_snapshot_page(page)
+        return _snapshot_page(version, *list_items_page(db, user_id, limit, after))
+    version, compacted_seq = db.execute(_sync_state_stmt(user_id)).first() or (0, 0)
+    if _needs_reset(since, version, compacted_seq):
+        return _snapshot_page(version, *list_items_page(db, user_id, limit))
+    if since == version:
+        return PantryChanges(cursor=version, reset=False, items=[], deleted=[])
+    items = list(db.scalars(_changed_items_stmt(user_id, since)))
+    return _changes(version, since, items, db.scalars(_deleted_ids_stmt(user_id, since)))
 
 
 def create_item(db: Session, user_id: int, **data) -> PantryItem:
-    item = PantryItem(user_id=user_id, **data)
+    seq = _bump_version(db, user_id)
+    item = PantryItem(user_id=user_id, change_seq=seq, **_with_amount(data))
     db.add(item)
     db.commit()
     db.refresh(item)
@@ -32,19 +525,41 @@ def create_item(db: Session, user_id: int, **data) -> PantryItem:
 
 
 def bulk_create_items(db: Session, user_id: int, items: Iterable[dict]) -> List[PantryItem]:
-    objs = [PantryItem(user_id=user_id, **data) for data in items]
-    if not objs:
+    """
+    集合式批量插入：每 BULK_INSERT_CHUNK_SIZE 行一条 INSERT，
+    不再逐行 refresh（原来是 1 + N 次往返）。
+    """
+    rows = list(items)
+    if not rows:
         return []
-    db.add_all(objs)
+    seq = _bump_version(db, user_id)
+    rows = [dict(_with_amount(data), user_id=user_id, change_seq=seq) for data in rows]
+    created: List[PantryItem] = []
+    returning = _supports_insert_returning(db)
+    for chunk in _chunks(rows, BULK_INSERT_CHUNK_SIZE):
+        if returning:
+            created.extend(sorted(db.scalars(_insert_returning_stmt(), chunk), key=_by_id))
+        else:
+            db.execute(insert(PantryItem).values(chunk))
+    if not returning:
+        created = list(db.scalars(_inserted_rows_stmt(user_id, seq)))
+    try:
+        _check_inserted(created, len(rows))
+    except RuntimeError:
+        db.rollback()
+        raise
     db.commit()
-    for obj in objs:
-        db.refresh(obj)
-    return objs
+    return created
 
 
 def update_item(db: Session, item: PantryItem, **updates) -> PantryItem:
     for field, value in updates.items():
         setattr(item, field, value)
+    if "quantity" in updates or "unit" in updates:
+        item.quantity_value, item.unit_canonical = canonical_amount(item.quantity, item.unit)
+    if "name" in updates:
+        item.ingredient_id = INGREDIENT_INDEX.resolve(item.name)
+    item.change_seq = _bump_version(db, item.user_id)
     db.add(item)
     db.commit()
     db.refresh(item)
@@ -52,12 +567,295 @@ def update_item(db: Session, item: PantryItem, **updates) -> PantryItem:
 
 
 def delete_item(db: Session, item: PantryItem) -> None:
+    seq = _bump_version(db, item.user_id)
+    db.add(PantryTombstone(user_id=item.user_id, item_id=item.id, change_seq=seq))
     db.delete(item)
     db.commit()
 
 
-def clear_items(db: Session, user_id: int) -> None:
-    stmt = select(PantryItem).where(PantryItem.user_id == user_id)
-    for item in db.scalars(stmt):
-        db.delete(item)
+def clear_items(db: Session, user_id: int) -> int:
+    seq = _bump_version(db, user_id)
+    db.execute(_tombstones_stmt(user_id, seq))
+    result = db.execute(_delete_items_stmt(user_id))
+    db.commit()
+    return result.rowcount
+
+
+def delete_items(db: Session, user_id: int, item_ids: Sequence[int]) -> List[int]:
+    """
+    批量删除：一次 SELECT 确认归属 + 一条 INSERT ... SELECT 写 tombstone
+    + 一条 DELETE ... WHERE id IN (...)，与 id 个数无关。
+    返回实际删除的 id（不属于该用户 / 不存在的不在其中）。
+    """
+    if not item_ids:
+        return []
+    owned = list(db.scalars(_owned_ids_stmt(user_id, item_ids)))
+    if owned:
+        seq = _bump_version(db, user_id)
+        db.execute(_tombstones_stmt(user_id, seq, owned))
+        db.execute(_delete_items_stmt(user_id, owned))
+        db.commit()
+    return owned
+
+
+def update_items(db: Session, user_id: int, updates: Sequence[dict]) -> Dict[int, PantryItem]:
+    """
+    批量部分更新：每个 dict 含 id 和要修改的字段。
+    一次 SELECT 确认归属，一次 executemany UPDATE（按主键），再一次 SELECT 读回，同一事务提交。
+    返回 {id: PantryItem}，只包含属于该用户的行。
+    """
+    item_ids = list({data["id"] for data in updates})
+    if not item_ids:
+        return {}
+    result = db.execute(_owned_amounts_stmt(user_id, item_ids))
+    owned = {row.id: (row.quantity, row.unit) for row in result}
+    if not owned:
+        return {}
+    params = _update_params(updates, owned)
+    if params:
+        seq = _bump_version(db, user_id)
+        db.execute(update(PantryItem), [dict(p, change_seq=seq) for p in params])
+        db.commit()
+    return {item.id: item for item in db.scalars(_items_by_ids_stmt(user_id, list(owned)))}
+
+
+def sum_quantities(db: Session, user_id: int, name_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+    return [dict(row) for row in db.execute(_totals_stmt(user_id, name_prefix)).mappings()]
+
+
+def list_low_stock(
+    db: Session, user_id: int, threshold: float, unit: Optional[str] = None
+) -> List[PantryItem]:
+    return list(db.scalars(_low_stock_stmt(user_id, threshold, unit)))
+
+
+def backfill_amounts(db: Session, batch_size: int = 1000) -> int:
+    """
+    为解析列上线前写入的条目回填 quantity_value / unit_canonical。
+    按 id 分批（keyset），每批一次 SELECT + 一次 executemany UPDATE 并提交；
+    可重复执行，数量解析不了的行保持 NULL。返回处理的行数。
+    """
+    last_id, processed = 0, 0
+    while True:
+        rows = db.execute(_backfill_batch_stmt(last_id, batch_size)).all()
+        if not rows:
+            return processed
+        params = []
+        for row in rows:
+            value, unit_canonical = canonical_amount(row.quantity, row.unit)
+            params.append({"item_id": row.id, "value": value, "unit_canonical": unit_canonical})
+        db.execute(_backfill_update_stmt(), params)
+        db.commit()
+        processed += len(rows)
+        last_id = rows[-1].id
+
+
+def backfill_ingredient_ids(db: Session, batch_size: int = 1000) -> int:
+    """
+    用当前 INGREDIENT_INDEX 为 ingredient_id 为空的条目补上食材 id（目录新增别名后也可重跑）。
+    与 backfill_amounts 一样按 id 分批；仍识别不了的行保持 NULL。返回更新的行数。
+    """
+    last_id, resolved = 0, 0
+    while True:
+        rows = db.execute(_unresolved_batch_stmt(last_id, batch_size)).all()
+        if not rows:
+            return resolved
+        params = []
+        for row in rows:
+            ingredient_id = INGREDIENT_INDEX.resolve(row.name)
+            if ingredient_id is not None:
+                params.append({"item_id": row.id, "ingredient_id": ingredient_id})
+        if params:
+            db.execute(_ingredient_update_stmt(), params)
+            db.commit()
+            resolved += len(params)
+        last_id = rows[-1].id
+
+
+def compact_tombstones(db: Session, older_than: timedelta) -> int:
+    """
+    删除早于 older_than 的 tombstone，并把每个用户被清理掉的最大 change_seq
+    记到 compacted_seq；游标早于它的客户端下次同步会收到 reset。返回清理的行数。
+    """
+    cutoff = _tombstone_cutoff(older_than)
+    db.execute(_compact_versions_stmt(cutoff))
+    result = db.execute(_expired_tombstones_stmt(cutoff))
     db.commit()
+    return result.rowcount
+
+
+# ---------- async 版本（AsyncSession，router 使用）----------
+
+async def get_version_async(db: AsyncSession, user_id: int) -> int:
+    return (await db.scalar(_version_stmt(user_id))) or 0
+
+
+async def _bump_version_async(db: AsyncSession, user_id: int) -> int:
+    dialect_name = db.get_bind().dialect.name
+    stmt = _upsert_version_stmt(dialect_name, user_id)
+    if stmt is None:
+        result = await db.execute(_bump_version_stmt(user_id))
+        if result.rowcount == 0:
+            db.add(PantryVersion(user_id=user_id, version=1))
+            return 1
+    elif _upsert_returns_version(db, dialect_name):
+        return await db.scalar(stmt.returning(PantryVersion.version))
+    else:
+        await db.execute(stmt)
+    return await db.scalar(_version_stmt(user_id))
+
+
+async def list_items_async(db: AsyncSession, user_id: int) -> List[PantryItem]:
+    return list(await db.scalars(_list_items_stmt(user_id)))
+
+
+async def list_items_page_async(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    name_prefix: Optional[str] = None,
+    unit: Optional[str] = None,
+) -> Tuple[List[PantryItem], Optional[str]]:
+    items = list(await db.scalars(_page_items_stmt(user_id, limit, after, name_prefix, unit)))
+    return _split_page(items, limit)
+
+
+async def list_ingredient_dicts_async(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
+    result = await db.execute(_ingredient_dicts_stmt(user_id))
+    return [dict(row) for row in result.mappings()]
+
+
+async def get_item_async(db: AsyncSession, user_id: int, item_id: int) -> Optional[PantryItem]:
+    return await db.scalar(_get_item_stmt(user_id, item_id))
+
+
+async def get_changes_async(
+    db: AsyncSession,
+    user_id: int,
+    since: Optional[int],
+    limit: int,
+    page: Optional[str] = None,
+) -> PantryChanges:
+    if page is not None:
+        version, after = decode_snapshot_page(page)
+        return _snapshot_page(version, *await list_items_page_async(db, user_id, limit, after))
+    version, compacted_seq = (await db.execute(_sync_state_stmt(user_id))).first() or (0, 0)
+    if _needs_reset(since, version, compacted_seq):
+        return _snapshot_page(version, *await list_items_page_async(db, user_id, limit))
+    if since == version:
+        return PantryChanges(cursor=version, reset=False, items=[], deleted=[])
+    items = list(await db.scalars(_changed_items_stmt(user_id, since)))
+    return _changes(version, since, items, await db.scalars(_deleted_ids_stmt(user_id, since)))
+
+
+async def create_item_async(db: AsyncSession, user_id: int, **data) -> PantryItem:
+    seq = await _bump_version_async(db, user_id)
+    item = PantryItem(user_id=user_id, change_seq=seq, **_with_amount(data))
+    db.add(item)
+    await db.commit()
+    await db.refresh(item)
+    return item
+
+
+async def bulk_create_items_async(db: AsyncSession, user_id: int, items: Iterable[dict]) -> List[PantryItem]:
+    rows = list(items)
+    if not rows:
+        return []
+    seq = await _bump_version_async(db, user_id)
+    rows = [dict(_with_amount(data), user_id=user_id, change_seq=seq) for data in rows]
+    created: List[PantryItem] = []
+    returning = _supports_insert_returning(db)
+    for chunk in _chunks(rows, BULK_INSERT_CHUNK_SIZE):
+        if returning:
+            created.extend(sorted(await db.scalars(_insert_returning_stmt(), chunk), key=_by_id))
+        else:
+            await db.execute(insert(PantryItem).values(chunk))
+    if not returning:
+        created = list(await db.scalars(_inserted_rows_stmt(user_id, seq)))
+    try:
+        _check_inserted(created, len(rows))
+    except RuntimeError:
+        await db.rollback()
+        raise
+    await db.commit()
+    return created
+
+
+async def update_item_async(db: AsyncSession, item: PantryItem, **updates) -> PantryItem:
+    for field, value in updates.items():
+        setattr(item, field, value)
+    if "quantity" in updates or "unit" in updates:
+        item.quantity_value, item.unit_canonical = canonical_amount(item.quantity, item.unit)
+    if "name" in updates:
+        item.ingredient_id = INGREDIENT_INDEX.resolve(item.name)
+    item.change_seq = await _bump_version_async(db, item.user_id)
+    db.add(item)
+    await db.commit()
+    await db.refresh(item)
+    return item
+
+
+async def delete_item_async(db: AsyncSession, item: PantryItem) -> None:
+    seq = await _bump_version_async(db, item.user_id)
+    db.add(PantryTombstone(user_id=item.user_id, item_id=item.id, change_seq=seq))
+    await db.delete(item)
+    await db.commit()
+
+
+async def clear_items_async(db: AsyncSession, user_id: int) -> int:
+    seq = await _bump_version_async(db, user_id)
+    await db.execute(_tombstones_stmt(user_id, seq))
+    result = await db.execute(_delete_items_stmt(user_id))
+    await db.commit()
+    return result.rowcount
+
+
+async def delete_items_async(db: AsyncSession, user_id: int, item_ids: Sequence[int]) -> List[int]:
+    if not item_ids:
+        return []
+    owned = list(await db.scalars(_owned_ids_stmt(user_id, item_ids)))
+    if owned:
+        seq = await _bump_version_async(db, user_id)
+        await db.execute(_tombstones_stmt(user_id, seq, owned))
+        await db.execute(_delete_items_stmt(user_id, owned))
+        await db.commit()
+    return owned
+
+
+async def update_items_async(db: AsyncSession, user_id: int, updates: Sequence[dict]) -> Dict[int, PantryItem]:
+    item_ids = list({data["id"] for data in updates})
+    if not item_ids:
+        return {}
+    result = await db.execute(_owned_amounts_stmt(user_id, item_ids))
+    owned = {row.id: (row.quantity, row.unit) for row in result}
+    if not owned:
+        return {}
+    params = _update_params(updates, owned)
+    if params:
+        seq = await _bump_version_async(db, user_id)
+        await db.execute(update(PantryItem), [dict(p, change_seq=seq) for p in params])
+        await db.commit()
+    result = await db.scalars(_items_by_ids_stmt(user_id, list(owned)))
+    return {item.id: item for item in result}
+
+
+async def sum_quantities_async(
+    db: AsyncSession, user_id: int, name_prefix: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    result = await db.execute(_totals_stmt(user_id, name_prefix))
+    return [dict(row) for row in result.mappings()]
+
+
+async def list_low_stock_async(
+    db: AsyncSession, user_id: int, threshold: float, unit: Optional[str] = None
+) -> List[PantryItem]:
+    return list(await db.scalars(_low_stock_stmt(user_id, threshold, unit)))
+
+
+async def compact_tombstones_async(db: AsyncSession, older_than: timedelta) -> int:
+    cutoff = _tombstone_cutoff(older_than)
+    await db.execute(_compact_versions_stmt(cutoff))
+    result = await db.execute(_expired_tombstones_stmt(cutoff))
+    await db.commit()
+    return result.rowcount
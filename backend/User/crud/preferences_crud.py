@@ -2,20 +2,150 @@
 
 from __future__ import annotations
 
-from typing import Any, Optional
+import os
+from typing import Any, List, NamedTuple, Optional
 
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from backend.User.database import is_replica_session
 from backend.User.models.preferences import UserPreference
+from backend.User.models.user import User
+from backend.User.utils.cache import TTLCache
+
+# GET /preferences/ 的读穿缓存：key = user_id，value = PreferencesSnapshot。
+# 本进程内的 upsert / delete 会立即失效对应条目；其他 worker 的写入最多 TTL 秒后可见
+# （ETag 版本号也在快照里，所以同一 worker 内 304 判断与返回内容始终一致）。
+# 读库与写入方失效并发时，读到的旧快照不会被写回（见 TTLCache.generation）。
+# 只读副本上读到的快照不写入缓存：副本可能落后于主库，缓存会把旧数据保留整个 TTL，
+# 远超 read-your-writes 的固定窗口（DATABASE_READ_YOUR_WRITES_SECONDS）。
+PREFERENCES_CACHE = TTLCache(
+    "preferences",
+    maxsize=int(os.getenv("PREFERENCES_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("PREFERENCES_CACHE_TTL", "300")),
+)
+
+
+class PreferencesSnapshot(NamedTuple):
+    """某个版本的偏好（不是 ORM 对象，可安全跨请求缓存）；没有偏好行时是默认值。"""
+
+    version: int
+    diets: List[str]
+    allergens: List[str]
+    max_cooking_time: Optional[int]
+    difficulty: Optional[str]
+
+
+def _get_preferences_stmt(user_id: int):
+    return select(UserPreference).where(UserPreference.user_id == user_id)
+
+
+def _bump_version_stmt(user_id: int):
+    """与偏好写入同一事务：users.preferences_version + 1，GET /preferences/ 的 ETag 随之变化。"""
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(preferences_version=User.preferences_version + 1)
+    )
+
+
+def _snapshot_stmt(user_id: int):
+    """版本号和偏好一条 SELECT 取回；LEFT JOIN：没有偏好行时偏好列为 NULL。"""
+    return (
+        select(
+            User.preferences_version,
+            UserPreference.diets,
+            UserPreference.allergens,
+            UserPreference.max_cooking_time,
+            UserPreference.difficulty,
+        )
+        .outerjoin(UserPreference, UserPreference.user_id == User.id)
+        .where(User.id == user_id)
+    )
+
+
+# 支持原生 upsert 的方言；其他方言退回 SELECT + add / setattr 的 ORM 写法
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+    "mysql": mysql_insert,
+    "mariadb": mysql_insert,
+}
+
+
+def _upsert_stmt(dialect_name: str, user_id: int, updates: dict):
+    """
+    单条原生 upsert：user_id 唯一约束冲突时只覆盖本次传入的字段（外加 updated_at），
+    两个并发的首次写入不会再因为唯一约束失败。方言不支持时返回 None。
+    """
+    make_insert = _UPSERT_INSERTS.get(dialect_name)
+    if make_insert is None:
+        return None
+    stmt = make_insert(UserPreference).values(user_id=user_id, **updates)
+    if make_insert is mysql_insert:
+        # ON DUPLICATE KEY UPDATE 不会触发 onupdate，updated_at 显式写
+        return stmt.on_duplicate_key_update(
+            updated_at=func.now(), **{field: stmt.inserted[field] for field in updates}
+        )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserPreference.user_id],
+        set_=dict({field: stmt.excluded[field] for field in updates}, updated_at=func.now()),
+    )
+
+
+def _upsert_returns_row(db, dialect_name: str) -> bool:
+    """SQLite ≥ 3.35 / PostgreSQL：INSERT ... ON CONFLICT ... RETURNING 一次拿回整行；MySQL 需再 SELECT 一次。"""
+    return dialect_name not in ("mysql", "mariadb") and bool(db.get_bind().dialect.insert_returning)
+
+
+def _to_snapshot(row) -> PreferencesSnapshot:
+    if row is None:
+        return PreferencesSnapshot(0, [], [], None, None)
+    version, diets, allergens, max_cooking_time, difficulty = row
+    return PreferencesSnapshot(version or 0, diets or [], allergens or [], max_cooking_time, difficulty)
 
 
 def get_preferences(db: Session, user_id: int) -> Optional[UserPreference]:
-    stmt = select(UserPreference).where(UserPreference.user_id == user_id)
-    return db.scalar(stmt)
+    return db.scalar(_get_preferences_stmt(user_id))
+
+
+def get_snapshot(db: Session, user_id: int) -> PreferencesSnapshot:
+    """读穿缓存；未命中时只读不写（没有偏好行就返回默认值）。副本 session 读到的快照不缓存。"""
+    snapshot = PREFERENCES_CACHE.get(user_id)
+    if snapshot is None:
+        generation = PREFERENCES_CACHE.generation()
+        snapshot = _to_snapshot(db.execute(_snapshot_stmt(user_id)).first())
+        if not is_replica_session(db):
+            PREFERENCES_CACHE.set(user_id, snapshot, generation)
+    return snapshot
 
 
 def upsert_preferences(db: Session, user_id: int, **updates: Any) -> UserPreference:
+    dialect_name = db.get_bind().dialect.name
+    stmt = _upsert_stmt(dialect_name, user_id, updates)
+    if stmt is None:
+        return _upsert_preferences_orm(db, user_id, updates)
+
+    if _upsert_returns_row(db, dialect_name):
+        prefs = db.scalars(
+            stmt.returning(UserPreference).execution_options(populate_existing=True)
+        ).one()
+    else:
+        db.execute(stmt)
+        prefs = db.scalars(
+            _get_preferences_stmt(user_id).execution_options(populate_existing=True)
+        ).one()
+    db.execute(_bump_version_stmt(user_id))
+    db.commit()
+    PREFERENCES_CACHE.pop(user_id)
+    return prefs
+
+
+def _upsert_preferences_orm(db: Session, user_id: int, updates: dict) -> UserPreference:
     prefs = get_preferences(db, user_id=user_id)
     if not prefs:
         prefs = UserPreference(user_id=user_id)
@@ -24,7 +154,9 @@ def upsert_preferences(db: Session, user_id: int, **updates: Any) -> UserPrefere
     for field, value in updates.items():
         setattr(prefs, field, value)
 
+    db.execute(_bump_version_stmt(user_id))
     db.commit()
+    PREFERENCES_CACHE.pop(user_id)
     db.refresh(prefs)
     return prefs
 
@@ -33,4 +165,69 @@ def delete_preferences(db: Session, user_id: int) -> None:
     prefs = get_preferences(db, user_id=user_id)
     if prefs:
         db.delete(prefs)
+        db.execute(_bump_version_stmt(user_id))
         db.commit()
+        PREFERENCES_CACHE.pop(user_id)
+
+
+# ---------- async 版本（AsyncSession，router 使用）----------
+
+async def get_preferences_async(db: AsyncSession, user_id: int) -> Optional[UserPreference]:
+    return await db.scalar(_get_preferences_stmt(user_id))
+
+
+async def get_snapshot_async(db: AsyncSession, user_id: int) -> PreferencesSnapshot:
+    snapshot = PREFERENCES_CACHE.get(user_id)
+    if snapshot is None:
+        generation = PREFERENCES_CACHE.generation()
+        snapshot = _to_snapshot((await db.execute(_snapshot_stmt(user_id))).first())
+        if not is_replica_session(db):
+            PREFERENCES_CACHE.set(user_id, snapshot, generation)
+    return snapshot
+
+
+async def upsert_preferences_async(db: AsyncSession, user_id: int, **updates: Any) -> UserPreference:
+    """同 upsert_preferences：SQLite / PostgreSQL 上写入并读回整行只需一次往返。"""
+    dialect_name = db.get_bind().dialect.name
+    stmt = _upsert_stmt(dialect_name, user_id, updates)
+    if stmt is None:
+        return await _upsert_preferences_orm_async(db, user_id, updates)
+
+    if _upsert_returns_row(db, dialect_name):
+        prefs = (
+            await db.scalars(stmt.returning(UserPreference).execution_options(populate_existing=True))
+        ).one()
+    else:
+        await db.execute(stmt)
+        prefs = (
+            await db.scalars(_get_preferences_stmt(user_id).execution_options(populate_existing=True))
+        ).one()
+    await db.execute(_bump_version_stmt(user_id))
+    await db.commit()
+    PREFERENCES_CACHE.pop(user_id)
+    return prefs
+
+
+async def _upsert_preferences_orm_async(db: AsyncSession, user_id: int, updates: dict) -> UserPreference:
+    prefs = await get_preferences_async(db, user_id=user_id)
+    if not prefs:
+        prefs = UserPreference(user_id=user_id)
+        db.add(prefs)
+
+    for field, value in updates.items():
+        setattr(prefs, field, value)
+
+    await db.execute(_bump_version_stmt(user_id))
+    await db.commit()
+    PREFERENCES_CACHE.pop(user_id)
+    await db.refresh(prefs)
+    return prefs
+
+
+async def delete_preferences_async(db: AsyncSession, user_id: int) -> None:
+    prefs = await get_preferences_async(db, user_id=user_id)
+    if prefs:
+        await db.delete(prefs)
+        await db.execute(_bump_version_stmt(user_id))
+        await db.commit()
+        PREFERENCES_CACHE.pop(user_id)
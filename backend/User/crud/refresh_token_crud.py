@@ -0,0 +1,183 @@
+# backend/User/crud/refresh_token_crud.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.User.crud import user_crud
+from backend.User.crud.user_crud import Principal
+from backend.User.models.refresh_token import RefreshToken
+
+# 刷新令牌有效期（天）；每次轮换都会签发一个新的完整有效期
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+
+def hash_token(raw_token: str) -> str:
+    """数据库里只存 SHA-256：令牌本身是 256 位随机数，不需要 bcrypt 这类慢哈希。"""
+    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
+def _utcnow() -> datetime:
+    # 与 Timestamp 列一致：naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _new_token(user_id: int, token_version: int, family_id: Optional[str] = None) -> Tuple[str, RefreshToken]:
+    """返回 (原文, 待 add 的行)；family_id 为空表示一次新登录。"""
+    raw_token = secrets.token_urlsafe(32)
+    row = RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(raw_token),
+        family_id=family_id or secrets.token_hex(16),
+        token_version=token_version,
+        expires_at=_utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return raw_token, row
+
+
+def _lookup_stmt(raw_token: str, now: Optional[datetime] = None):
+    """按唯一索引查找；传入 now 时过期的令牌当作不存在（在 SQL 里比较，不受驱动返回的时区影响）。"""
+    stmt = select(RefreshToken).where(RefreshToken.token_hash == hash_token(raw_token))
+    if now is not None:
+        stmt = stmt.where(RefreshToken.expires_at > now)
+    return stmt
+
+
+def _claim_stmt(token_id: int, now: datetime):
+    """
+    条件 UPDATE 标记已使用：两个请求同时拿同一个令牌来刷新时只有一个 rowcount == 1，
+    另一个按重放处理。
+    """
+    return (
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == token_id,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+        )
+        .values(used_at=now)
+    )
+
+
+def _revoke_family_stmt(family_id: str, now: datetime):
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+
+
+def _purge_stmt(now: datetime):
+    return delete(RefreshToken).where(RefreshToken.expires_at <= now)
+
+
+# ---------- 同步版本 ----------
+
+def issue_refresh_token(db: Session, user_id: int, token_version: int) -> str:
+    """登录时调用：开一个新的 family，返回令牌原文（只此一次）。"""
+    raw_token, row = _new_token(user_id, token_version)
+    db.add(row)
+    db.commit()
+    return raw_token
+
+
+def rotate_refresh_token(db: Session, raw_token: str) -> Optional[Tuple[Principal, str]]:
+    """
+    用刷新令牌换新令牌，返回 (principal, 新令牌原文)；失败返回 None（router 转 401）。
+    - 不存在 / 已过期 / 用户改过密码（token_version 变了）：失败；
+    - 已用过或已撤销：视为令牌泄露后的重放，整个 family 撤销，合法持有者也需要重新登录。
+    全程只有主键 / 唯一索引查询，不跑 bcrypt。
+    """
+    now = _utcnow()
+    token = db.scalar(_lookup_stmt(raw_token, now))
+    if token is None:
+        return None
+    if token.used_at is not None or token.revoked_at is not None or not db.execute(
+        _claim_stmt(token.id, now)
+    ).rowcount:
+        db.execute(_revoke_family_stmt(token.family_id, now))
+        db.commit()
+        return None
+
+    principal = user_crud.get_principal(db, token.user_id, token.token_version)
+    if principal is None:
+        db.execute(_revoke_family_stmt(token.family_id, now))
+        db.commit()
+        return None
+    new_token, row = _new_token(principal.id, principal.token_version, token.family_id)
+    db.add(row)
+    db.commit()
+    return principal, new_token
+
+
+def revoke_refresh_token(db: Session, raw_token: str) -> bool:
+    """登出：撤销该令牌所在的整个 family。令牌不存在时返回 False。"""
+    token = db.scalar(_lookup_stmt(raw_token))
+    if token is None:
+        return False
+    db.execute(_revoke_family_stmt(token.family_id, _utcnow()))
+    db.commit()
+    return True
+
+
+def purge_expired(db: Session) -> int:
+    """删除已过期的刷新令牌行，返回删除条数。"""
+    removed = db.execute(_purge_stmt(_utcnow())).rowcount
+    db.commit()
+    return removed
+
+
+# ---------- async 版本（AsyncSession，router 使用）----------
+
+async def issue_refresh_token_async(db: AsyncSession, user_id: int, token_version: int) -> str:
+    raw_token, row = _new_token(user_id, token_version)
+    db.add(row)
+    await db.commit()
+    return raw_token
+
+
+async def rotate_refresh_token_async(db: AsyncSession, raw_token: str) -> Optional[Tuple[Principal, str]]:
+    """同 rotate_refresh_token。"""
+    now = _utcnow()
+    token = await db.scalar(_lookup_stmt(raw_token, now))
+    if token is None:
+        return None
+    if token.used_at is not None or token.revoked_at is not None or not (
+        await db.execute(_claim_stmt(token.id, now))
+    ).rowcount:
+        await db.execute(_revoke_family_stmt(token.family_id, now))
+        await db.commit()
+        return None
+
+    principal = await user_crud.get_principal_async(db, token.user_id, token.token_version)
+    if principal is None:
+        await db.execute(_revoke_family_stmt(token.family_id, now))
+        await db.commit()
+        return None
+    new_token, row = _new_token(principal.id, principal.token_version, token.family_id)
+    db.add(row)
+    await db.commit()
+    return principal, new_token
+
+
+async def revoke_refresh_token_async(db: AsyncSession, raw_token: str) -> bool:
+    token = await db.scalar(_lookup_stmt(raw_token))
+    if token is None:
+        return False
+    await db.execute(_revoke_family_stmt(token.family_id, _utcnow()))
+    await db.commit()
+    return True
+
+
+async def purge_expired_async(db: AsyncSession) -> int:
+    removed = (await db.execute(_purge_stmt(_utcnow()))).rowcount
+    await db.commit()
+    return removed
@@ -1,15 +1,83 @@
 # backend/User/crud/user_crud.py
 
-from typing import Optional, List
+import os
+from typing import Optional, List, NamedTuple
 
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 from backend.User.models.user import User
 from backend.User.schemas.user_schemas import (
     UserCreate,
     UserUpdate,
 )
+from backend.User.utils.cache import TTLCache
+
+# 鉴权用的 principal 缓存：key = (user_id, token_version)。
+# 本进程内 update_user / delete_user 提交后立即失效；其他 worker 不会收到通知，
+# 被删除的用户、改密前签发的 token 在那些 worker 上最多还能通过 PRINCIPAL_CACHE_TTL 秒
+# （默认 60 秒）。需要更短的窗口就调小 TTL，代价是更多的鉴权查询
+PRINCIPAL_CACHE = TTLCache(
+    "principals",
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+)
+
+
+class Principal(NamedTuple):
+    """
+    get_current_user 返回的轻量对象：只有鉴权需要的字段。
+    需要完整 User 的路由调用 load_user（按主键查询，已在 identity map 中则不发 SQL）。
+    """
+
+    id: int
+    phone_number: str
+    token_version: int
+
+    async def load_user(self, db: AsyncSession) -> Optional[User]:
+        return await db.get(User, self.id)
+
+
+def _principal_stmt(user_id: int):
+    return select(User.id, User.phone_number, User.token_version).where(User.id == user_id)
+
+
+def _principal_for(row, token_version: int) -> Optional[Principal]:
+    if row is None or row.token_version != token_version:
+        return None
+    return Principal(row.id, row.phone_number, row.token_version)
+
+
+def _principal_key(user: User) -> tuple:
+    # 在修改 / 删除前取：提交后 token_version 已过期（或行已删除），不能再读
+    return (user.id, user.token_version)
+
+
+def _invalidate_principal(key: tuple) -> None:
+    # 必须在 commit 之后：提交前失效的话，并发请求会把旧的行再次放进缓存并保留整个 TTL。
+    # 提交前已经读到旧行、在此之后才写缓存的请求由 get_principal 的 generation 检查挡住
+    PRINCIPAL_CACHE.pop(key)
+
+
+def _new_user_values(user_in: UserCreate, hashed_password: str) -> dict:
+    return {
+        "name": user_in.name,
+        "hashed_password": hashed_password,
+        "phone_number": user_in.phone_number,
+        "preference": user_in.preference,
+        "allergen": user_in.allergen,
+    }
+
+
+def _insert_user_stmt(values: dict):
+    """INSERT ... RETURNING：写入并拿回整行（含 id / 服务端默认值）只需一次往返。"""
+    return insert(User).values(**values).returning(User)
+
+
+def _duplicate_phone() -> ValueError:
+    return ValueError("Phone number already registered")
 
 
 # ---------- 查询类函数 ----------
@@ -45,6 +113,22 @@ def list_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
     return list(db.scalars(stmt))
 
 
+def get_principal(db: Session, user_id: int, token_version: int) -> Optional[Principal]:
+    """
+    (user_id, token_version) → Principal；先查缓存，未命中时按主键只查三列。
+    用户不存在或 token_version 已变（改过密码）时返回 None。
+    查询期间该 key 被 _invalidate_principal 失效过的话，查到的旧行不写回缓存。
+    """
+    key = (user_id, token_version)
+    principal = PRINCIPAL_CACHE.get(key)
+    if principal is None:
+        generation = PRINCIPAL_CACHE.generation()
+        principal = _principal_for(db.execute(_principal_stmt(user_id)).first(), token_version)
+        if principal is not None:
+            PRINCIPAL_CACHE.set(key, principal, generation)
+    return principal
+
+
 # ---------- 创建用户（使用已 hash 的密码）----------
 
 def create_user_with_hashed_password(
@@ -55,24 +139,25 @@ def create_user_with_hashed_password(
     """
     注册时使用：传入已经 hash 好的密码。
     业务规则：
-    - phone_number 不可重复：如果已存在则抛 ValueError，由 router 转成 400/409。
+    - phone_number 不可重复：不预先查询，直接 INSERT，由唯一索引判定；
+      冲突（包括并发注册同一手机号）时抛 ValueError，由 router 转成 400。
     """
-
-    existing = get_user_by_phone(db, user_in.phone_number)
-    if existing:
-        raise ValueError("Phone number already registered")
-
-    user = User(
-        name=user_in.name,
-        hashed_password=hashed_password,
-        phone_number=user_in.phone_number,
-        preference=user_in.preference,
-        allergen=user_in.allergen,
-    )
-
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    values = _new_user_values(user_in, hashed_password)
+    returning = db.get_bind().dialect.insert_returning
+    try:
+        if returning:
+            user = db.scalars(_insert_user_stmt(values)).one()
+        else:
+            # MySQL 没有 INSERT ... RETURNING：flush 拿自增 id，commit 后再读回服务端默认值
+            user = User(**values)
+            db.add(user)
+            db.flush()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise _duplicate_phone()
+    if not returning:
+        db.refresh(user)
     return user
 
 
@@ -113,24 +198,141 @@ def update_user(db: Session, user: User, user_in: UserUpdate) -> User:
         if existing and existing.id != user.id:
             raise ValueError("Phone number already registered by another user")
 
+    principal_key = _principal_key(user)
     for field, value in update_data.items():
         if field == "password":
             # 如果你在上层已经 hash 了，可以映射到 hashed_password
             user.hashed_password = value
         else:
             setattr(user, field, value)
+    # SQL 表达式赋值：UPDATE ... SET profile_version = profile_version + 1，commit 后 refresh 读回
+    user.profile_version = User.profile_version + 1
+    if "password" in update_data:
+        user.token_version = User.token_version + 1
 
     db.add(user)
     db.commit()
+    _invalidate_principal(principal_key)
     db.refresh(user)
     return user
 
 
+def rehash_password(db: Session, user: User, hashed_password: str) -> None:
+    """
+    登录时按新的 bcrypt cost 重算哈希后写回。密码本身没变：
+    不改 token_version / profile_version，已签发的 token 继续有效。
+    """
+    user.hashed_password = hashed_password
+    db.commit()
+
+
 # ---------- 删除用户 ----------
 
 def delete_user(db: Session, user: User) -> None:
     """
     删除用户。
     """
+    principal_key = _principal_key(user)
     db.delete(user)
     db.commit()
+    _invalidate_principal(principal_key)
+
+
+# ---------- async 版本（AsyncSession，router / 鉴权依赖使用）----------
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+
+async def get_user_by_phone_async(db: AsyncSession, phone_number: str) -> Optional[User]:
+    stmt = select(User).where(User.phone_number == phone_number)
+    return await db.scalar(stmt)
+
+
+async def get_user_by_username_async(db: AsyncSession, username: str) -> Optional[User]:
+    """
+    同 get_user_by_username：username 即 phone_number。
+    """
+    return await get_user_by_phone_async(db, phone_number=username)
+
+
+async def create_user_with_hashed_password_async(
+    db: AsyncSession,
+    user_in: UserCreate,
+    hashed_password: str,
+) -> User:
+    """
+    同 create_user_with_hashed_password（手机号重复时抛 ValueError）。
+    """
+    values = _new_user_values(user_in, hashed_password)
+    returning = db.get_bind().dialect.insert_returning
+    try:
+        if returning:
+            user = (await db.scalars(_insert_user_stmt(values))).one()
+        else:
+            user = User(**values)
+            db.add(user)
+            await db.flush()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise _duplicate_phone()
+    if not returning:
+        await db.refresh(user)
+    return user
+
+
+async def update_user_async(db: AsyncSession, user: User, user_in: UserUpdate) -> User:
+    """
+    同 update_user。
+    """
+    update_data = user_in.model_dump(exclude_unset=True)
+
+    if "phone_number" in update_data:
+        existing = await get_user_by_phone_async(db, update_data["phone_number"])
+        if existing and existing.id != user.id:
+            raise ValueError("Phone number already registered by another user")
+
+    principal_key = _principal_key(user)
+    for field, value in update_data.items():
+        if field == "password":
+            user.hashed_password = value
+        else:
+            setattr(user, field, value)
+    user.profile_version = User.profile_version + 1
+    if "password" in update_data:
+        user.token_version = User.token_version + 1
+
+    db.add(user)
+    await db.commit()
+    _invalidate_principal(principal_key)
+    await db.refresh(user)
+    return user
+
+
+async def rehash_password_async(db: AsyncSession, user: User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    await db.commit()
+
+
+async def get_profile_version_async(db: AsyncSession, user_id: int) -> int:
+    """GET /auth/me 的 ETag 版本号：按主键只查一列。"""
+    return (await db.scalar(select(User.profile_version).where(User.id == user_id))) or 0
+
+
+async def get_principal_async(db: AsyncSession, user_id: int, token_version: int) -> Optional[Principal]:
+    key = (user_id, token_version)
+    principal = PRINCIPAL_CACHE.get(key)
+    if principal is None:
+        generation = PRINCIPAL_CACHE.generation()
+        principal = _principal_for((await db.execute(_principal_stmt(user_id))).first(), token_version)
+        if principal is not None:
+            PRINCIPAL_CACHE.set(key, principal, generation)
+    return principal
+
+
+async def delete_user_async(db: AsyncSession, user: User) -> None:
+    principal_key = _principal_key(user)
+    await db.delete(user)
+    await db.commit()
+    _invalidate_principal(principal_key)
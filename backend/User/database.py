@@ -1,19 +1,27 @@
 # backend/User/database.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.engine import make_url
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+import contextlib
+import itertools
 import os
+import re
+import time
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import Awaitable, Callable, Dict, List, Optional
 
-# 加载根目录 .env
-load_dotenv()
+from backend.User.config import load_env
+
+# 加载根目录 .env（只加载一次）
+load_env()
 
 # 默认使用项目 data 文件夹中的 SQLite
 BASE_DIR = Path(__file__).resolve().parents[2]
 default_sqlite_path = BASE_DIR / "data"
-default_sqlite_path.mkdir(parents=True, exist_ok=True)
 default_sqlite_url = f"sqlite:///{default_sqlite_path / 'recipenow.db'}"
 
 env_database_url = os.getenv("DATABASE_URL")
@@ -32,12 +40,148 @@ elif mysql_env_present:
     MYSQL_DB = os.getenv("MYSQL_DB", "recipenow")
     SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
 else:
+    # 只有真正用默认 SQLite 时才需要 data 目录
+    default_sqlite_path.mkdir(parents=True, exist_ok=True)
     SQLALCHEMY_DATABASE_URL = default_sqlite_url
 
+# -------------------------
+# SQLite 性能参数（每个新连接建立时通过 connect 事件执行 PRAGMA）
+# 全部可通过环境变量覆盖；SQLITE_TUNING=0 关闭
+# -------------------------
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def sqlite_pragmas_from_env() -> dict:
+    if os.getenv("SQLITE_TUNING", "1") == "0":
+        return {}
+    return {
+        # WAL：读写互不阻塞，多 worker 并发写时不容易出现 "database is locked"
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        # WAL 下 NORMAL 已保证一致性，只在断电时可能丢失最后几个事务
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        # 遇到写锁时等待（毫秒），而不是立即报错
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        # 负数表示 KiB：-65536 = 64 MiB page cache
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+        "foreign_keys": os.getenv("SQLITE_FOREIGN_KEYS", "ON"),
+    }
+
+
+def apply_sqlite_pragmas(target_engine: Engine, pragmas: dict) -> None:
+    """
+    注册 connect 事件，让连接池里的每个 SQLite 连接都执行这些 PRAGMA。
+    async 引擎请传入 async_engine.sync_engine。
+    """
+    for name, value in pragmas.items():
+        if not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Invalid SQLite PRAGMA value for {name}: {value!r}")
+    if not pragmas:
+        return
+
+    @event.listens_for(target_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+SQLITE_PRAGMAS = sqlite_pragmas_from_env()
+
+# -------------------------
+# 连接池配置（每个引擎各一个池；每个 worker 进程各一套引擎）
+# 估算 MySQL max_connections：worker 数 × 引擎数（sync + async，副本另算）
+#   × (DB_POOL_SIZE + DB_MAX_OVERFLOW) 应留有余量
+# -------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# 池满时等待空闲连接的秒数，超时抛 sqlalchemy.exc.TimeoutError
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# 连接存活超过这么多秒后在下次 checkout 时重建；应小于 MySQL wait_timeout。-1 关闭
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# pessimistic：每次 checkout 先 ping（多一次往返，从不拿到断开的连接）
+# optimistic：不 ping，靠 recycle；用到已断开的连接时 handle_error 作废整个池（之后的 checkout 重新建连），
+#             若这是 session 事务里的第一条语句，ReconnectingSession 回滚后换新连接重试一次；
+#             事务中途断连无法安全重放，照常报错
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "pessimistic")
+_PRE_PING_STRATEGIES = {"pessimistic": True, "optimistic": False}
+
+# -------------------------
+# 连接池统计：pool 事件计数，/metrics 导出
+# - checkouts / checkins：借出 / 归还
+# - connects / closes / invalidations：新建、关闭、作废的 DBAPI 连接（连接抖动）
+# - connect_ms_*：新建 DBAPI 连接（握手）的耗时（do_connect → connect）
+# - checkout_hold_ms_*：连接从借出到归还的时长（checkout → checkin）；池满时请求排队等的就是它
+# - disconnects / reconnects：撞上断开的连接次数、其中换新连接重试成功的次数
+# - timeouts：池满等待超时（请求 session 依赖里统计）
+# -------------------------
+POOL_STATS = {
+    "checkouts": 0,
+    "checkins": 0,
+    "connects": 0,
+    "closes": 0,
+    "invalidations": 0,
+    "connect_ms_total": 0.0,
+    "connect_ms_max": 0.0,
+    "checkout_hold_ms_total": 0.0,
+    "checkout_hold_ms_max": 0.0,
+    "disconnects": 0,
+    "reconnects": 0,
+    "timeouts": 0,
+}
+
+
+def _record_ms(stats: dict, name: str, started: Optional[float]) -> None:
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats[f"{name}_ms_total"] += elapsed_ms
+    stats[f"{name}_ms_max"] = max(stats[f"{name}_ms_max"], elapsed_ms)
+
+
+def pool_kwargs(url: str, is_async: bool = False) -> dict:
+    """按上面的环境变量生成 create_engine / create_async_engine 的连接池参数。"""
+    if DB_POOL_PRE_PING not in _PRE_PING_STRATEGIES:
+        raise ValueError(f"Invalid DB_POOL_PRE_PING: {DB_POOL_PRE_PING!r} (pessimistic | optimistic)")
+    kwargs = {"pool_pre_ping": _PRE_PING_STRATEGIES[DB_POOL_PRE_PING], "pool_recycle": DB_POOL_RECYCLE}
+    url_obj = make_url(url)
+    if url_obj.get_backend_name() == "sqlite" and url_obj.database in (None, "", ":memory:"):
+        # 内存库用 SingletonThreadPool / StaticPool，没有大小可配
+        return kwargs
+    kwargs.update(
+        poolclass=AsyncAdaptedQueuePool if is_async else QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    return kwargs
+
+
+def pool_status(target_engine: Engine) -> dict:
+    """当前池占用：saturation = 借出数 / (pool_size + max_overflow)，接近 1 说明池偏小。"""
+    pool = target_engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    capacity = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "capacity": capacity,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": pool.checkedout() / capacity if capacity else 0.0,
+    }
+
+
 # -------------------------
 # SQLAlchemy 初始化
 # -------------------------
-engine_kwargs = {"pool_pre_ping": True}
+engine_kwargs = pool_kwargs(SQLALCHEMY_DATABASE_URL)
 url_obj = make_url(SQLALCHEMY_DATABASE_URL)
 if url_obj.drivername == "sqlite":
     if url_obj.database:
@@ -45,22 +189,318 @@ if url_obj.drivername == "sqlite":
     engine_kwargs["connect_args"] = {"check_same_thread": False}
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_kwargs)
+if url_obj.drivername == "sqlite":
+    apply_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+
+# -------------------------
+# Async 引擎（router 使用，不占用 Starlette 线程池）
+# sqlite → sqlite+aiosqlite，mysql / mysql+pymysql → mysql+aiomysql
+# -------------------------
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(url: str) -> str:
+    url_obj = make_url(url)
+    async_driver = _ASYNC_DRIVERS.get(url_obj.drivername)
+    if async_driver is None:
+        return url
+    return url_obj.set(drivername=async_driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+
+def make_async_engine(url: str) -> AsyncEngine:
+    """主库和只读副本共用的 async 引擎配置（连接池参数；SQLite 加 PRAGMA）。"""
+    kwargs = pool_kwargs(url, is_async=True)
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    target = create_async_engine(url, **kwargs)
+    if is_sqlite:
+        apply_sqlite_pragmas(target.sync_engine, SQLITE_PRAGMAS)
+    return target
+
+
+async_engine = make_async_engine(ASYNC_DATABASE_URL)
+
+def track_pool_events(target_engine: Engine, stats: dict = POOL_STATS) -> None:
+    """
+    统计 target_engine 的连接池事件；async 引擎传入 async_engine.sync_engine。
+    耗时用 connection_record.info 里的时间戳计算（连接建立、借出各记一次）。
+    """
+    for key in ("checkouts", "checkins", "connects", "closes", "invalidations", "disconnects", "reconnects", "timeouts"):
+        stats.setdefault(key, 0)
+    for key in ("connect_ms_total", "connect_ms_max", "checkout_hold_ms_total", "checkout_hold_ms_max"):
+        stats.setdefault(key, 0.0)
+
+    @event.listens_for(target_engine, "do_connect")
+    def _on_do_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(target_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats["connects"] += 1
+        _record_ms(stats, "connect", connection_record.info.pop("connect_started", None))
+
+    @event.listens_for(target_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats["checkouts"] += 1
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(target_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats["checkins"] += 1
+        _record_ms(stats, "checkout_hold", connection_record.info.pop("checked_out_at", None))
+
+    @event.listens_for(target_engine, "close")
+    def _on_close(dbapi_connection, connection_record):
+        stats["closes"] += 1
+
+    @event.listens_for(target_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats["invalidations"] += 1
+
+    @event.listens_for(target_engine, "handle_error")
+    def _on_error(context):
+        if context.is_disconnect:
+            # 作废整个池：同一时刻之前建立的连接都可能已断开，之后的 checkout 全部重新建连
+            context.invalidate_pool_on_disconnect = True
+            stats["disconnects"] += 1
+
+
+class ReconnectingSession(Session):
+    """
+    execute / scalar / scalars 撞上断开的连接（DBAPIError.connection_invalidated）时，
+    如果这条语句是本事务的第一条（调用前 session 不在事务中），说明没有别的未提交工作：
+    回滚后重新 checkout 一个连接再执行一次。事务中途断连照常抛出。
+    AsyncSession 通过 sync_session_class 使用它。
+    """
+
+    def _retry_stale(self, method, *args, **kwargs):
+        if self.in_transaction():
+            return method(*args, **kwargs)
+        try:
+            return method(*args, **kwargs)
+        except DBAPIError as exc:
+            if not exc.connection_invalidated:
+                raise
+            self.rollback()
+            result = method(*args, **kwargs)
+            POOL_STATS["reconnects"] += 1
+            return result
+
+    def execute(self, *args, **kwargs):
+        return self._retry_stale(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._retry_stale(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._retry_stale(super().scalars, *args, **kwargs)
+
+
+track_pool_events(engine)
+track_pool_events(async_engine.sync_engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
+    class_=ReconnectingSession,
+)
+
+# expire_on_commit=False：commit 之后仍可直接读取属性（async 下不能隐式懒加载）
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=ReconnectingSession,
+    autoflush=False,
+    expire_on_commit=False,
 )
 
 Base = declarative_base()
 
 
 # -------------------------
-# FastAPI 用的依赖函数 get_db()
+# FastAPI 用的依赖函数：每个请求唯一的 AsyncSession
 # -------------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def get_async_db():
+    """
+    鉴权（get_current_user）和路由都依赖这一个函数；FastAPI 在同一请求内
+    会缓存依赖结果，所以整个请求共用一个 session、最多占用一个池连接。
+    鉴权时加载的 User 留在该 session 的 identity map 中，
+    路由里再用 db.get(User, id) 不会重复查询。
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except PoolTimeoutError:
+            POOL_STATS["timeouts"] += 1
+            raise
+
+
+# -------------------------
+# 只读副本（可选）：DATABASE_READ_URLS=url1,url2（同步或 async URL 均可）
+# 只读路由通过 auth_dependencies.get_read_db 使用；未配置时一切照旧走主库
+# -------------------------
+DATABASE_READ_URLS = [u.strip() for u in os.getenv("DATABASE_READ_URLS", "").split(",") if u.strip()]
+# 用户写入后这么多秒内的读仍走主库（read-your-writes），路由可单独指定更长 / 更短
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DATABASE_READ_YOUR_WRITES_SECONDS", "5"))
+# 副本连接失败后暂停使用的秒数
+REPLICA_RETRY_SECONDS = float(os.getenv("DATABASE_REPLICA_RETRY_SECONDS", "30"))
+
+
+class ReplicaSet:
+    """
+    只读副本选择：
+    - 轮询（round-robin），跳过最近连接失败、仍在冷却期内的副本；
+    - 取 session 时先 checkout 连接（pool_pre_ping 顺带做健康检查），失败则标记下线并换下一个，
+      全部不可用时返回 None，由调用方退回主库；
+    - record_write(user_id) 记录用户最近一次写入时间，session_for 据此决定是否仍需走主库。
+      记录只在本进程内（每个 worker 一份），只是省掉下面检查的快速路径；
+    - is_current(replica_session) 由调用方提供（比较该用户在主库和副本上的写入版本号），
+      返回 False 说明副本还没追上这个用户的写入（可能写在别的 worker / 主机上），改走主库。
+    """
+
+    def __init__(
+        self,
+        session_factories: List[async_sessionmaker],
+        retry_after: float = REPLICA_RETRY_SECONDS,
+        max_tracked_users: int = 100_000,
+    ):
+        self._factories = list(session_factories)
+        self._retry_after = retry_after
+        self._down_until = [0.0] * len(self._factories)
+        self._cursor = itertools.count()
+        self._last_write: Dict[int, float] = {}
+        self._max_tracked_users = max_tracked_users
+        self.counters = {"replica_reads": 0, "primary_reads": 0, "pinned_reads": 0, "lagging_reads": 0, "failovers": 0}
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def record_write(self, user_id: int) -> None:
+        now = time.monotonic()
+        if len(self._last_write) >= self._max_tracked_users:
+            # 超出上限时丢掉已过窗口的记录；仍超出就整体清空（最坏情况只是多读几次副本）
+            horizon = now - max(READ_YOUR_WRITES_SECONDS, 60.0)
+            self._last_write = {uid: ts for uid, ts in self._last_write.items() if ts > horizon}
+            if len(self._last_write) >= self._max_tracked_users:
+                self._last_write.clear()
+        self._last_write[user_id] = now
+
+    def wrote_within(self, user_id: int, seconds: float) -> bool:
+        written_at = self._last_write.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < seconds
+
+    async def session_for(
+        self,
+        user_id: Optional[int],
+        fresh_for: float,
+        is_current: Optional[Callable[[AsyncSession], Awaitable[bool]]] = None,
+    ) -> Optional[AsyncSession]:
+        """返回一个已连上的副本 session；应走主库时返回 None。"""
+        if not self._factories:
+            return None
+        if user_id is not None and fresh_for > 0 and self.wrote_within(user_id, fresh_for):
+            self.counters["pinned_reads"] += 1
+            self.counters["primary_reads"] += 1
+            return None
+        start = next(self._cursor)
+        now = time.monotonic()
+        for offset in range(len(self._factories)):
+            index = (start + offset) % len(self._factories)
+            if self._down_until[index] > now:
+                continue
+            db = self._factories[index]()
+            try:
+                await db.connection()
+            except (DBAPIError, OSError):
+                await db.close()
+                self._down_until[index] = time.monotonic() + self._retry_after
+                self.counters["failovers"] += 1
+                continue
+            if is_current is not None and not await is_current(db):
+                await db.close()
+                self.counters["lagging_reads"] += 1
+                break
+            # 标记副本 session：读到的数据可能落后于主库，进程内缓存据此不写入
+            db.info["replica"] = True
+            self.counters["replica_reads"] += 1
+            return db
+        self.counters["primary_reads"] += 1
+        return None
+
+    async def dispose(self, close: bool = True) -> None:
+        for factory in self._factories:
+            await factory.kw["bind"].dispose(close=close)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return dict(
+            self.counters,
+            replicas=len(self._factories),
+            healthy=sum(1 for until in self._down_until if until <= now),
+        )
+
+
+def is_replica_session(db) -> bool:
+    """db 是否是 ReplicaSet.session_for 返回的副本 session（读到的数据可能落后于主库）。"""
+    return bool(db.info.get("replica"))
+
+
+def _replica_session_factory(url: str) -> async_sessionmaker:
+    replica_engine = make_async_engine(to_async_url(url))
+    track_pool_events(replica_engine.sync_engine)
+    return async_sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        sync_session_class=ReconnectingSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+READ_REPLICAS = ReplicaSet([_replica_session_factory(url) for url in DATABASE_READ_URLS])
+
+
+async def dispose_engines(close: bool = True) -> None:
+    """
+    清空主库 / 只读副本引擎的连接池（应用 lifespan 使用）。
+    close=False 只丢弃池里的连接而不关闭 socket：prefork 多 worker 时子进程启动先调用一次，
+    保证不会和父进程共用 fork 前打开的连接；关闭时用默认的 close=True。
+    """
+    await async_engine.dispose(close=close)
+    engine.dispose(close=close)
+    await READ_REPLICAS.dispose(close=close)
+
+
+async def warm_pool(connections: int, target: Optional[AsyncEngine] = None) -> int:
+    """
+    预先建立最多 connections 个连接（不超过 pool_size）并归还池中，
+    第一批请求不必再付建连 / 握手的开销。NullPool 等不保留连接的池返回 0。
+    """
+    target = target or async_engine
+    pool = target.sync_engine.pool
+    count = min(connections, pool.size()) if hasattr(pool, "size") else 0
+    if count <= 0:
+        return 0
+    async with contextlib.AsyncExitStack() as stack:
+        # 同时持有 count 个连接，池里才会真的有 count 个
+        for _ in range(count):
+            conn = await stack.enter_async_context(target.connect())
+            await conn.exec_driver_sql("SELECT 1")
+    return count
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer_to_primary(session):
+    # get_current_user 把当前用户 id 记在请求 session.info 里；该 session 提交即视为这个用户写过
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        READ_REPLICAS.record_write(user_id)
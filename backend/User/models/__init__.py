@@ -1,9 +1,18 @@
 from .user import User
+from .ingredient import Ingredient, IngredientAlias
 from .pantry_item import PantryItem
+from .pantry_tombstone import PantryTombstone
+from .pantry_version import PantryVersion
 from .preferences import UserPreference
+from .refresh_token import RefreshToken
 
 __all__ = [
     "User",
+    "Ingredient",
+    "IngredientAlias",
     "PantryItem",
+    "PantryTombstone",
+    "PantryVersion",
     "UserPreference",
+    "RefreshToken",
 ]
@@ -0,0 +1,26 @@
+# backend/User/models/ingredient.py
+
+from sqlalchemy import Column, ForeignKey, Integer, String
+
+from backend.User.database import Base
+
+
+class Ingredient(Base):
+    """标准食材目录：pantry 条目通过 ingredient_id 关联，匹配时按整数比较而不是字符串。"""
+
+    __tablename__ = "ingredients"
+
+    id = Column(Integer, primary_key=True)
+    # 标准名称（normalize_name 之后的形式，如 "egg"）
+    name = Column(String(100), nullable=False, unique=True)
+    category = Column(String(50), nullable=True)
+
+
+class IngredientAlias(Base):
+    """食材别名（同样存归一化后的形式）：'large egg'、'鸡蛋' → egg。"""
+
+    __tablename__ = "ingredient_aliases"
+
+    id = Column(Integer, primary_key=True)
+    alias = Column(String(100), nullable=False, unique=True)
+    ingredient_id = Column(ForeignKey("ingredients.id", ondelete="CASCADE"), nullable=False, index=True)
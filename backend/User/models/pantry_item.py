@@ -1,8 +1,9 @@
 # backend/User/models/pantry_item.py
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String, Text, func
 
 from backend.User.database import Base
+from backend.User.models.types import Timestamp
 
 
 class PantryItem(Base):
@@ -14,4 +15,20 @@ class PantryItem(Base):
     quantity = Column(String(50), nullable=True)
     unit = Column(String(50), nullable=True)
     notes = Column(Text, nullable=True)
-    added_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # 写入时由内存别名索引解析出的标准食材；无法识别时为 NULL
+    ingredient_id = Column(ForeignKey("ingredients.id", ondelete="SET NULL"), nullable=True)
+    # 由 quantity / unit 解析出的数值和标准单位（kg → g 等已换算），写入时填充，
+    # 用于 SQL 里求和、比较；quantity / unit 原样保留用于展示。Float(53) 在 MySQL 上是 DOUBLE
+    quantity_value = Column(Float(53), nullable=True)
+    unit_canonical = Column(String(50), nullable=True)
+    added_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now(), nullable=True)
+    # 最后一次修改时该用户的 pantry 版本号（PantryVersion.version），/pantry/changes 按它取增量
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # GET /pantry/ 的 keyset 分页：WHERE user_id = ? ORDER BY added_at, id 直接走索引，无需 filesort
+        Index("ix_pantry_items_user_added_id", "user_id", "added_at", "id"),
+        Index("ix_pantry_items_user_change_seq", "user_id", "change_seq"),
+        Index("ix_pantry_items_user_ingredient", "user_id", "ingredient_id"),
+    )
@@ -0,0 +1,27 @@
+# backend/User/models/pantry_tombstone.py
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, func
+
+from backend.User.database import Base
+from backend.User.models.types import Timestamp
+
+
+class PantryTombstone(Base):
+    """
+    已删除的 pantry 条目：让 /pantry/changes 能把删除同步给其它设备。
+    过期的 tombstone 定期清理（pantry_crud.compact_tombstones），
+    清理到的最大 change_seq 记在 PantryVersion.compacted_seq。
+    """
+
+    __tablename__ = "pantry_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    item_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(Timestamp, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_pantry_tombstones_user_change_seq", "user_id", "change_seq"),
+        Index("ix_pantry_tombstones_deleted_at", "deleted_at"),
+    )
@@ -0,0 +1,19 @@
+# backend/User/models/pantry_version.py
+
+from sqlalchemy import Column, ForeignKey, Integer
+
+from backend.User.database import Base
+
+
+class PantryVersion(Base):
+    """
+    每个用户一行：pantry 每次写入时 version + 1，用来做缓存 key，
+    同时也是 /pantry/changes 的变更序号。
+    """
+
+    __tablename__ = "pantry_versions"
+
+    user_id = Column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # 已被清理的 tombstone 中最大的 change_seq；比它旧的 since 游标只能全量重新同步
+    compacted_seq = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,30 @@
+# backend/User/models/refresh_token.py
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, func
+
+from backend.User.database import Base
+from backend.User.models.types import Timestamp
+
+
+class RefreshToken(Base):
+    """
+    刷新令牌：只存 SHA-256（token_hash），原文只在签发时返回给客户端一次。
+    每次 /auth/refresh 轮换：旧行记 used_at，同一 family 里插入新行；
+    已用过 / 已撤销的令牌再次出现即视为泄露，整个 family 一起撤销。
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    # 同一次登录派生出的所有令牌共用一个 family
+    family_id = Column(String(32), nullable=False, index=True)
+    # 签发时用户的 token_version：改密码后旧的刷新令牌一并失效
+    token_version = Column(Integer, nullable=False)
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    expires_at = Column(Timestamp, nullable=False)
+    used_at = Column(Timestamp, nullable=True)
+    revoked_at = Column(Timestamp, nullable=True)
+
+    __table_args__ = (Index("ix_refresh_tokens_expires_at", "expires_at"),)
@@ -0,0 +1,13 @@
+# backend/User/models/types.py
+
+from sqlalchemy import DateTime
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+
+# SQLite 里时间列由 CURRENT_TIMESTAMP 写入（"YYYY-MM-DD HH:MM:SS"，无小数秒）。
+# 绑定参数也用同样格式，按字符串比较（keyset 分页、tombstone 过期）时才不会错位。
+Timestamp = DateTime(timezone=True).with_variant(
+    SQLITE_DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
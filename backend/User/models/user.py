@@ -24,6 +24,12 @@ class User(Base):
     # Allergen：可空，自由文本
     allergen = Column(Text, nullable=True)
 
+    # 资料 / 偏好的版本号：每次修改 + 1，用来生成 GET /auth/me、GET /preferences/ 的 ETag
+    profile_version = Column(Integer, nullable=False, default=0, server_default="0")
+    preferences_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # 写进 JWT 的 tv：改密码时 + 1，旧 token 随之失效
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # 创建时间
     created_at = Column(
         DateTime(timezone=True),
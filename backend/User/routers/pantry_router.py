@@ -1,23 +1,40 @@
 # backend/User/routers/pantry_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy.orm import Session
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.User.crud import pantry_crud
-from backend.User.database import get_db
+from backend.User.database import get_async_db
 from backend.User.schemas.pantry_schemas import (
+    PantryBatchDeleteRequest,
+    PantryBatchResult,
+    PantryBatchUpdateRequest,
     PantryBulkRequest,
+    PantryChangesOut,
     PantryItemCreate,
     PantryItemOut,
     PantryItemUpdate,
+    PantryTotalOut,
 )
-from backend.User.utils.auth_dependencies import get_current_user
+from backend.User.utils.auth_dependencies import get_current_user, get_read_db
+from backend.User.utils.etag import etag_matches, not_modified, query_digest, set_cache_headers, weak_etag
 
 router = APIRouter(prefix="/pantry", tags=["Pantry"])
 
+# GET /pantry/ 每页条数：默认值足够让普通用户一次拿到全部 pantry（响应格式不变），
+# 只有超大的 pantry 才需要按 X-Next-Cursor 翻页
+PANTRY_PAGE_DEFAULT_LIMIT = int(os.getenv("PANTRY_PAGE_DEFAULT_LIMIT", "500"))
+PANTRY_PAGE_MAX_LIMIT = int(os.getenv("PANTRY_PAGE_MAX_LIMIT", "1000"))
+
+# 只读路由：配置了只读副本时读副本，用户刚写入后的 DATABASE_READ_YOUR_WRITES_SECONDS 秒内仍读主库
+read_db = get_read_db()
+
 
-def _require_item(db: Session, user_id: int, item_id: int):
-    item = pantry_crud.get_item(db, user_id=user_id, item_id=item_id)
+async def _require_item(db: AsyncSession, user_id: int, item_id: int):
+    item = await pantry_crud.get_item_async(db, user_id=user_id, item_id=item_id)
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pantry item not found")
     return item
@@ -31,59 +48,197 @@ def _normalize_payload(data: dict) -> dict:
 
 
 @router.get("/", response_model=list[PantryItemOut])
-def list_items(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    items = pantry_crud.list_items(db, user_id=current_user.id)
+async def list_items(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=PANTRY_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    unit: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(read_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    按 (added_at, id) 排序的 keyset 分页。响应体仍是条目数组；
+    还有下一页时在 X-Next-Cursor header 中返回游标，作为下一次请求的 cursor 参数。
+    ETag 来自 pantry 版本号 + 查询参数摘要（不同页 / 过滤条件的 ETag 不同）：
+    If-None-Match 命中时只查版本号就返回 304，不读条目。
+    """
+    limit = limit or PANTRY_PAGE_DEFAULT_LIMIT
+    version = await pantry_crud.get_version_async(db, current_user.id)
+    digest = query_digest(
+        limit=limit if limit != PANTRY_PAGE_DEFAULT_LIMIT else None,
+        cursor=cursor,
+        name_prefix=name_prefix,
+        unit=unit,
+    )
+    etag = weak_etag("pantry", current_user.id, version, *([digest] if digest else []))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    try:
+        after = pantry_crud.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    items, next_cursor = await pantry_crud.list_items_page_async(
+        db,
+        user_id=current_user.id,
+        limit=limit,
+        after=after,
+        name_prefix=name_prefix,
+        unit=unit,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    set_cache_headers(response, etag)
     return items
 
 
+@router.get("/totals", response_model=list[PantryTotalOut])
+async def pantry_totals(
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    db: AsyncSession = Depends(read_db),
+    current_user=Depends(get_current_user),
+):
+    """按名称 + 标准单位在 SQL 里汇总数量（例如 flour 一共多少 g）。"""
+    return await pantry_crud.sum_quantities_async(db, user_id=current_user.id, name_prefix=name_prefix)
+
+
+@router.get("/low-stock", response_model=list[PantryItemOut])
+async def low_stock(
+    threshold: float = Query(..., ge=0),
+    unit: Optional[str] = None,
+    db: AsyncSession = Depends(read_db),
+    current_user=Depends(get_current_user),
+):
+    """数量不超过 threshold 的条目；带 unit 时只看该单位（会换算，1 kg 即 1000 g）。"""
+    return await pantry_crud.list_low_stock_async(
+        db, user_id=current_user.id, threshold=threshold, unit=unit
+    )
+
+
+@router.get("/changes", response_model=PantryChangesOut)
+async def list_changes(
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=PANTRY_PAGE_MAX_LIMIT),
+    page: Optional[str] = None,
+    db: AsyncSession = Depends(read_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    增量同步：返回 since 之后新增 / 修改的条目和被删除的 id。
+    首次同步不带 since，拿到完整列表和 cursor；之后的轮询流量只与变化条数有关。
+    完整列表与 GET /pantry/ 一样按 limit 分页：next_page 不为空时以 page=next_page 取下一页。
+    """
+    try:
+        since_seq = int(since) if since is not None else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        changes = await pantry_crud.get_changes_async(
+            db,
+            user_id=current_user.id,
+            since=since_seq,
+            limit=limit or PANTRY_PAGE_DEFAULT_LIMIT,
+            page=page,
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return PantryChangesOut(
+        cursor=str(changes.cursor),
+        reset=changes.reset,
+        items=[PantryItemOut.model_validate(item) for item in changes.items],
+        deleted=changes.deleted,
+        next_page=changes.next_page,
+    )
+
+
 @router.post("/", response_model=PantryItemOut, status_code=status.HTTP_201_CREATED)
-def create_item(
+async def create_item(
     item_in: PantryItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     payload = _normalize_payload(item_in.model_dump())
-    item = pantry_crud.create_item(db, user_id=current_user.id, **payload)
+    item = await pantry_crud.create_item_async(db, user_id=current_user.id, **payload)
     return item
 
 
 @router.post("/bulk", response_model=list[PantryItemOut], status_code=status.HTTP_201_CREATED)
-def create_items_bulk(
+async def create_items_bulk(
     body: PantryBulkRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     items = [_normalize_payload(item.model_dump()) for item in body.items]
-    created = pantry_crud.bulk_create_items(db, user_id=current_user.id, items=items)
+    created = await pantry_crud.bulk_create_items_async(db, user_id=current_user.id, items=items)
     return created
 
 
+def _unique_ids(ids):
+    return list(dict.fromkeys(ids))
+
+
+@router.post("/batch/delete", response_model=list[PantryBatchResult])
+async def delete_items_batch(
+    body: PantryBatchDeleteRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """一个事务、固定次数的 SQL 删除多项；逐项返回 deleted / not_found。"""
+    deleted = set(await pantry_crud.delete_items_async(db, user_id=current_user.id, item_ids=body.ids))
+    return [
+        PantryBatchResult(id=item_id, status="deleted" if item_id in deleted else "not_found")
+        for item_id in _unique_ids(body.ids)
+    ]
+
+
+@router.patch("/batch", response_model=list[PantryBatchResult])
+async def update_items_batch(
+    body: PantryBatchUpdateRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """一个事务内批量部分更新；逐项返回 updated（带最新数据）/ not_found。"""
+    updates = [_normalize_payload(item.model_dump(exclude_unset=True)) for item in body.items]
+    updated = await pantry_crud.update_items_async(db, user_id=current_user.id, updates=updates)
+    results = []
+    for item_id in _unique_ids(item.id for item in body.items):
+        item = updated.get(item_id)
+        if item is None:
+            results.append(PantryBatchResult(id=item_id, status="not_found"))
+        else:
+            results.append(
+                PantryBatchResult(id=item_id, status="updated", item=PantryItemOut.model_validate(item))
+            )
+    return results
+
+
 @router.put("/{item_id}", response_model=PantryItemOut)
-def update_item(
+async def update_item(
     item_id: int,
     updates: PantryItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    item = _require_item(db, current_user.id, item_id)
+    item = await _require_item(db, current_user.id, item_id)
     update_data = _normalize_payload(updates.model_dump(exclude_unset=True))
     if not update_data:
         return item
-    return pantry_crud.update_item(db, item, **update_data)
+    return await pantry_crud.update_item_async(db, item, **update_data)
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(
+async def delete_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    item = _require_item(db, current_user.id, item_id)
-    pantry_crud.delete_item(db, item)
+    item = await _require_item(db, current_user.id, item_id)
+    await pantry_crud.delete_item_async(db, item)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
-def clear_items(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    pantry_crud.clear_items(db, user_id=current_user.id)
+async def clear_items(db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    await pantry_crud.clear_items_async(db, user_id=current_user.id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,18 +1,23 @@
 # backend/User/routers/preferences_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.User.crud import preferences_crud
-from backend.User.database import get_db
+from backend.User.database import get_async_db
 from backend.User.schemas.preferences_schemas import (
     UserPreferencesResponse,
     UserPreferencesUpdate,
 )
-from backend.User.utils.auth_dependencies import get_current_user
+from backend.User.utils.auth_dependencies import get_current_user, get_read_db
+from backend.User.utils.etag import etag_matches, not_modified, set_cache_headers, weak_etag
 
 router = APIRouter(prefix="/preferences", tags=["User Preferences"])
 
+read_db = get_read_db()
+
 
 def _to_response(pref) -> UserPreferencesResponse:
     return UserPreferencesResponse(
@@ -24,31 +29,36 @@ def _to_response(pref) -> UserPreferencesResponse:
 
 
 @router.get("/", response_model=UserPreferencesResponse)
-def get_preferences(
-    db: Session = Depends(get_db),
+async def get_preferences(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(read_db),
     current_user=Depends(get_current_user),
 ):
-    prefs = preferences_crud.get_preferences(db, current_user.id)
-    if not prefs:
-        prefs = preferences_crud.upsert_preferences(db, user_id=current_user.id)
-    return _to_response(prefs)
+    # 命中缓存时不访问数据库；未命中时一条只读 SELECT，没有偏好行也不写入
+    snapshot = await preferences_crud.get_snapshot_async(db, current_user.id)
+    etag = weak_etag("preferences", current_user.id, snapshot.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    return _to_response(snapshot)
 
 
 @router.put("/", response_model=UserPreferencesResponse)
-def update_preferences(
+async def update_preferences(
     updates: UserPreferencesUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     payload = updates.model_dump(exclude_unset=True)
-    prefs = preferences_crud.upsert_preferences(db, user_id=current_user.id, **payload)
+    prefs = await preferences_crud.upsert_preferences_async(db, user_id=current_user.id, **payload)
     return _to_response(prefs)
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
-def delete_preferences(
-    db: Session = Depends(get_db),
+async def delete_preferences(
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    preferences_crud.delete_preferences(db, user_id=current_user.id)
+    await preferences_crud.delete_preferences_async(db, user_id=current_user.id)
     return None
@@ -1,64 +1,142 @@
 # backend/User/routers/auth.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 
 from backend.User.schemas import user_schemas
-from backend.User.crud import user_crud
+from backend.User.crud import refresh_token_crud, user_crud
 from backend.User.utils.security import (
-    verify_password,
+    PasswordHasherBusy,
     create_access_token,
-    get_password_hash,
+    get_password_hash_async,
+    needs_rehash,
+    verify_password_async,
 )
-from backend.User.database import SessionLocal
+from backend.User.database import get_async_db
+from backend.User.utils.auth_dependencies import get_current_user
+from backend.User.utils.etag import etag_matches, not_modified, set_cache_headers, weak_etag
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _hasher_busy() -> HTTPException:
+    # bcrypt 线程池排队已满：立即拒绝，而不是让请求无限排队
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent sign-ins, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _token_response(user, refresh_token: str) -> dict:
+    # user 可以是 User 或 Principal：都有 id / phone_number / token_version。
+    # sub 仍是手机号（兼容）；uid / tv 让鉴权按 principal 缓存命中，不再按手机号查库
+    access_token = create_access_token(
+        data={"sub": user.phone_number, "uid": user.id, "tv": user.token_version, "role": "user"}
+    )
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
 # -------------------------
 # ✅ User Login（使用手机号 + 密码）
 # -------------------------
-@router.post("/login")
-def login_user(
+@router.post("/login", response_model=user_schemas.TokenResponse)
+async def login_user(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     phone_number = form_data.username
-    user = user_crud.get_user_by_phone(db, phone_number=phone_number)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await user_crud.get_user_by_phone_async(db, phone_number=phone_number)
+    # bcrypt 在专用线程池里执行，不占用事件循环和 Starlette 的共享线程池
+    try:
+        verified = bool(user) and await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid phone number or password",
         )
+    if needs_rehash(user.hashed_password):
+        # BCRYPT_ROUNDS 变了：趁有明文密码时重算；线程池忙就留到下次登录
+        try:
+            rehashed = await get_password_hash_async(form_data.password)
+        except PasswordHasherBusy:
+            rehashed = None
+        if rehashed:
+            await user_crud.rehash_password_async(db, user, rehashed)
 
-    # JWT 中的 sub 用手机号
-    access_token = create_access_token(data={"sub": user.phone_number, "role": "user"})
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = await refresh_token_crud.issue_refresh_token_async(db, user.id, user.token_version)
+    return _token_response(user, refresh_token)
 
 
 # -------------------------
-# ✅ Register New User（用户注册）
+# ✅ Refresh（用刷新令牌换新的 access token，不跑 bcrypt）
 # -------------------------
-@router.post("/register", response_model=user_schemas.UserOut)
-def register_user(user: user_schemas.UserCreate, db: Session = Depends(get_db)):
-    existing = user_crud.get_user_by_phone(db, phone_number=user.phone_number)
-    if existing:
+@router.post("/refresh", response_model=user_schemas.TokenResponse)
+async def refresh_tokens(
+    body: user_schemas.RefreshTokenRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    rotated = await refresh_token_crud.rotate_refresh_token_async(db, body.refresh_token)
+    if rotated is None:
+        # 过期 / 已撤销 / 重放（此时整个 family 已撤销）：客户端需要重新登录
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Phone number already registered",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
         )
+    principal, refresh_token = rotated
+    return _token_response(principal, refresh_token)
+
+
+# -------------------------
+# ✅ Logout（撤销这次登录派生出的所有刷新令牌）
+# -------------------------
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_user(
+    body: user_schemas.RefreshTokenRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # 令牌不存在也返回 204：登出是幂等的
+    await refresh_token_crud.revoke_refresh_token_async(db, body.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-    hashed_password = get_password_hash(user.password)
-    created = user_crud.create_user_with_hashed_password(db, user, hashed_password)
-    return created
 
+# -------------------------
+# ✅ Register New User（用户注册）
+# -------------------------
+@router.post("/register", response_model=user_schemas.UserOut)
+async def register_user(
+    user: user_schemas.UserCreate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # 不预先查手机号：唯一索引就是判定，省一次往返，也不怕两个并发注册同时通过检查
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    try:
+        return await user_crud.create_user_with_hashed_password_async(db, user, hashed_password)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+# -------------------------
+# ✅ Current User Profile（当前登录用户资料，支持 ETag / 304）
+# -------------------------
+@router.get("/me", response_model=user_schemas.UserOut)
+async def read_profile(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    version = await user_crud.get_profile_version_async(db, current_user.id)
+    etag = weak_etag("profile", current_user.id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    return await current_user.load_user(db)
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, constr
 
@@ -31,10 +31,50 @@ class PantryItemUpdate(BaseModel):
 class PantryItemOut(PantryItemBase):
     id: int
     added_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class PantryTotalOut(BaseModel):
+    """同名（不区分大小写）同标准单位条目的数量合计。"""
+    name: str
+    unit: Optional[str] = None
+    total: float
+    items: int
+
+
 class PantryBulkRequest(BaseModel):
     items: List[PantryItemCreate]
+
+
+class PantryBatchDeleteRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class PantryBatchUpdateItem(PantryItemUpdate):
+    id: int
+
+
+class PantryBatchUpdateRequest(BaseModel):
+    items: List[PantryBatchUpdateItem] = Field(..., min_length=1)
+
+
+class PantryBatchResult(BaseModel):
+    id: int
+    status: Literal["deleted", "updated", "not_found"]
+    item: Optional[PantryItemOut] = None
+
+
+class PantryChangesOut(BaseModel):
+    """
+    GET /pantry/changes 的响应。cursor 作为下次请求的 since；
+    reset=True 时 items 是完整列表的一页：next_page 不为空时以 page=next_page 继续取，
+    取完后整体替换本地数据；否则先删 deleted 再合并 items。
+    """
+    cursor: str
+    reset: bool
+    items: List[PantryItemOut]
+    deleted: List[int]
+    next_page: Optional[str] = None
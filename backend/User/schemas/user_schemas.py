@@ -31,6 +31,18 @@ class UserLogin(BaseModel):
     password: constr(min_length=8)
 
 
+# ------- 刷新 / 登出时提交的刷新令牌 -------
+class RefreshTokenRequest(BaseModel):
+    refresh_token: constr(min_length=1)
+
+
+# ------- 登录 / 刷新的返回值 -------
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
 # ------- 更新用户信息时的输入（可选字段） -------
 class UserUpdate(BaseModel):
     name: Optional[constr(strip_whitespace=True, min_length=1)] = None
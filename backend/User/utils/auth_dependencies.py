@@ -1,35 +1,93 @@
 # backend/utils/auth_dependencies.py
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from backend.User.database import SessionLocal
+from jose import JWTError
+from backend.User.database import READ_REPLICAS, READ_YOUR_WRITES_SECONDS, get_async_db
 from backend.User.crud import user_crud
-from backend.User.utils.security import SECRET_KEY, ALGORITHM
-from sqlalchemy.orm import Session
+from backend.User.models.pantry_version import PantryVersion
+from backend.User.models.user import User
+from backend.User.utils.security import SECRET_KEY, ALGORITHM, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+# 不强制要求 token：用于"登录可选"的接口（例如 shopping-list 服务端读取 pantry）
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> user_crud.Principal:
+    """
+    返回 user_crud.Principal（不是 ORM User）。token 带 uid / tv 时先查 principal 缓存，
+    命中则鉴权不发任何 SQL；需要完整 User 的路由自行 await current_user.load_user(db)。
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+
+    user_id, token_version = payload.get("uid"), payload.get("tv")
+    if isinstance(user_id, int) and isinstance(token_version, int):
+        principal = await user_crud.get_principal_async(db, user_id, token_version)
+    else:
+        # 旧格式 token（只有 sub = 手机号）：按手机号查一次，不进缓存
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-    except JWTError:
+        user = await user_crud.get_user_by_username_async(db, username=username)
+        principal = (
+            user_crud.Principal(user.id, user.phone_number, user.token_version) if user is not None else None
+        )
+    if principal is None:
         raise credentials_exception
+    # 这个请求 session 的提交会被记为该用户的写入（只读副本的 read-your-writes）
+    db.info["user_id"] = principal.id
+    return principal
 
-    user = user_crud.get_user_by_username(db, username=username)
-    if user is None:
-        raise credentials_exception
-    return user
+
+def _write_marker_stmt(user_id: int):
+    """
+    用户的各写入版本号（资料 / 偏好 / pantry，每次写入都会 + 1）。
+    主库和副本上取到的一致，说明副本已经包含这个用户的全部写入，不管是在哪个 worker 写的。
+    """
+    return (
+        select(User.profile_version, User.preferences_version, PantryVersion.version)
+        .outerjoin(PantryVersion, PantryVersion.user_id == User.id)
+        .where(User.id == user_id)
+    )
+
+
+def get_read_db(fresh_for: float = READ_YOUR_WRITES_SECONDS):
+    """
+    只读路由的 session 依赖：配置了 DATABASE_READ_URLS 时返回一个只读副本 session，
+    否则（或副本全部不可用）返回本请求的主库 session。
+    fresh_for > 0 时保证 read-your-writes：本 worker fresh_for 秒内记录过该用户的写入直接走主库；
+    否则按主键比较该用户在主库和副本上的写入版本号，副本落后（写入可能发生在别的 worker）也走主库。
+    fresh_for = 0 表示路由能容忍复制延迟，总是可以读副本。
+    """
+
+    async def read_db(
+        current_user=Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        async def replica_is_current(replica: AsyncSession) -> bool:
+            marker = (await db.execute(_write_marker_stmt(current_user.id))).first()
+            return (await replica.execute(_write_marker_stmt(current_user.id))).first() == marker
+
+        replica = await READ_REPLICAS.session_for(
+            current_user.id, fresh_for, replica_is_current if fresh_for > 0 else None
+        )
+        if replica is None:
+            yield db
+            return
+        # 主库 session 不再使用：归还它可能占着的连接
+        await db.close()
+        async with replica:
+            yield replica
+
+    return read_db
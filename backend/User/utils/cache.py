@@ -0,0 +1,96 @@
+# backend/User/utils/cache.py
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# 所有已创建的缓存，按名字登记，供 /metrics 导出命中率
+CACHES: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    进程内的 LRU + TTL 缓存（线程安全）。
+    - maxsize 限制条目数，超出时淘汰最久未使用的条目
+    - ttl 秒后条目过期
+    - 每个 worker 进程各有一份，不跨进程共享
+    - 读穿缓存防止"读到旧值 → 写入方失效 → 旧值被写回"：读库前取 generation()，
+      set(key, value, generation) 时若该 key 在此之后被 pop / clear 过就不写入
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 每次 pop / clear 递增；_invalidated 记录各 key 最近一次失效时的值（最多 maxsize 条），
+        # 丢弃的最旧记录中最大的值存为 _invalidated_floor，早于它的 generation 一律不写入
+        self._generation = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._invalidated_floor = 0
+        CACHES[name] = self
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if generation is not None and self._invalidated.get(key, self._invalidated_floor) > generation:
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.maxsize:
+                _, dropped = self._invalidated.popitem(last=False)
+                self._invalidated_floor = max(self._invalidated_floor, dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._invalidated_floor = self._generation
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,312 @@
+# backend/User/utils/compression.py
+
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.User.utils.lazy import optional_lazy_import
+
+# brotli 是可选依赖：没装时只协商 gzip
+brotli = optional_lazy_import("brotli")
+
+# 已经压缩过的格式、以及不能被缓冲 / 改写的流（SSE）不再压缩
+EXCLUDED_CONTENT_TYPES = (
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/pdf",
+    "audio/*",
+    "font/woff",
+    "font/woff2",
+    "image/avif",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "text/event-stream",
+    "video/*",
+)
+
+
+class CompressionStats:
+    """
+    按路由（路径模板，例如 /pantry/{item_id}）统计压缩效果，供 /metrics 导出：
+    压缩前后字节数、压缩耗费的 CPU 时间、各编码次数，以及没压缩的原因
+    （small：小于阈值；not_accepted：客户端不接受压缩；excluded：已压缩 / SSE / no-transform 等）。
+    每个 worker 进程各有一份。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def _route(self, route: str) -> Dict[str, Any]:
+        entry = self._routes.get(route)
+        if entry is None:
+            entry = self._routes[route] = {
+                "compressed": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "cpu_seconds": 0.0,
+                "encodings": {},
+                "skipped": {},
+            }
+        return entry
+
+    def record(self, route: str, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        with self._lock:
+            entry = self._route(route)
+            entry["compressed"] += 1
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+            entry["cpu_seconds"] += cpu_seconds
+            entry["encodings"][encoding] = entry["encodings"].get(encoding, 0) + 1
+
+    def skip(self, route: str, reason: str) -> None:
+        with self._lock:
+            skipped = self._route(route)["skipped"]
+            skipped[reason] = skipped.get(reason, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for route, entry in self._routes.items():
+                bytes_in, bytes_out = entry["bytes_in"], entry["bytes_out"]
+                result[route] = {
+                    "compressed": entry["compressed"],
+                    "bytes_in": bytes_in,
+                    "bytes_out": bytes_out,
+                    "bytes_saved": bytes_in - bytes_out,
+                    "ratio": (bytes_out / bytes_in) if bytes_in else 0.0,
+                    "cpu_ms": round(entry["cpu_seconds"] * 1000, 3),
+                    "encodings": dict(entry["encodings"]),
+                    "skipped": dict(entry["skipped"]),
+                }
+            return result
+
+
+COMPRESSION_STATS = CompressionStats()
+
+
+class _GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        # 流式响应每个分块都 SYNC_FLUSH，客户端能立即解出已收到的部分
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def _route_name(scope: Scope) -> str:
+    # 用路径模板而不是实际路径，避免 /pantry/123 这类路径让统计无限增长；
+    # /openapi.json、/docs 等不经过 APIRoute 的路由只有 endpoint
+    path = getattr(scope.get("route"), "path", None)
+    if path:
+        return path
+    return getattr(scope.get("endpoint"), "__name__", None) or "unmatched"
+
+
+def _is_excluded(media_type: str, excluded: tuple) -> bool:
+    media_type = media_type.partition(";")[0].strip().lower()
+    return media_type in excluded or media_type.partition("/")[0] + "/*" in excluded
+
+
+class CompressionMiddleware:
+    """
+    按 Accept-Encoding 协商 br / gzip 压缩响应（纯 ASGI 中间件，不缓冲流式响应）：
+    - 小于 minimum_size 的一次性响应、已有 Content-Encoding、206 / 204 / 304、
+      Cache-Control: no-transform 以及 EXCLUDED_CONTENT_TYPES（图片、zip、SSE 等）原样发送；
+    - 流式响应逐块压缩并 flush，不等整个响应体；
+    - 单块超过 thread_minimum_size 时放到线程里压缩，避免长时间占住事件循环；
+    - 每个路由的压缩字节数和 CPU 时间记到 stats（默认 COMPRESSION_STATS）。
+    brotli 的 quality 0-11，动态响应用 4 左右即可接近 gzip -9 的压缩率且快得多。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        thread_minimum_size: int = 128 * 1024,
+        exclude_content_types: tuple = EXCLUDED_CONTENT_TYPES,
+        stats: CompressionStats = COMPRESSION_STATS,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.thread_minimum_size = thread_minimum_size
+        self.exclude_content_types = tuple(t.lower() for t in exclude_content_types)
+        self.stats = stats
+
+    @staticmethod
+    def supported_encodings() -> tuple:
+        # 优先级从高到低
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """
+        从 Accept-Encoding 里挑 q 值最高的受支持编码（同 q 时 br 优先）；
+        q=0 表示明确拒绝，* 匹配没单独列出的编码。都不接受时返回 None。
+        """
+        weights: Dict[str, float] = {}
+        for part in accept_encoding.lower().split(","):
+            token, _, params = part.partition(";")
+            token = token.strip()
+            if not token:
+                continue
+            q = 1.0
+            for param in params.split(";"):
+                name, _, value = param.partition("=")
+                if name.strip() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            weights[token] = q
+
+        best, best_q = None, 0.0
+        for encoding in self.supported_encodings():
+            q = weights.get(encoding, weights.get("*", 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def encoder(self, encoding: str):
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """单个请求的压缩状态：先扣住 http.response.start，看到第一块响应体后再决定是否压缩。"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, send: Send, encoding: Optional[str]):
+        self.middleware = middleware
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.start_message: Optional[Message] = None
+        self.started = False
+        self.passthrough = False
+        self.encoder = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def _start(self) -> None:
+        if not self.started:
+            self.started = True
+            await self._send(self.start_message)
+
+    def _skip(self, reason: str) -> None:
+        self.passthrough = True
+        self.middleware.stats.skip(_route_name(self.scope), reason)
+
+    def _compress(self, data: bytes, final: bool) -> bytes:
+        # thread_time 只计当前线程的 CPU 时间，放到线程池里执行时同样准确
+        start = time.thread_time()
+        out = self.encoder.compress(data, final)
+        self.cpu_seconds += time.thread_time() - start
+        return out
+
+    async def compress(self, data: bytes, final: bool) -> bytes:
+        self.bytes_in += len(data)
+        if len(data) >= self.middleware.thread_minimum_size:
+            out = await anyio.to_thread.run_sync(self._compress, data, final)
+        else:
+            out = self._compress(data, final)
+        self.bytes_out += len(out)
+        if final:
+            self.middleware.stats.record(
+                _route_name(self.scope), self.encoder.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds
+            )
+        return out
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            if (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or "no-transform" in headers.get("cache-control", "").lower()
+                or _is_excluded(headers.get("content-type", ""), self.middleware.exclude_content_types)
+            ):
+                self._skip("excluded")
+                await self._start()
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            # 非 body 消息（pathsend、trailers 等）原样转发；还没开始压缩时就不再压缩
+            if self.encoder is None:
+                self.passthrough = True
+            await self._start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            # 第一块响应体：决定是否压缩
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self._skip("small")
+                await self._start()
+                await self._send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding is None:
+                self._skip("not_accepted")
+                await self._start()
+                await self._send(message)
+                return
+            self.encoder = self.middleware.encoder(self.encoding)
+            body = await self.compress(body, final=not more_body)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self._start()
+            await self._send({**message, "body": body})
+            return
+
+        body = await self.compress(body, final=not more_body)
+        await self._send({**message, "body": body})
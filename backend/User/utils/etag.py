@@ -0,0 +1,56 @@
+# backend/User/utils/etag.py
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+# private：响应与用户相关，不让共享缓存（CDN / 代理）保存；
+# no-cache：浏览器可以缓存，但每次使用前都要带 If-None-Match 重新验证
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    """
+    由廉价的版本号拼出弱 ETag，例如 W/"pantry-3-17"，
+    不需要先序列化响应体再做 hash。
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def query_digest(**params) -> Optional[str]:
+    """
+    查询参数的短摘要，拼进 ETag，使分页 / 过滤后的不同结果各有各的 ETag。
+    值为 None 的参数忽略；全部为 None 时返回 None（不带参数的 ETag 保持不变）。
+    """
+    items = sorted((key, str(value)) for key, value in params.items() if value is not None)
+    if not items:
+        return None
+    return hashlib.sha1(repr(items).encode()).hexdigest()[:12]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 按弱比较匹配（忽略 W/ 前缀），支持逗号分隔的多个值和 *。"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag)
+    return response
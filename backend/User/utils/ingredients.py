@@ -0,0 +1,162 @@
+# backend/User/utils/ingredients.py
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+# 单位别名 → (标准单位, 换算系数)
+_UNIT_ALIASES = {
+    "g": ("g", 1.0),
+    "gram": ("g", 1.0),
+    "grams": ("g", 1.0),
+    "kg": ("g", 1000.0),
+    "kilogram": ("g", 1000.0),
+    "kilograms": ("g", 1000.0),
+    "mg": ("g", 0.001),
+    "ml": ("ml", 1.0),
+    "milliliter": ("ml", 1.0),
+    "milliliters": ("ml", 1.0),
+    "l": ("ml", 1000.0),
+    "liter": ("ml", 1000.0),
+    "liters": ("ml", 1000.0),
+    "litre": ("ml", 1000.0),
+    "litres": ("ml", 1000.0),
+    "pc": ("pcs", 1.0),
+    "pcs": ("pcs", 1.0),
+    "piece": ("pcs", 1.0),
+    "pieces": ("pcs", 1.0),
+    "tbsp": ("tbsp", 1.0),
+    "tablespoon": ("tbsp", 1.0),
+    "tablespoons": ("tbsp", 1.0),
+    "tsp": ("tsp", 1.0),
+    "teaspoon": ("tsp", 1.0),
+    "teaspoons": ("tsp", 1.0),
+    "cup": ("cup", 1.0),
+    "cups": ("cup", 1.0),
+}
+
+# resolve 时可以去掉的开头修饰词（大小 / 新鲜度 / 处理方式），去掉后仍是同一种食材。
+# 只列这种"不改变食材本身"的词：peanut butter、coconut milk、sweet potato 里的前缀
+# 会变成另一种食材，不能去掉
+_DESCRIPTORS = frozenset({
+    "fresh", "frozen", "organic", "raw", "ripe",
+    "large", "small", "medium", "jumbo", "extra-large",
+    "whole", "chopped", "diced", "sliced", "minced", "grated", "shredded", "peeled",
+    "free-range", "boneless", "skinless",
+})
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"^\s*(\d+(?:\.\d+)?)(?:\s*/\s*(\d+(?:\.\d+)?))?\s*$")
+
+
+def normalize_name(name: Any) -> str:
+    """
+    小写、去多余空白、简单去复数：'Onions ' → 'onion'，'Tomatoes' → 'tomato'。
+    -ss / -us 结尾不是复数（glass、hummus、asparagus），保持不变。
+    """
+    text = _WHITESPACE.sub(" ", str(name or "")).strip().lower()
+    if len(text) > 3:
+        if text.endswith("ies"):
+            return text[:-3] + "y"
+        if text.endswith("oes"):
+            return text[:-2]
+        if text.endswith("s") and not text.endswith(("ss", "us")):
+            return text[:-1]
+    return text
+
+
+def parse_quantity(value: Any) -> Optional[float]:
+    """数字或 '2' / '1.5' / '1/2' 这类字符串 → float；无法解析返回 None。"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.match(str(value))
+    if not match:
+        return None
+    number = float(match.group(1))
+    if match.group(2):
+        denominator = float(match.group(2))
+        if denominator == 0:
+            return None
+        number /= denominator
+    return number
+
+
+def canonical_unit(unit: Any, quantity: Optional[float]) -> Tuple[Optional[str], Optional[float]]:
+    """
+    把单位归一化（kg → g，l → ml，pieces → pcs ...），数量同步换算。
+    不认识的单位只做小写处理，数量不变。
+    """
+    if unit is None or not str(unit).strip():
+        return None, quantity
+    key = str(unit).strip().lower().rstrip(".")
+    if key in _UNIT_ALIASES:
+        canonical, factor = _UNIT_ALIASES[key]
+        return canonical, (quantity * factor if quantity is not None else None)
+    return key, quantity
+
+
+def canonical_amount(quantity: Any, unit: Any) -> Tuple[Optional[float], Optional[str]]:
+    """
+    写入 pantry 时用：('1.5', 'kg') → (1500.0, 'g')。
+    返回 (quantity_value, unit_canonical)，数量无法解析时 quantity_value 为 None。
+    """
+    unit_canonical, value = canonical_unit(unit, parse_quantity(quantity))
+    return value, unit_canonical
+
+
+def format_quantity(value: Optional[float]) -> Optional[float]:
+    """整数值去掉小数部分（3.0 → 3），便于输出。"""
+    if value is None:
+        return None
+    return int(value) if float(value).is_integer() else round(value, 3)
+
+
+class IngredientIndex:
+    """
+    别名 → ingredient_id 的进程内索引，启动时从 ingredients / ingredient_aliases 表加载
+    （ingredient_crud.reload_index），写入 pantry 时同步解析，不需要再查库。
+    """
+
+    def __init__(self) -> None:
+        self._aliases: Dict[str, int] = {}
+
+    def load(self, pairs: Iterable[Tuple[str, int]]) -> None:
+        aliases = {}
+        for alias, ingredient_id in pairs:
+            key = normalize_name(alias)
+            if key:
+                aliases[key] = ingredient_id
+        # 整体替换：读者不会看到加载了一半的索引
+        self._aliases = aliases
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def resolve(self, name: Any) -> Optional[int]:
+        """
+        先整体匹配，再依次去掉开头的 _DESCRIPTORS 修饰词：
+        'large free-range eggs' → 'free-range egg' → 'egg'。
+        其他前缀不去掉（'peanut butter' 不会匹配到 butter），匹配不到返回 None。
+        """
+        text = normalize_name(name)
+        if not text:
+            return None
+        words = text.split(" ")
+        for start in range(len(words)):
+            if start and words[start - 1] not in _DESCRIPTORS:
+                break
+            ingredient_id = self._aliases.get(" ".join(words[start:]))
+            if ingredient_id is not None:
+                return ingredient_id
+        return None
+
+    def match_key(self, name: Any) -> Union[int, str]:
+        """用于合并 / 匹配：能识别时是 ingredient_id，否则退回归一化名称。"""
+        ingredient_id = self.resolve(name)
+        return ingredient_id if ingredient_id is not None else normalize_name(name)
+
+
+INGREDIENT_INDEX = IngredientIndex()
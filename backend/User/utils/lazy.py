@@ -0,0 +1,67 @@
+# backend/User/utils/lazy.py
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Optional
+
+_import_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    模块代理：第一次读 / 写属性时才真正 import（父包也一起推迟）。
+    用于只在少数请求里用到的重依赖（google-auth、requests、jose 的加密后端等），
+    让 worker 启动和测试收集不为它们付出导入时间。
+    写属性会转发到真实模块，monkeypatch.setattr(router.requests, "post", ...) 照常可用。
+    """
+
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with _import_lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    object.__setattr__(self, "_module", module)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def optional_lazy_import(name: str) -> Optional[LazyModule]:
+    """
+    可选依赖：顶层包没安装时返回 None（与原来 try/except ImportError 的写法一致），
+    否则返回推迟导入的代理。只检查顶层包，不会导入任何东西。
+    """
+    if importlib.util.find_spec(name.partition(".")[0]) is None:
+        return None
+    return LazyModule(name)
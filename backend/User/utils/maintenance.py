@@ -0,0 +1,36 @@
+# backend/User/utils/maintenance.py
+
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from backend.User.crud import pantry_crud, refresh_token_crud
+from backend.User.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# tombstone 保留时长：离线超过这么久的设备下次同步会收到 reset（全量）
+PANTRY_TOMBSTONE_TTL = timedelta(days=float(os.getenv("PANTRY_TOMBSTONE_TTL_DAYS", "30")))
+
+
+async def compact_pantry_tombstones_forever(
+    interval: float,
+    older_than: timedelta = PANTRY_TOMBSTONE_TTL,
+) -> None:
+    """
+    后台任务：每隔 interval 秒清理一次过期的 pantry tombstone 和刷新令牌。
+    interval 来自 Settings.pantry_compaction_interval（PANTRY_COMPACTION_INTERVAL_SECONDS）。
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                removed = await pantry_crud.compact_tombstones_async(db, older_than)
+                purged = await refresh_token_crud.purge_expired_async(db)
+            if removed:
+                logger.info("Compacted %d pantry tombstones", removed)
+            if purged:
+                logger.info("Purged %d expired refresh tokens", purged)
+        except Exception:
+            logger.exception("Pantry tombstone compaction failed")
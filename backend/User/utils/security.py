@@ -1,11 +1,23 @@
 # backend/User/utils/security.py
 
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
-from jose import JWTError, jwt
+from jose import JWTError  # jose 包本身只导入 exceptions，很轻
 import bcrypt  # 直接使用 bcrypt 模块，而不是 passlib
 
+from backend.User.utils.lazy import lazy_import
+
+# jose.jwt 会拉起 jws / jwk 和加密后端（cryptography / rsa / ecdsa），第一次签发或校验 token 时再导入
+jwt = lazy_import("jose.jwt")
+
+# bcrypt cost（2^rounds 次迭代）；调高后旧哈希会在用户下次登录时透明重算
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 
 # =========================
 # 🔐 bcrypt 相关工具函数
@@ -32,7 +44,7 @@ def get_password_hash(password: str) -> str:
     返回 str（UTF-8 解码后的哈希串），用于存入数据库。
     """
     pw_bytes = _normalize_password(password)
-    hashed: bytes = bcrypt.hashpw(pw_bytes, bcrypt.gensalt())
+    hashed: bytes = bcrypt.hashpw(pw_bytes, bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
     return hashed.decode("utf-8")
 
 
@@ -54,6 +66,77 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """哈希的 cost 与当前 BCRYPT_ROUNDS 不同（例如调高了 cost）时返回 True。"""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return False
+
+
+# =========================
+# 🧵 专用的 bcrypt 线程池
+# bcrypt 计算时释放 GIL，线程池即可并行；与 Starlette 共享线程池隔离开，
+# 登录高峰不会拖慢其他路由。排队（运行中 + 等待中）超过上限时直接拒绝。
+# =========================
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+
+
+class PasswordHasherBusy(Exception):
+    """bcrypt 线程池排队已满；router 转成 503 + Retry-After。"""
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+_rejected = 0
+_pending_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _pending_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+            )
+        return _executor
+
+
+async def _run_bounded(fn, *args):
+    global _pending, _rejected
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            _rejected += 1
+            raise PasswordHasherBusy()
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在 bcrypt 线程池里执行 get_password_hash；排队已满时抛 PasswordHasherBusy。"""
+    return await _run_bounded(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在 bcrypt 线程池里执行 verify_password；排队已满时抛 PasswordHasherBusy。"""
+    return await _run_bounded(verify_password, plain_password, hashed_password)
+
+
+def password_hasher_stats() -> Dict[str, int]:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "pending": _pending,
+        "rejected": _rejected,
+    }
+
+
 # =========================
 # 🔑 JWT 相关配置
 # =========================
@@ -0,0 +1,84 @@
+# backend/User/utils/vertex.py
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Optional
+
+from backend.User.utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+service_account = lazy_import("google.oauth2.service_account")
+google_auth_requests = lazy_import("google.auth.transport.requests")
+
+VERTEX_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+
+class VertexTokenProvider:
+    """
+    缓存 service account 凭证：token 仍有效时直接返回，过期（google-auth 在到期前几分钟
+    就认为无效）才加锁刷新，并发请求只会触发一次刷新。
+    原来每个 Vertex 请求都重新读 key 文件并向 Google 换一次 token。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._creds = None
+        self._cred_path: Optional[str] = None
+
+    def token(self, cred_path: str, session=None) -> str:
+        with self._lock:
+            if self._creds is None or self._cred_path != cred_path:
+                self._creds = service_account.Credentials.from_service_account_file(
+                    cred_path, scopes=VERTEX_SCOPES
+                )
+                self._cred_path = cred_path
+            if not getattr(self._creds, "valid", False):
+                auth_request = (
+                    google_auth_requests.Request(session=session)
+                    if session is not None
+                    else google_auth_requests.Request()
+                )
+                self._creds.refresh(auth_request)
+            return self._creds.token
+
+    def reset(self) -> None:
+        with self._lock:
+            self._creds = None
+            self._cred_path = None
+
+
+class VertexClient:
+    """
+    Vertex 调用共用的资源：token provider + 带连接池的 HTTP session。
+    由应用 lifespan 在每个 worker 里 start() / close()，不会跨 fork 共用连接；
+    未启动时（脚本、不进入 lifespan 的 TestClient）退回一次性的 requests.post。
+    """
+
+    def __init__(self):
+        self.tokens = VertexTokenProvider()
+        self.http = None
+
+    def start(self, pool_size: int = 10) -> None:
+        if self.http is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            self.http = session
+
+    def close(self) -> None:
+        if self.http is not None:
+            self.http.close()
+            self.http = None
+        self.tokens.reset()
+
+    def access_token(self, cred_path: str) -> str:
+        return self.tokens.token(cred_path, self.http)
+
+    def post(self, url: str, **kwargs: Any):
+        if self.http is not None:
+            return self.http.post(url, **kwargs)
+        return requests.post(url, **kwargs)
+
+
+VERTEX = VertexClient()
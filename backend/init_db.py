@@ -16,17 +16,78 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from backend.User.database import engine, Base
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+from backend.User.database import engine, Base, SessionLocal
+from backend.User.crud import ingredient_crud, pantry_crud
 
 # Import models so they are registered on Base.metadata
 import backend.User.models.user  # noqa: F401
+import backend.User.models.ingredient  # noqa: F401
 import backend.User.models.pantry_item  # noqa: F401
+import backend.User.models.pantry_tombstone  # noqa: F401
+import backend.User.models.pantry_version  # noqa: F401
 import backend.User.models.preferences  # noqa: F401
+import backend.User.models.refresh_token  # noqa: F401
+
+
+def ensure_columns(bind=engine):
+    """
+    create_all 不会给已存在的表补列（例如 pantry_items.change_seq），
+    这里用 ALTER TABLE ... ADD COLUMN 补上。新增列都是可空或带常量默认值的，
+    SQLite 也能直接添加。
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+                    added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def ensure_indexes(bind=engine):
+    """
+    create_all 对已存在的表不会补建新加的索引（例如 pantry_items 的
+    (user_id, added_at, id) 复合索引），这里逐个 checkfirst 创建。
+    """
+    inspector = inspect(bind)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=bind)
+                created.append(index.name)
+    return created
 
 
 def init_db():
     print("正在创建数据库表...")
     Base.metadata.create_all(bind=engine)
+    for name in ensure_columns():
+        print(f"  + 补建列 {name}")
+    for name in ensure_indexes():
+        print(f"  + 补建索引 {name}")
+    with SessionLocal() as db:
+        seeded = ingredient_crud.seed_catalog(db)
+        ingredient_crud.reload_index(db)
+        backfilled = pantry_crud.backfill_amounts(db)
+        resolved = pantry_crud.backfill_ingredient_ids(db)
+    if seeded:
+        print(f"  + 写入 {seeded} 个食材目录条目")
+    if backfilled:
+        print(f"  + 回填 {backfilled} 条 pantry 数量解析列")
+    if resolved:
+        print(f"  + 为 {resolved} 条 pantry 条目关联食材目录")
     try:
         url = engine.url
     except Exception:
@@ -1,11 +1,13 @@
 # routers package
 from . import generate_rec_router
+from . import metrics_router
 from . import scan_router
 from . import shopping_list_router
 
 
 __all__ = [
     "generate_rec_router",
+    "metrics_router",
     "scan_router",
     "shopping_list_router",
 ]
@@ -4,12 +4,11 @@ import os
 import json
 from typing import List, Optional
 
-import requests
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request as GoogleAuthRequest
+# VERTEX：lifespan 管理的共享 HTTP session + token 缓存
+from backend.User.utils.vertex import VERTEX
 
 
 router = APIRouter(prefix="/generate", tags=["Generate Recipe"])
@@ -43,12 +42,8 @@ def _get_vertex_access_token() -> str:
         raise HTTPException(status_code=500, detail="GOOGLE_APPLICATION_CREDENTIALS is not configured")
 
     try:
-        scopes = ["https://www.googleapis.com/auth/cloud-platform"]
-        creds = service_account.Credentials.from_service_account_file(
-            cred_path, scopes=scopes
-        )
-        creds.refresh(GoogleAuthRequest())
-        return creds.token
+        # 凭证和 token 在进程内缓存，过期前才刷新
+        return VERTEX.access_token(cred_path)
 
     except Exception as e:
         # Slightly rephrased error message (no functional change)
@@ -175,7 +170,7 @@ Important:
         "Content-Type": "application/json; charset=utf-8",
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
+    resp = VERTEX.post(url, headers=headers, json=payload, timeout=60)
 
     if resp.status_code != 200:
         raise HTTPException(status_code=500, detail=resp.text)
@@ -0,0 +1,51 @@
+# backend/routers/metrics_router.py
+
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+
+from backend.User.database import POOL_STATS, READ_REPLICAS, async_engine, engine, pool_status
+from backend.User.utils.cache import CACHES
+from backend.User.utils.compression import COMPRESSION_STATS
+from backend.User.utils.security import password_hasher_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+def _require_metrics_token(request: Request, x_metrics_token: Optional[str] = Header(None)) -> None:
+    """
+    指标里有缓存命中率、连接池 / 副本状态等内部信息，不对外公开：
+    没配置 Settings.metrics_token 时当作不存在（404），配置了则要求 X-Metrics-Token 一致。
+    """
+    expected = request.app.state.settings.metrics_token
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_metrics_token is None or not secrets.compare_digest(x_metrics_token.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+@router.get("/", dependencies=[Depends(_require_metrics_token)])
+def get_metrics() -> dict:
+    """
+    进程内指标（每个 worker 各自一份），需要 X-Metrics-Token header：
+    {
+      "caches": {"shopping_list": {"hits": ..., "misses": ..., "hit_rate": ...}, ...},
+      "db_pool": {"checkouts": ..., "connects": ..., "checkout_hold_ms_max": ..., ...,
+                  "engines": {"async": {"checked_out": ..., "saturation": ...}, "sync": {...}}},
+      "db_replicas": {"replicas": ..., "healthy": ..., "replica_reads": ..., "pinned_reads": ..., ...},
+      "password_hasher": {"workers": ..., "max_pending": ..., "pending": ..., "rejected": ...},
+      "compression": {"/pantry/": {"compressed": ..., "bytes_saved": ..., "ratio": ..., "cpu_ms": ...,
+                                   "encodings": {"br": ..., "gzip": ...}, "skipped": {"small": ...}}, ...}
+    }
+    """
+    return {
+        "caches": {name: cache.stats() for name, cache in CACHES.items()},
+        "db_pool": dict(
+            POOL_STATS,
+            engines={"async": pool_status(async_engine.sync_engine), "sync": pool_status(engine)},
+        ),
+        "db_replicas": READ_REPLICAS.stats(),
+        "password_hasher": password_hasher_stats(),
+        "compression": COMPRESSION_STATS.stats(),
+    }
@@ -10,21 +10,17 @@ import os
 import re
 from typing import List
 
-import requests
 from fastapi import APIRouter, File, HTTPException, UploadFile
-from google.auth.transport.requests import Request as GoogleAuthRequest
-from google.oauth2 import service_account
 from pydantic import BaseModel
 
-try:  # pragma: no cover - optional dependency
-    from PIL import Image
-except Exception:  # pragma: no cover
-    Image = None  # type: ignore
+from backend.User.utils.lazy import optional_lazy_import
+# Shared Vertex HTTP session + cached token (managed by the app lifespan);
+# requests is a lazily imported module proxy.
+from backend.User.utils.vertex import VERTEX, requests
 
-try:  # pragma: no cover - optional dependency
-    import pytesseract
-except Exception:  # pragma: no cover
-    pytesseract = None  # type: ignore
+# Optional OCR fallback: None when the package is not installed
+Image = optional_lazy_import("PIL.Image")
+pytesseract = optional_lazy_import("pytesseract")
 
 logger = logging.getLogger(__name__)
 
@@ -51,12 +47,8 @@ def _get_vertex_access_token() -> str:
         raise HTTPException(status_code=500, detail="GOOGLE_APPLICATION_CREDENTIALS is not set")
 
     try:
-        scopes = ["https://www.googleapis.com/auth/cloud-platform"]
-        creds = service_account.Credentials.from_service_account_file(
-            cred_path, scopes=scopes
-        )
-        creds.refresh(GoogleAuthRequest())
-        return creds.token
+        # 凭证和 token 在进程内缓存，过期前才刷新
+        return VERTEX.access_token(cred_path)
     except Exception as e:
         # Minor wording tweak
         raise HTTPException(status_code=500, detail=f"Could not retrieve Google access token: {e}")
@@ -242,7 +234,7 @@ STRICT RULES:
     }
 
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
+        resp = VERTEX.post(url, headers=headers, json=payload, timeout=60)
     except requests.RequestException as exc:  # network failure or similar
         logger.warning("Vertex request failed (%s), falling back to OCR", exc)
         fallback = _fallback_extract_ingredients(image_bytes)
@@ -1,16 +1,53 @@
 # backend/routers/shopping_list_router.py
 import os
 import json
-from typing import List, Any
+import hashlib
+from typing import List, Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.User.crud import pantry_crud
+from backend.User.database import get_async_db
+from backend.User.utils.auth_dependencies import get_current_user, optional_oauth2_scheme
+from backend.User.utils.cache import TTLCache
+from backend.User.utils.ingredients import (
+    INGREDIENT_INDEX,
+    canonical_unit,
+    format_quantity,
+    parse_quantity,
+)
+# VERTEX：lifespan 管理的共享 HTTP session + token 缓存
+from backend.User.utils.vertex import VERTEX
+
+
+# 路由返回值标注为 -> dict：FastAPI 据此推断 response model，直接用 Pydantic dump_json
+# 序列化（带大段 raw_vertex 时比 jsonable_encoder + json.dumps 快一个数量级）
+router = APIRouter(prefix="/shopping-list", tags=["Shopping List"])
 
-import requests
-from fastapi import APIRouter, HTTPException
+# 结果缓存：
+# - 登录模式 key = (user_id, pantry version, recipe hash)，pantry 任何写入都会改变 version，
+#   旧条目不会再被命中，随 LRU/TTL 自然淘汰
+# - 上传 pantry 模式 key = (pantry hash, recipe hash)
+SHOPPING_LIST_CACHE = TTLCache(
+    "shopping_list",
+    maxsize=int(os.getenv("SHOPPING_LIST_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("SHOPPING_LIST_CACHE_TTL", "3600")),
+)
 
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request as GoogleAuthRequest
 
+# ---------- Request Models ----------
+class PlanRecipe(BaseModel):
+    title: Optional[str] = None
+    ingredients: List[Any]
 
-router = APIRouter(prefix="/shopping-list", tags=["Shopping List"])
+
+class ShoppingPlanRequest(BaseModel):
+    recipes: List[PlanRecipe]
+    # 省略时（需登录）由服务端读取 pantry，与 /generate 相同
+    pantry_ingredients: Optional[List[Any]] = None
 
 
 # ---------- Shared utilities ----------
@@ -20,12 +57,8 @@ def _get_vertex_access_token() -> str:
         raise HTTPException(status_code=500, detail="GOOGLE_APPLICATION_CREDENTIALS is not set")
 
     try:
-        scopes = ["https://www.googleapis.com/auth/cloud-platform"]
-        creds = service_account.Credentials.from_service_account_file(
-            cred_path, scopes=scopes
-        )
-        creds.refresh(GoogleAuthRequest())
-        return creds.token
+        # 凭证和 token 在进程内缓存，过期前才刷新
+        return VERTEX.access_token(cred_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get Google access token: {e}")
 
@@ -46,45 +79,32 @@ def _extract_json_from_text(text: str) -> str:
     return text
 
 
-# ---------- Main endpoint: generate shopping list ----------
-@router.post("/generate")
-async def generate_shopping_list(body: dict) -> dict:
+def _ingredients_hash(ingredients: List[Any]) -> str:
     """
-    Simplified version:
-    - Input: raw JSON body with keys:
-        {
-          "pantry_ingredients": [...],
-          "recipe_ingredients": [...]
-        }
-      Each ingredient can be any dict you like, we just serialize it for the model.
-    - Output:
-        {
-          "to_buy": [...],              # parsed JSON array from Vertex
-          "shopping_list_raw": "text",  # raw text from Vertex
-          "raw_vertex": {...}           # full Vertex response (for debugging)
-        }
+    Order- and case-insensitive fingerprint of an ingredient list, used in
+    cache keys so that the same recipe always maps to the same entry.
     """
-    project_id = os.getenv("GCP_PROJECT_ID")
-    location = os.getenv("GCP_LOCATION", "us-central1")
-    if not project_id:
-        raise HTTPException(status_code=500, detail="GCP_PROJECT_ID is not set")
-
-    # ---- 1. 取输入 & 基础校验 ----
-    if "pantry_ingredients" not in body or "recipe_ingredients" not in body:
-        raise HTTPException(
-            status_code=400,
-            detail="Request JSON must contain 'pantry_ingredients' and 'recipe_ingredients'.",
-        )
-
-    pantry_ingredients = body["pantry_ingredients"]
-    recipe_ingredients = body["recipe_ingredients"]
-
-    if not isinstance(pantry_ingredients, list) or not isinstance(recipe_ingredients, list):
-        raise HTTPException(
-            status_code=400,
-            detail="'pantry_ingredients' and 'recipe_ingredients' must both be arrays.",
-        )
-
+    normalized = []
+    for ing in ingredients:
+        if isinstance(ing, str):
+            ing = ing.strip().lower()
+        elif isinstance(ing, dict):
+            ing = {
+                k: (v.strip().lower() if isinstance(v, str) else v)
+                for k, v in ing.items()
+            }
+        normalized.append(json.dumps(ing, sort_keys=True, ensure_ascii=False))
+    normalized.sort()
+    return hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()
+
+
+# ---------- Vertex call (shared by the endpoints below) ----------
+def _generate_to_buy(
+    project_id: str,
+    location: str,
+    pantry_ingredients: List[Any],
+    recipe_ingredients: List[Any],
+) -> dict:
     # ---- 2. 获取 access token ----
     access_token = _get_vertex_access_token()
 
@@ -182,7 +202,7 @@ Requirements:
     }
 
     # ---- 4. 调用 Vertex ----
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
+    resp = VERTEX.post(url, headers=headers, json=payload, timeout=60)
     if resp.status_code != 200:
         raise HTTPException(status_code=500, detail=resp.text)
 
@@ -214,4 +234,246 @@ Requirements:
         "to_buy": to_buy,
         "shopping_list_raw": reply_text,
         "raw_vertex": data,
-    }
\ No newline at end of file
+    }
+
+
+# ---------- Main endpoint: generate shopping list ----------
+@router.post("/generate")
+async def generate_shopping_list(
+    body: dict,
+    db: AsyncSession = Depends(get_async_db),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+) -> dict:
+    """
+    Simplified version:
+    - Input: raw JSON body with keys:
+        {
+          "pantry_ingredients": [...],
+          "recipe_ingredients": [...]
+        }
+      Each ingredient can be any dict you like, we just serialize it for the model.
+      With a Bearer token, "pantry_ingredients" may be omitted: the user's
+      pantry is then loaded on the server instead of being uploaded again.
+    - Output:
+        {
+          "to_buy": [...],              # parsed JSON array from Vertex
+          "shopping_list_raw": "text",  # raw text from Vertex
+          "raw_vertex": {...}           # full Vertex response (for debugging)
+        }
+    """
+    project_id = os.getenv("GCP_PROJECT_ID")
+    location = os.getenv("GCP_LOCATION", "us-central1")
+    if not project_id:
+        raise HTTPException(status_code=500, detail="GCP_PROJECT_ID is not set")
+
+    # ---- 1. 取输入 & 基础校验 ----
+    if "recipe_ingredients" not in body or ("pantry_ingredients" not in body and not token):
+        raise HTTPException(
+            status_code=400,
+            detail="Request JSON must contain 'pantry_ingredients' and 'recipe_ingredients'.",
+        )
+
+    recipe_ingredients = body["recipe_ingredients"]
+    pantry_ingredients = body.get("pantry_ingredients")
+    server_pantry = "pantry_ingredients" not in body
+
+    if not isinstance(recipe_ingredients, list) or (
+        not server_pantry and not isinstance(pantry_ingredients, list)
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="'pantry_ingredients' and 'recipe_ingredients' must both be arrays.",
+        )
+
+    # ---- 1.5 查缓存（命中时连 pantry 都不用读）----
+    recipe_hash = _ingredients_hash(recipe_ingredients)
+    if server_pantry:
+        current_user = await get_current_user(token=token, db=db)
+        version = await pantry_crud.get_version_async(db, user_id=current_user.id)
+        cache_key = ("user", current_user.id, version, recipe_hash)
+    else:
+        cache_key = ("pantry", _ingredients_hash(pantry_ingredients), recipe_hash)
+
+    cached = SHOPPING_LIST_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if server_pantry:
+        # 登录模式：服务端一次查询读取 pantry（只取 prompt 需要的列）
+        pantry_ingredients = await pantry_crud.list_ingredient_dicts_async(db, user_id=current_user.id)
+
+    # Vertex 调用是阻塞的 HTTP 请求，放到线程池里，不阻塞事件循环
+    result = await run_in_threadpool(
+        _generate_to_buy, project_id, location, pantry_ingredients, recipe_ingredients
+    )
+    SHOPPING_LIST_CACHE.set(cache_key, result)
+    return result
+
+
+# ---------- Meal plan: many recipes → one list ----------
+def _ingredient_fields(ing: Any) -> tuple:
+    """(原始名称, 匹配 key, 标准化后的数量, 标准单位)；key 优先用食材目录里的 ingredient_id。"""
+    if isinstance(ing, dict):
+        name = ing.get("name") or ""
+        raw_qty = ing.get("quantity", ing.get("amount"))
+        unit = ing.get("unit")
+    else:
+        name, raw_qty, unit = ing, None, None
+    unit, qty = canonical_unit(unit, parse_quantity(raw_qty))
+    return str(name).strip(), (INGREDIENT_INDEX.match_key(name), unit), qty, unit
+
+
+def _format_amount(quantity: float, unit: Optional[str]) -> str:
+    return f"{format_quantity(quantity)} {unit}" if unit else str(format_quantity(quantity))
+
+
+def _merge_recipe_ingredients(recipes: List[PlanRecipe]) -> List[dict]:
+    """
+    按 (食材 id 或归一化名称, 标准单位) 合并所有菜谱的食材，数量相加。
+    任一条目数量未知时，合并后的数量也记为未知（None）。
+    """
+    merged: dict = {}
+    for recipe in recipes:
+        for ing in recipe.ingredients:
+            name, key, qty, unit = _ingredient_fields(ing)
+            if not key[0]:
+                continue
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = {
+                    "name": name,
+                    "quantity": qty,
+                    "unit": unit,
+                    "matched_recipe": [name],
+                }
+                continue
+            if entry["quantity"] is not None and qty is not None:
+                entry["quantity"] += qty
+            else:
+                entry["quantity"] = None
+            if name not in entry["matched_recipe"]:
+                entry["matched_recipe"].append(name)
+    return [dict(entry, key=key) for key, entry in merged.items()]
+
+
+def _plan_shopping_list(
+    project_id: str,
+    location: str,
+    pantry_ingredients: List[Any],
+    recipes: List[PlanRecipe],
+) -> dict:
+    """
+    先在本地完成能确定的部分，只把剩下的交给模型（最多一次调用）：
+    1. 合并所有菜谱的同名食材；
+    2. 与 pantry 中同名同单位的条目直接相减（够用则不买，不够则买差额）；
+    3. 剩余食材如果 pantry 里已没有别的东西可匹配，直接全部加入清单；
+       否则连同剩下的 pantry 一次性交给模型做语义匹配。
+    """
+    pantry_index: dict = {}
+    for ing in pantry_ingredients:
+        name, key, qty, _unit = _ingredient_fields(ing)
+        entry = pantry_index.setdefault(key, {"names": [], "quantity": 0.0, "raw": []})
+        entry["names"].append(name)
+        entry["raw"].append(ing)
+        if entry["quantity"] is not None and qty is not None:
+            entry["quantity"] += qty
+        else:
+            entry["quantity"] = None
+
+    to_buy: List[dict] = []
+    unresolved: List[dict] = []
+    for item in _merge_recipe_ingredients(recipes):
+        key = item.pop("key")
+        have = pantry_index.pop(key, None)
+        if have is None:
+            unresolved.append(item)
+            continue
+        need = item["quantity"]
+        if need is None or have["quantity"] is None or have["quantity"] >= need:
+            continue
+        to_buy.append({
+            "name": item["name"],
+            "quantity": format_quantity(need - have["quantity"]),
+            "unit": item["unit"],
+            "reason": (
+                f"Recipes need {_format_amount(need, item['unit'])}, "
+                f"pantry has {_format_amount(have['quantity'], item['unit'])}."
+            ),
+            "matched_existing": have["names"],
+            "matched_recipe": item["matched_recipe"],
+        })
+
+    leftover_pantry = [raw for entry in pantry_index.values() for raw in entry["raw"]]
+    if unresolved and leftover_pantry:
+        model_input = [
+            {"name": item["name"], "quantity": format_quantity(item["quantity"]), "unit": item["unit"]}
+            for item in unresolved
+        ]
+        result = _generate_to_buy(project_id, location, leftover_pantry, model_input)
+        result["to_buy"] = to_buy + result["to_buy"]
+        return result
+
+    for item in unresolved:
+        to_buy.append({
+            "name": item["name"],
+            "quantity": format_quantity(item["quantity"]),
+            "unit": item["unit"],
+            "reason": "Not in pantry.",
+            "matched_existing": [],
+            "matched_recipe": item["matched_recipe"],
+        })
+    return {"to_buy": to_buy, "shopping_list_raw": "", "raw_vertex": {}}
+
+
+@router.post("/plan")
+async def generate_plan_shopping_list(
+    body: ShoppingPlanRequest,
+    db: AsyncSession = Depends(get_async_db),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+) -> dict:
+    """
+    Meal plan version of /generate:
+    - Input:
+        {
+          "recipes": [{"title": "...", "ingredients": [...]}, ...],
+          "pantry_ingredients": [...]      # optional when logged in
+        }
+    - Output: same shape as /generate, one consolidated "to_buy" list with
+      quantities summed across recipes. Vertex is called at most once.
+    """
+    project_id = os.getenv("GCP_PROJECT_ID")
+    location = os.getenv("GCP_LOCATION", "us-central1")
+    if not project_id:
+        raise HTTPException(status_code=500, detail="GCP_PROJECT_ID is not set")
+
+    server_pantry = body.pantry_ingredients is None
+    if server_pantry and not token:
+        raise HTTPException(
+            status_code=400,
+            detail="Request JSON must contain 'pantry_ingredients' when not logged in.",
+        )
+
+    recipes_hash = _ingredients_hash(
+        [ing for recipe in body.recipes for ing in recipe.ingredients]
+    )
+    if server_pantry:
+        current_user = await get_current_user(token=token, db=db)
+        version = await pantry_crud.get_version_async(db, user_id=current_user.id)
+        cache_key = ("plan-user", current_user.id, version, recipes_hash)
+    else:
+        cache_key = ("plan-pantry", _ingredients_hash(body.pantry_ingredients), recipes_hash)
+
+    cached = SHOPPING_LIST_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if server_pantry:
+        pantry_ingredients = await pantry_crud.list_ingredient_dicts_async(db, user_id=current_user.id)
+    else:
+        pantry_ingredients = body.pantry_ingredients
+
+    result = await run_in_threadpool(
+        _plan_shopping_list, project_id, location, pantry_ingredients, body.recipes
+    )
+    SHOPPING_LIST_CACHE.set(cache_key, result)
+    return result
@@ -0,0 +1,118 @@
+"""Throughput of the async DB path vs the old sync-threadpool path.
+
+Builds a throwaway SQLite database with one user and 50 pantry items, then
+serves the same pantry listing two ways from one in-process app:
+
+  /sync   def route        + Session      (runs in Starlette's threadpool)
+  /async  async def route  + AsyncSession (runs on the event loop)
+
+Each path is measured alone and while a burst of bcrypt-bound requests
+(/hash, a sync route like login) occupies the shared threadpool.
+
+  (venv) python benchmarks/bench_async_db.py [--requests 2000] [--concurrency 100]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.User.crud import pantry_crud  # noqa: E402
+from backend.User.database import Base, to_async_url  # noqa: E402
+from backend.User.models.pantry_item import PantryItem  # noqa: E402
+from backend.User.models.user import User  # noqa: E402
+from backend.User.utils.security import get_password_hash  # noqa: E402
+
+
+def build_app(url: str) -> FastAPI:
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(sync_engine)
+    SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+    with SyncSession() as db:
+        user = User(name="bench", phone_number="1", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add_all(PantryItem(user_id=user.id, name=f"item {i}", quantity=str(i)) for i in range(50))
+        db.commit()
+        user_id = user.id
+
+    async_engine = create_async_engine(to_async_url(url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_list(db=Depends(get_sync_db)):
+        return len(pantry_crud.list_items(db, user_id=user_id))
+
+    @app.get("/async")
+    async def async_list(db=Depends(get_async_db)):
+        return len(await pantry_crud.list_items_async(db, user_id=user_id))
+
+    @app.get("/hash")
+    def hash_password():
+        return get_password_hash("benchmark-password")[:7]
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            resp = await client.get(path)
+            resp.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(total: int, concurrency: int, hash_burst: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await run(client, "/async", 50, 10)  # warm up pools
+            await run(client, "/sync", 50, 10)
+
+            print(f"{'path':<8}{'load':<22}{'req/s':>10}")
+            for path in ("/sync", "/async"):
+                rps = await run(client, path, total, concurrency)
+                print(f"{path:<8}{'alone':<22}{rps:>10.0f}")
+            for path in ("/sync", "/async"):
+                burst = asyncio.create_task(run(client, "/hash", hash_burst, hash_burst))
+                rps = await run(client, path, total, concurrency)
+                await burst
+                print(f"{path:<8}{f'+{hash_burst} bcrypt in pool':<22}{rps:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--hash-burst", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.hash_burst))
@@ -0,0 +1,111 @@
+"""Response compression trade-off: bytes saved vs CPU per gzip level / brotli quality.
+
+Builds the JSON bodies the heavy routes actually send:
+
+  pantry     GET /pantry/ with --items items
+  generate   POST /generate-recipe with a raw_vertex of realistic size
+  shopping   POST /shopping-list/plan (to_buy + raw_vertex)
+  small      a login-sized body, below the default 1024-byte threshold
+
+and compresses each one with gzip levels 1/6/9 and, when the optional
+`brotli` package is installed, brotli qualities 1/4/6/11. Prints the compressed
+size, ratio and best-of---repeat CPU time, i.e. what the COMPRESSION_STATS
+numbers in /metrics will look like per route for a given GZIP_LEVEL /
+BROTLI_QUALITY.
+
+  (venv) python benchmarks/bench_compression.py [--items 500] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.User.utils import compression  # noqa: E402
+
+
+def _dumps(content) -> bytes:
+    # 与 JSONResponse / Pydantic dump_json 输出一致：紧凑、UTF-8
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def raw_vertex() -> dict:
+    text = " ".join(f"Step {i}: chop the onion, heat the oil and stir for {i} minutes." for i in range(60))
+    return {
+        "candidates": [
+            {
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "safetyRatings": [
+                    {"category": f"HARM_CATEGORY_{i}", "probability": "NEGLIGIBLE", "probabilityScore": 0.01 * i}
+                    for i in range(4)
+                ],
+            }
+        ],
+        "usageMetadata": {"promptTokenCount": 312, "candidatesTokenCount": 958, "totalTokenCount": 1270},
+    }
+
+
+def payloads(items: int) -> dict:
+    return {
+        "pantry": _dumps(
+            [
+                {
+                    "id": i,
+                    "name": f"item {i}",
+                    "quantity": "2",
+                    "unit": "g",
+                    "notes": None,
+                    "added_at": "2024-01-01T00:00:00",
+                    "updated_at": None,
+                }
+                for i in range(items)
+            ]
+        ),
+        "generate": _dumps(
+            {
+                "ingredients": [f"ingredient {i}" for i in range(30)],
+                "recipe_raw": raw_vertex()["candidates"][0]["content"]["parts"][0]["text"],
+                "raw_vertex": raw_vertex(),
+            }
+        ),
+        "shopping": _dumps(
+            {
+                "to_buy": [{"name": f"item {i}", "quantity": "1 g", "key": f"item-{i}"} for i in range(60)],
+                "shopping_list_raw": "\n".join(f"- item {i}: 1 g" for i in range(60)),
+                "raw_vertex": raw_vertex(),
+            }
+        ),
+        "small": _dumps({"access_token": "x" * 180, "refresh_token": "y" * 43, "token_type": "bearer"}),
+    }
+
+
+def encoders() -> dict:
+    result = {f"gzip-{level}": (lambda level=level: compression._GzipEncoder(level)) for level in (1, 6, 9)}
+    if compression.brotli is not None:
+        for quality in (1, 4, 6, 11):
+            result[f"br-{quality}"] = lambda quality=quality: compression._BrotliEncoder(quality)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500, help="pantry items in the list payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if compression.brotli is None:
+        print("brotli not installed: gzip only (pip install brotli)")
+    print(f"{'payload':<10}{'encoder':<9}{'bytes':>9}{'out':>9}{'ratio':>8}{'best ms':>10}")
+    for payload, body in payloads(args.items).items():
+        for name, make in encoders().items():
+            size = len(make().compress(body, final=True))
+            ms = min(timeit.repeat(lambda: make().compress(body, final=True), number=20, repeat=args.repeat)) / 20 * 1000
+            print(f"{payload:<10}{name:<9}{len(body):>9}{size:>9}{size / len(body):>8.2f}{ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Startup cost: `python -X importtime -c "import main"`, parsed and summarised.
+
+Runs --runs fresh interpreters, reports the median total import time of
+--module and the slowest top-level packages (cumulative, deduplicated so a
+package is only counted where it is first imported), and flags whether any of
+the dependencies that are meant to be imported lazily were loaded eagerly.
+Exits non-zero when the median exceeds --budget-ms, so it can gate CI.
+
+  (venv) python benchmarks/bench_import_time.py [--module main] [--runs 5] [--top 15] [--budget-ms 2500]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+LAZY_MODULES = (
+    "requests",
+    "google.oauth2.service_account",
+    "google.auth.transport.requests",
+    "jose.jwt",
+    "PIL.Image",
+    "pytesseract",
+)
+
+
+def importtime(module: str) -> list:
+    """[(depth, name, self_us, cumulative_us), ...]，按 importtime 的输出顺序。"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # 表头
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def by_package(rows: list) -> dict:
+    """顶层包 → 自身耗时之和（微秒）；自身耗时相加不会重复计算嵌套导入。"""
+    totals = defaultdict(int)
+    for _, name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def main(module: str, runs: int, top: int, budget_ms: float) -> int:
+    totals_ms, packages = [], defaultdict(list)
+    eager = set()
+    for _ in range(runs):
+        rows = importtime(module)
+        names = {name for _, name, _, _ in rows}
+        eager |= {m for m in LAZY_MODULES if m in names}
+        totals_ms.append(next(cum for _, name, _, cum in rows if name == module) / 1000)
+        for package, self_us in by_package(rows).items():
+            packages[package].append(self_us / 1000)
+
+    median_ms = statistics.median(totals_ms)
+    print(f"import {module}: median {median_ms:.0f} ms over {runs} runs (min {min(totals_ms):.0f}, max {max(totals_ms):.0f})")
+    print(f"\n{'package':<28}{'median ms':>10}")
+    ranked = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for package, samples in ranked[:top]:
+        print(f"{package:<28}{statistics.median(samples):>10.1f}")
+    print(f"\neagerly imported lazy deps: {', '.join(sorted(eager)) or 'none'}")
+
+    if median_ms > budget_ms or eager:
+        print(f"FAIL: budget {budget_ms:.0f} ms")
+        return 1
+    print(f"OK: budget {budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=2500)
+    args = parser.parse_args()
+    sys.exit(main(args.module, args.runs, args.top, args.budget_ms))
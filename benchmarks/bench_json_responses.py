@@ -0,0 +1,163 @@
+"""Per-request cost of FastAPI response serialization, measured through the full ASGI route.
+
+Each payload is served by a route declared the way the real one is, and
+called in-process through the ASGI interface (routing, dependency solving,
+serialization, response start/body messages):
+
+  pantry     GET /pantry/ -- --items PantryItem ORM rows, response_model=list[PantryItemOut]
+  shopping   POST /shopping-list/plan -- dict with a large raw_vertex, handler annotated -> dict
+  metrics    GET /metrics/ -- the real get_metrics() dict, annotated -> dict
+  tokens     POST /auth/login -- response_model=TokenResponse
+
+Variants:
+
+  model          response model + default response class (what the routes do):
+                 FastAPI validates and writes bytes with Pydantic dump_json
+  model+orjson   the same route with response_class=<orjson JSONResponse>:
+                 FastAPI falls back to dump_python + response.render
+  no model       no response_model / return annotation: jsonable_encoder + json.dumps
+  no model+orjson  no model with the orjson class: jsonable_encoder still runs first
+
+The orjson variants are skipped when orjson is not installed.
+
+  (venv) python benchmarks/bench_json_responses.py [--items 500] [--repeat 5] [--number 200]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from backend.routers.metrics_router import get_metrics  # noqa: E402
+from backend.User.models.pantry_item import PantryItem  # noqa: E402
+from backend.User.schemas.pantry_schemas import PantryItemOut  # noqa: E402
+from backend.User.schemas.user_schemas import TokenResponse  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def raw_vertex() -> dict:
+    return {
+        "candidates": [
+            {
+                "content": {"parts": [{"text": "x" * 20000}]},
+                "safetyRatings": [
+                    {"category": f"c{i}", "probability": "LOW", "scores": list(range(20))} for i in range(50)
+                ],
+            }
+        ],
+        "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": 900},
+    }
+
+
+def payloads(items: int) -> dict:
+    """{payload: (response_model, factory)}；factory 每次请求返回新的响应内容。"""
+    pantry = [
+        PantryItem(id=i, name=f"item {i}", quantity="2", unit="g", notes=None, added_at=datetime(2024, 1, 1))
+        for i in range(items)
+    ]
+    shopping = {
+        "to_buy": [{"name": f"n{i}", "quantity": "1 g", "key": f"k{i}", "category": "x"} for i in range(200)],
+        "shopping_list_raw": "z" * 3000,
+        "raw_vertex": raw_vertex(),
+    }
+    tokens = {"access_token": "a" * 180, "refresh_token": "r" * 43, "token_type": "bearer"}
+    return {
+        "pantry": (list[PantryItemOut], lambda: pantry),
+        "shopping": (dict, lambda: shopping),
+        "metrics": (dict, get_metrics),
+        "tokens": (TokenResponse, lambda: tokens),
+    }
+
+
+def build_app(response_model, factory, use_model: bool, use_orjson: bool) -> FastAPI:
+    app = FastAPI()
+    options = {"response_model": response_model if use_model else None}
+    if use_orjson:
+        options["response_class"] = _ORJSONResponse
+    app.add_api_route("/r", lambda: factory(), methods=["GET"], **options)
+    return app
+
+
+async def request(app: FastAPI) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "path": "/r",
+        "raw_path": b"/r",
+        "root_path": "",
+        "scheme": "http",
+        "query_string": b"",
+        "headers": [],
+        "client": ("bench", 1),
+        "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return len(b"".join(body))
+
+
+async def best_ms(app: FastAPI, number: int, repeat: int) -> float:
+    for _ in range(10):
+        await request(app)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await request(app)
+        best = min(best, (time.perf_counter() - start) / number * 1000)
+    return best
+
+
+async def run(args) -> None:
+    variants = [("model", True, False), ("no model", False, False)]
+    if orjson is not None:
+        variants += [("model+orjson", True, True), ("no model+orjson", False, True)]
+    else:
+        print("orjson not installed: orjson variants skipped")
+
+    print(f"{'payload':<10}{'variant':<17}{'bytes':>9}{'best ms':>10}")
+    for payload, (response_model, factory) in payloads(args.items).items():
+        for name, use_model, use_orjson in variants:
+            app = build_app(response_model, factory, use_model, use_orjson)
+            size = await request(app)
+            ms = await best_ms(app, args.number, args.repeat)
+            print(f"{payload:<10}{name:<17}{size:>9}{ms:>10.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500, help="pantry rows in the list payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200, help="requests per timing run")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""/pantry/bulk import cost: add_all + per-row refresh vs set-based INSERT.
+
+For 10, 1k and 10k items, imports into a fresh SQLite database with
+
+  legacy  db.add_all(objs); commit; db.refresh(obj) for every row
+  bulk    pantry_crud.bulk_create_items_async (chunked INSERT ... RETURNING)
+
+and reports wall time and the number of SQL statements sent.
+
+  (venv) python benchmarks/bench_pantry_bulk.py [--sizes 10 1000 10000]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from backend.User.crud import pantry_crud  # noqa: E402
+from backend.User.database import Base, to_async_url  # noqa: E402
+from backend.User.models.pantry_item import PantryItem  # noqa: E402
+from backend.User.models.user import User  # noqa: E402
+
+
+async def legacy_bulk_create(db, user_id, items):
+    objs = [PantryItem(user_id=user_id, **data) for data in items]
+    db.add_all(objs)
+    await db.commit()
+    for obj in objs:
+        await db.refresh(obj)
+    return objs
+
+
+async def measure(url: str, size: int, fn) -> tuple:
+    async_engine = create_async_engine(to_async_url(url))
+    statements = [0]
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _count(*args):
+        statements[0] += 1
+
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    items = [{"name": f"item {i}", "quantity": str(i), "unit": "g"} for i in range(size)]
+    async with Session() as db:
+        start = time.perf_counter()
+        created = await fn(db, 1, items)
+        elapsed = time.perf_counter() - start
+    assert len(created) == size and all(obj.added_at for obj in created)
+    await async_engine.dispose()
+    return elapsed, statements[0]
+
+
+async def main(sizes) -> None:
+    print(f"{'items':>7}  {'variant':<8}{'ms':>10}{'statements':>12}")
+    for size in sizes:
+        for name, fn in (("legacy", legacy_bulk_create), ("bulk", pantry_crud.bulk_create_items_async)):
+            with tempfile.TemporaryDirectory() as tmp:
+                url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+                engine = create_engine(url)
+                Base.metadata.create_all(engine)
+                with engine.begin() as conn:
+                    conn.execute(User.__table__.insert(), {"id": 1, "name": "b", "phone_number": "1", "hashed_password": "x"})
+                engine.dispose()
+                elapsed, statements = await measure(url, size, fn)
+            print(f"{size:>7}  {name:<8}{elapsed * 1000:>10.1f}{statements:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
@@ -0,0 +1,107 @@
+"""GET /pantry/ query cost: full list vs keyset pages, with/without the composite index.
+
+Seeds one user with 100, 10k and 100k pantry items (plus a second user
+with the same number of rows, so the user_id filter matters) and times
+
+  full        pantry_crud.list_items (every row, the old GET /pantry/)
+  first page  pantry_crud.list_items_page, limit 100
+  deep page   the same, starting from a cursor near the end
+  prefix      first page filtered by name_prefix
+
+once with ix_pantry_items_user_added_id and once after dropping it.
+
+  (venv) python benchmarks/bench_pantry_list.py [--sizes 100 10000 100000] [--repeat 20]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.User.crud import pantry_crud  # noqa: E402
+from backend.User.database import Base  # noqa: E402
+from backend.User.models.pantry_item import PantryItem  # noqa: E402
+from backend.User.models.user import User  # noqa: E402
+
+PAGE = 100
+
+
+def seed(engine, size: int) -> None:
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": uid, "name": f"u{uid}", "phone_number": str(uid), "hashed_password": "x"}
+            for uid in (1, 2)
+        ])
+        for uid in (1, 2):
+            conn.execute(PantryItem.__table__.insert(), [
+                {
+                    "user_id": uid,
+                    "name": f"item {i:06d}",
+                    "quantity": str(i),
+                    "unit": "g",
+                    # 每 10 行同一秒：覆盖 added_at 相同、靠 id 排序的情况
+                    "added_at": start + timedelta(seconds=i // 10),
+                }
+                for i in range(size)
+            ])
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - begin)
+    return best * 1000
+
+
+def run(size: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        seed(engine, size)
+        Session = sessionmaker(engine)
+
+        with Session() as db:
+            deep_items, _ = pantry_crud.list_items_page(db, 1, limit=max(size - PAGE, 1))
+            deep_cursor = pantry_crud.decode_cursor(pantry_crud.encode_cursor(deep_items[-1]))
+
+        variants = {
+            "full": lambda db: pantry_crud.list_items(db, 1),
+            "first page": lambda db: pantry_crud.list_items_page(db, 1, PAGE),
+            "deep page": lambda db: pantry_crud.list_items_page(db, 1, PAGE, after=deep_cursor),
+            "prefix": lambda db: pantry_crud.list_items_page(db, 1, PAGE, name_prefix="item 00"),
+        }
+        for index_state in ("indexed", "no index"):
+            if index_state == "no index":
+                with engine.begin() as conn:
+                    conn.exec_driver_sql("DROP INDEX ix_pantry_items_user_added_id")
+            for name, fn in variants.items():
+                def call():
+                    with Session() as db:
+                        fn(db)
+                ms = timed(call, repeat if name != "full" or size <= 10000 else max(repeat // 10, 1))
+                print(f"{size:>7}  {index_state:<9}{name:<12}{ms:>10.2f}")
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'items':>7}  {'index':<9}{'variant':<12}{'best ms':>10}")
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
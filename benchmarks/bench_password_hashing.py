@@ -0,0 +1,101 @@
+"""Login bursts: bcrypt in Starlette's shared threadpool vs the dedicated executor.
+
+Serves one in-process app with
+
+  /shared     await run_in_threadpool(verify_password, ...)   (previous login path)
+  /dedicated  await verify_password_async(...)                (bounded bcrypt pool, 503 when full)
+  /ping       a sync `def` route, i.e. anything else that needs the shared threadpool
+
+For each login path, fires --logins concurrent logins and, while they run,
+measures /ping latency. Reports login throughput, rejected (503) logins and
+/ping p50/p95.
+
+  (venv) python benchmarks/bench_password_hashing.py [--logins 200] [--pings 200] [--rounds 12]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+
+from backend.User.utils import security  # noqa: E402
+
+
+def build_app(hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/shared")
+    async def shared():
+        return await run_in_threadpool(security.verify_password, "benchmark-password", hashed)
+
+    @app.post("/dedicated")
+    async def dedicated():
+        try:
+            return await security.verify_password_async("benchmark-password", hashed)
+        except security.PasswordHasherBusy:
+            raise HTTPException(status_code=503, headers={"Retry-After": "1"})
+
+    @app.get("/ping")
+    def ping():
+        return "pong"
+
+    return app
+
+
+async def burst(client: httpx.AsyncClient, path: str, logins: int, pings: int) -> dict:
+    async def login():
+        return (await client.post(path)).status_code
+
+    async def ping():
+        start = time.perf_counter()
+        (await client.get("/ping")).raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    login_tasks = [asyncio.create_task(login()) for _ in range(logins)]
+    await asyncio.sleep(0.01)  # 让登录先占住线程池
+    ping_ms = []
+    for _ in range(pings):
+        ping_ms.append(await ping())
+    statuses = await asyncio.gather(*login_tasks)
+    elapsed = time.perf_counter() - start
+    ok = statuses.count(200)
+    return {
+        "ok_per_s": ok / elapsed,
+        "rejected": statuses.count(503),
+        "ping_p50": statistics.median(ping_ms),
+        "ping_p95": statistics.quantiles(ping_ms, n=20)[-1],
+    }
+
+
+async def main(logins: int, pings: int) -> None:
+    hashed = security.get_password_hash("benchmark-password")
+    transport = httpx.ASGITransport(app=build_app(hashed))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.get("/ping")
+        print(
+            f"bcrypt rounds={security.BCRYPT_ROUNDS}, workers={security.PASSWORD_HASH_WORKERS}, "
+            f"max_pending={security.PASSWORD_HASH_MAX_PENDING}"
+        )
+        print(f"{'path':<11}{'logins/s':>10}{'503s':>7}{'ping p50 ms':>13}{'ping p95 ms':>13}")
+        for path in ("/shared", "/dedicated"):
+            r = await burst(client, path, logins, pings)
+            print(f"{path:<11}{r['ok_per_s']:>10.1f}{r['rejected']:>7}{r['ping_p50']:>13.2f}{r['ping_p95']:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--pings", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=security.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+    security.BCRYPT_ROUNDS = args.rounds
+    asyncio.run(main(args.logins, args.pings))
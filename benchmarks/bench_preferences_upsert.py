@@ -0,0 +1,105 @@
+"""PUT /preferences/ write path: SELECT + add/setattr + refresh vs native upsert.
+
+For every user, fires --writers concurrent first writes (each on its own
+AsyncSession, like separate requests) against a fresh SQLite database:
+
+  orm     SELECT, add or setattr, bump version, commit, refresh
+  upsert  preferences_crud.upsert_preferences_async
+          (INSERT ... ON CONFLICT DO UPDATE ... RETURNING, bump version, commit)
+
+and reports per-call latency, SQL statements per call, failed calls
+(unique-constraint races) and whether every user ended up with one row.
+
+  (venv) python benchmarks/bench_preferences_upsert.py [--users 200] [--writers 4] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event, func, select  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from backend.User.crud import preferences_crud  # noqa: E402
+from backend.User.database import SQLITE_PRAGMAS, Base, apply_sqlite_pragmas, to_async_url  # noqa: E402
+from backend.User.models.preferences import UserPreference  # noqa: E402
+from backend.User.models.user import User  # noqa: E402
+
+VARIANTS = {
+    "orm": lambda db, user_id, **updates: preferences_crud._upsert_preferences_orm_async(db, user_id, updates),
+    "upsert": preferences_crud.upsert_preferences_async,
+}
+
+
+async def measure(url: str, users: int, writers: int, concurrency: int, fn) -> dict:
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{"id": i, "name": f"u{i}", "phone_number": str(i), "hashed_password": "x"} for i in range(1, users + 1)],
+        )
+
+    async_engine = create_async_engine(to_async_url(url))
+    apply_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+    statements = [0]
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _count(*args):
+        statements[0] += 1
+
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    latencies, failures = [], [0]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(user_id: int, writer: int):
+        async with semaphore, Session() as db:
+            start = time.perf_counter()
+            try:
+                await fn(db, user_id, diets=[f"diet {writer}"], max_cooking_time=writer)
+            except IntegrityError:
+                failures[0] += 1
+                await db.rollback()
+                return
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(u, w) for u in range(1, users + 1) for w in range(writers)))
+    calls = users * writers
+    async with Session() as db:
+        rows = await db.scalar(select(func.count()).select_from(UserPreference))
+    await async_engine.dispose()
+    sync_engine.dispose()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": statistics.quantiles(latencies, n=20)[-1],
+        "statements": statements[0] / calls,
+        "failures": failures[0],
+        "rows_ok": rows == users,
+    }
+
+
+async def main(users: int, writers: int, concurrency: int) -> None:
+    print(f"{'variant':<8}{'p50 ms':>9}{'p95 ms':>9}{'stmts/call':>12}{'failed':>8}{'1 row/user':>12}")
+    for name, fn in VARIANTS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            r = await measure(f"sqlite:///{Path(tmp) / 'bench.db'}", users, writers, concurrency, fn)
+        print(
+            f"{name:<8}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['statements']:>12.1f}"
+            f"{r['failures']:>8}{str(r['rows_ok']):>12}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.writers, args.concurrency))
@@ -0,0 +1,129 @@
+"""POST /auth/register write path: duplicate pre-checks vs a single constraint-checked INSERT.
+
+For --phones distinct phone numbers, fires --dupes concurrent signups per
+number (each on its own AsyncSession, like separate requests) against a
+fresh SQLite database:
+
+  precheck  router SELECT by phone, CRUD SELECT again, add, commit, refresh  (previous path)
+  insert    user_crud.create_user_with_hashed_password_async
+            (INSERT ... RETURNING; unique index violation -> ValueError -> 400)
+
+bcrypt is left out (a fixed hash is passed in) so only the database work is
+compared. Reports per-call latency, SQL statements per call, how the calls
+ended (created / 400 duplicate / unhandled IntegrityError, i.e. a 500) and
+whether every phone number ended up with exactly one user.
+
+  (venv) python benchmarks/bench_registration.py [--phones 200] [--dupes 4] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event, func, select  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from backend.User.crud import user_crud  # noqa: E402
+from backend.User.database import SQLITE_PRAGMAS, Base, apply_sqlite_pragmas, to_async_url  # noqa: E402
+from backend.User.models.user import User  # noqa: E402
+from backend.User.schemas.user_schemas import UserCreate  # noqa: E402
+
+
+async def precheck(db, user_in: UserCreate, hashed_password: str) -> User:
+    if await user_crud.get_user_by_phone_async(db, user_in.phone_number):
+        raise ValueError("Phone number already registered")
+    if await user_crud.get_user_by_phone_async(db, user_in.phone_number):
+        raise ValueError("Phone number already registered")
+    user = User(
+        name=user_in.name,
+        hashed_password=hashed_password,
+        phone_number=user_in.phone_number,
+        preference=user_in.preference,
+        allergen=user_in.allergen,
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+VARIANTS = {
+    "precheck": precheck,
+    "insert": user_crud.create_user_with_hashed_password_async,
+}
+
+
+async def measure(url: str, phones: int, dupes: int, concurrency: int, fn) -> dict:
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+
+    async_engine = create_async_engine(to_async_url(url))
+    apply_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+    statements = [0]
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _count(*args):
+        statements[0] += 1
+
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    latencies = []
+    outcomes = {"created": 0, "duplicate": 0, "error": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(phone: int):
+        user_in = UserCreate(name=f"u{phone}", phone_number=str(phone), password="benchmark")
+        async with semaphore, Session() as db:
+            start = time.perf_counter()
+            try:
+                await fn(db, user_in, "x")
+                outcomes["created"] += 1
+            except ValueError:
+                outcomes["duplicate"] += 1
+            except IntegrityError:
+                outcomes["error"] += 1
+                await db.rollback()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(p) for _ in range(dupes) for p in range(phones)))
+    calls = phones * dupes
+    async with Session() as db:
+        users = await db.scalar(select(func.count()).select_from(User))
+    await async_engine.dispose()
+    sync_engine.dispose()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": statistics.quantiles(latencies, n=20)[-1],
+        "statements": statements[0] / calls,
+        "users_ok": users == phones,
+        **outcomes,
+    }
+
+
+async def main(phones: int, dupes: int, concurrency: int) -> None:
+    print(
+        f"{'variant':<10}{'p50 ms':>9}{'p95 ms':>9}{'stmts/call':>12}"
+        f"{'created':>9}{'400s':>7}{'500s':>7}{'1 user/phone':>14}"
+    )
+    for name, fn in VARIANTS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            r = await measure(f"sqlite:///{Path(tmp) / 'bench.db'}", phones, dupes, concurrency, fn)
+        print(
+            f"{name:<10}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['statements']:>12.1f}"
+            f"{r['created']:>9}{r['duplicate']:>7}{r['error']:>7}{str(r['users_ok']):>14}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--phones", type=int, default=200)
+    parser.add_argument("--dupes", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.phones, args.dupes, args.concurrency))
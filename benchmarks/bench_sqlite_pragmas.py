@@ -0,0 +1,112 @@
+"""Mixed read/write concurrency on SQLite: rollback journal vs tuned profile.
+
+Several worker processes (like several uvicorn workers sharing
+data/recipenow.db) run a pantry-shaped workload against one database file
+for a fixed time: mostly list-pantry reads, some single-item inserts.
+The same workload runs twice:
+
+  default  no PRAGMAs (rollback journal, synchronous=FULL)
+  tuned    sqlite_pragmas_from_env() from backend.User.database (WAL, ...)
+
+Reports total operations/s and how many operations failed with
+"database is locked".
+
+  (venv) python benchmarks/bench_sqlite_pragmas.py [--workers 4] [--seconds 5] [--write-ratio 0.2]
+"""
+import argparse
+import multiprocessing as mp
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.User.crud import pantry_crud  # noqa: E402
+from backend.User.database import Base, apply_sqlite_pragmas, sqlite_pragmas_from_env  # noqa: E402
+from backend.User.models.pantry_item import PantryItem  # noqa: E402
+from backend.User.models.user import User  # noqa: E402
+
+USERS = 20
+
+
+def make_engine(url: str, tuned: bool):
+    # timeout=1: pysqlite 默认等 5 秒，这里调小让锁冲突更容易暴露
+    engine = create_engine(url, connect_args={"timeout": 1})
+    if tuned:
+        pragmas = dict(sqlite_pragmas_from_env(), busy_timeout="1000")
+        apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def seed(url: str, tuned: bool) -> None:
+    engine = make_engine(url, tuned)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        for u in range(USERS):
+            user = User(name=f"u{u}", phone_number=str(u), hashed_password="x")
+            db.add(user)
+            db.flush()
+            db.add_all(PantryItem(user_id=user.id, name=f"item {i}") for i in range(100))
+        db.commit()
+    engine.dispose()
+
+
+def worker(url: str, tuned: bool, seconds: float, write_ratio: float, results) -> None:
+    engine = make_engine(url, tuned)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    ops = locked = 0
+    deadline = time.perf_counter() + seconds
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        user_id = rng.randint(1, USERS)
+        try:
+            with Session() as db:
+                if rng.random() < write_ratio:
+                    pantry_crud.create_item(db, user_id=user_id, name="bench")
+                else:
+                    pantry_crud.list_items(db, user_id=user_id)
+            ops += 1
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            locked += 1
+    engine.dispose()
+    results.put((ops, locked))
+
+
+def run(profile: str, workers: int, seconds: float, write_ratio: float) -> None:
+    tuned = profile == "tuned"
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        seed(url, tuned)
+        results = mp.Queue()
+        procs = [
+            mp.Process(target=worker, args=(url, tuned, seconds, write_ratio, results))
+            for _ in range(workers)
+        ]
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+    ops = sum(t[0] for t in totals)
+    locked = sum(t[1] for t in totals)
+    print(f"{profile:<10}{ops / seconds:>10.0f}{locked:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+    print(f"{'profile':<10}{'ops/s':>10}{'locked':>10}")
+    for profile in ("default", "tuned"):
+        run(profile, args.workers, args.seconds, args.write_ratio)
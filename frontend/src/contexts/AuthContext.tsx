@@ -29,6 +29,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
     }
 
     localStorage.setItem('token', response.access_token);
+    localStorage.setItem('refresh_token', response.refresh_token);
     setIsAuthenticated(true);
   };
 
@@ -39,7 +40,13 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   };
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      // Best effort: revoke server-side; local sign-out happens regardless
+      authApi.logout(refreshToken).catch(() => undefined);
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     setIsAuthenticated(false);
   };
 
@@ -1,4 +1,4 @@
-import { createContext, useContext, useState, useEffect, useCallback, type ReactNode } from 'react';
+import { createContext, useContext, useState, useEffect, useCallback, useRef, type ReactNode } from 'react';
 import { pantryApi } from '../services/api';
 import { useAuth } from './AuthContext';
 import type { Ingredient } from '../types';
@@ -33,31 +33,56 @@ export function PantryProvider({ children }: { children: ReactNode }) {
   const [error, setError] = useState<string | null>(null);
   const { isAuthenticated } = useAuth();
 
-  const refreshPantry = useCallback(async () => {
+  // Cursor from the last /pantry/changes response; null forces a full sync
+  const cursorRef = useRef<string | null>(null);
+
+  const syncPantry = useCallback(async () => {
     if (!isAuthenticated) {
+      cursorRef.current = null;
       setPantryItems([]);
       return;
     }
-    
-    setIsLoading(true);
-    setError(null);
+
     try {
-      const items = await pantryApi.getItems();
-      setPantryItems(items.map(item => ({
+      const changes = await pantryApi.getChanges(cursorRef.current);
+      const changed: PantryItem[] = changes.items.map(item => ({
         id: item.id,
         name: item.name,
         quantity: item.quantity ?? undefined,
         unit: item.unit ?? undefined,
         notes: item.notes ?? undefined,
         addedAt: item.added_at,
-      })));
+      }));
+      cursorRef.current = changes.cursor;
+      if (changes.reset) {
+        setPantryItems(changed);
+        return;
+      }
+      if (changed.length === 0 && changes.deleted.length === 0) return;
+      setPantryItems(prev => {
+        const deleted = new Set(changes.deleted);
+        const byId = new Map(prev.filter(item => !deleted.has(item.id)).map(item => [item.id, item]));
+        changed.forEach(item => byId.set(item.id, item));
+        return Array.from(byId.values()).sort(
+          (a, b) => a.addedAt.localeCompare(b.addedAt) || a.id - b.id
+        );
+      });
     } catch (err) {
       setError('Failed to load pantry');
       console.error(err);
+    }
+  }, [isAuthenticated]);
+
+  const refreshPantry = useCallback(async () => {
+    cursorRef.current = null;
+    setIsLoading(true);
+    setError(null);
+    try {
+      await syncPantry();
     } finally {
       setIsLoading(false);
     }
-  }, [isAuthenticated]);
+  }, [syncPantry]);
 
   // Load pantry when authenticated
   useEffect(() => {
@@ -70,7 +95,7 @@ export function PantryProvider({ children }: { children: ReactNode }) {
     try {
       const items = ingredients.map(name => ({ name }));
       await pantryApi.addItemsBulk(items);
-      await refreshPantry();
+      await syncPantry();
     } catch (err) {
       setError('Failed to add items');
       console.error(err);
@@ -82,7 +107,7 @@ export function PantryProvider({ children }: { children: ReactNode }) {
     
     try {
       await pantryApi.addItem(item);
-      await refreshPantry();
+      await syncPantry();
     } catch (err) {
       setError('Failed to add item');
       console.error(err);
@@ -94,7 +119,7 @@ export function PantryProvider({ children }: { children: ReactNode }) {
     
     try {
       await pantryApi.deleteItem(id);
-      setPantryItems(prev => prev.filter(item => item.id !== id));
+      await syncPantry();
     } catch (err) {
       setError('Failed to remove item');
       console.error(err);
@@ -106,7 +131,7 @@ export function PantryProvider({ children }: { children: ReactNode }) {
     
     try {
       await pantryApi.updateItem(id, updates);
-      await refreshPantry();
+      await syncPantry();
     } catch (err) {
       setError('Failed to update item');
       console.error(err);
@@ -118,7 +143,7 @@ export function PantryProvider({ children }: { children: ReactNode }) {
     
     try {
       await pantryApi.clearAll();
-      setPantryItems([]);
+      await syncPantry();
     } catch (err) {
       setError('Failed to clear pantry');
       console.error(err);
@@ -16,10 +16,12 @@ import {
 } from 'lucide-react';
 import { shoppingListApi } from '../services/api';
 import { usePantry } from '../contexts/PantryContext';
+import { useAuth } from '../contexts/AuthContext';
 import type { ShoppingListItem, Ingredient } from '../types';
 
 export default function ShoppingListPage() {
   const { getIngredientsForApi, pantryItems } = usePantry();
+  const { isAuthenticated } = useAuth();
   const [isGenerating, setIsGenerating] = useState(false);
   const [shoppingList, setShoppingList] = useState<ShoppingListItem[]>([]);
   const [checkedItems, setCheckedItems] = useState<Set<string>>(new Set());
@@ -55,7 +57,7 @@ export default function ShoppingListPage() {
     setError(null);
     
     try {
-      const pantryIngredients = getIngredientsForApi();
+      const pantryIngredients = isAuthenticated ? null : getIngredientsForApi();
       const response = await shoppingListApi.generateShoppingList(
         pantryIngredients,
         recipeIngredients
@@ -15,10 +15,43 @@ class ApiError extends Error {
   }
 }
 
-async function fetchApi<T>(
+// Concurrent 401s share one /auth/refresh call; the refresh token is single-use.
+let refreshInFlight: Promise<boolean> | null = null;
+
+export function refreshSession(): Promise<boolean> {
+  if (!refreshInFlight) {
+    refreshInFlight = (async () => {
+      const refreshToken = localStorage.getItem('refresh_token');
+      if (!refreshToken) {
+        return false;
+      }
+      const response = await fetch(`${API_BASE}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      });
+      if (!response.ok) {
+        localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
+        return false;
+      }
+      const tokens: AuthResponse = await response.json();
+      localStorage.setItem('token', tokens.access_token);
+      localStorage.setItem('refresh_token', tokens.refresh_token);
+      return true;
+    })().finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+}
+
+// Sends the request with auth headers; on 401 refreshes once and retries. Throws ApiError unless ok.
+async function fetchResponse(
   endpoint: string, 
-  options: RequestInit = {}
-): Promise<T> {
+  options: RequestInit = {},
+  retried = false
+): Promise<Response> {
   const token = localStorage.getItem('token');
   
   const headers: HeadersInit = {
@@ -38,11 +71,19 @@ async function fetchApi<T>(
     headers,
   });
 
+  if (response.status === 401 && token && !retried && (await refreshSession())) {
+    return fetchResponse(endpoint, options, true);
+  }
+
   if (!response.ok) {
     const errorText = await response.text();
     throw new ApiError(response.status, errorText);
   }
 
+  return response;
+}
+
+async function parseBody<T>(response: Response): Promise<T> {
   if (response.status === 204) {
     return undefined as T;
   }
@@ -61,6 +102,10 @@ async function fetchApi<T>(
   return responseText as unknown as T;
 }
 
+async function fetchApi<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
+  return parseBody<T>(await fetchResponse(endpoint, options));
+}
+
 // Auth response types
 interface LoginResponse extends AuthResponse {
   requires_2fa?: boolean;
@@ -109,6 +154,13 @@ export const authApi = {
       }),
     });
   },
+
+  logout: async (refreshToken: string) => {
+    return fetchApi('/auth/logout', {
+      method: 'POST',
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    });
+  },
 };
 
 // Scan endpoints
@@ -158,18 +210,33 @@ export const recipeApi = {
 
 // Shopping list endpoints
 export const shoppingListApi = {
+  // pantryIngredients = null: logged-in mode, the server reads the pantry itself
   generateShoppingList: async (
-    pantryIngredients: Ingredient[], 
+    pantryIngredients: Ingredient[] | null, 
     recipeIngredients: Ingredient[]
   ): Promise<ShoppingListResponse> => {
     return fetchApi('/shopping-list/generate', {
       method: 'POST',
       body: JSON.stringify({
-        pantry_ingredients: pantryIngredients,
+        ...(pantryIngredients ? { pantry_ingredients: pantryIngredients } : {}),
         recipe_ingredients: recipeIngredients,
       }),
     });
   },
+
+  // Meal plan: one consolidated list for several recipes
+  generatePlanShoppingList: async (
+    pantryIngredients: Ingredient[] | null,
+    recipes: { title?: string; ingredients: Ingredient[] }[]
+  ): Promise<ShoppingListResponse> => {
+    return fetchApi('/shopping-list/plan', {
+      method: 'POST',
+      body: JSON.stringify({
+        ...(pantryIngredients ? { pantry_ingredients: pantryIngredients } : {}),
+        recipes,
+      }),
+    });
+  },
 };
 
 export { ApiError };
@@ -177,10 +244,41 @@ export { ApiError };
 
 // Pantry API endpoints
 export const pantryApi = {
+  // GET /pantry/ is keyset-paginated; follow X-Next-Cursor until the last page
   getItems: async () => {
-    return fetchApi<{ id: number; name: string; quantity?: string; unit?: string; notes?: string }[]>('/pantry/');
+    type Item = { id: number; name: string; quantity?: string; unit?: string; notes?: string };
+    const items: Item[] = [];
+    let cursor: string | null = null;
+    do {
+      const query: string = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response: Response = await fetchResponse(`/pantry/${query}`);
+      items.push(...(await parseBody<Item[]>(response)));
+      cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return items;
   },
   
+  // Delta sync: without `since` returns the full list (reset = true), paged via next_page
+  getChanges: async (since: string | null) => {
+    type Changes = {
+      cursor: string;
+      reset: boolean;
+      items: { id: number; name: string; quantity?: string; unit?: string; notes?: string; added_at: string }[];
+      deleted: number[];
+      next_page?: string | null;
+    };
+    const query = since ? `?since=${encodeURIComponent(since)}` : '';
+    const changes = await fetchApi<Changes>(`/pantry/changes${query}`);
+    // Every snapshot page carries the first page's cursor; writes made meanwhile arrive in the next delta
+    let page = changes.next_page;
+    while (page) {
+      const next: Changes = await fetchApi<Changes>(`/pantry/changes?page=${encodeURIComponent(page)}`);
+      changes.items.push(...next.items);
+      page = next.next_page;
+    }
+    return changes;
+  },
+
   addItem: async (item: { name: string; quantity?: string; unit?: string; notes?: string }) => {
     return fetchApi('/pantry/', {
       method: 'POST',
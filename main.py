@@ -1,16 +1,123 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+
 from fastapi import FastAPI
 
-from backend.routers import generate_rec_router, scan_router, shopping_list_router
+from backend.routers import generate_rec_router, metrics_router, scan_router, shopping_list_router
+from backend.User import database
+from backend.User.config import Settings
+from backend.User.crud import ingredient_crud
 from backend.User.routers import pantry_router, preferences_router, user_router
-from dotenv import load_dotenv
+from backend.User.utils import security
+from backend.User.utils.cache import CACHES
+from backend.User.utils.compression import CompressionMiddleware
+from backend.User.utils.maintenance import compact_pantry_tombstones_forever
+from backend.User.utils.vertex import VERTEX
+
+logger = logging.getLogger(__name__)
+
+
+async def _load_ingredient_index() -> int:
+    async with database.AsyncSessionLocal() as db:
+        return await ingredient_crud.reload_index_async(db)
+
+
+async def _warm_auth() -> bool:
+    # 导入 jose.jwt 及其加密后端，并跑一遍签发 / 校验
+    return security.decode_access_token(security.create_access_token({"sub": "warmup"})) is not None
+
+
+async def warm_up(settings: Settings) -> dict:
+    """
+    启动预热，返回 {步骤: {"ms": 耗时, "result": 结果}}。
+    任何一步失败只记日志（结果为 None），不阻塞启动。
+    """
+    report = {}
+
+    async def step(name: str, run: Callable[[], Awaitable]) -> None:
+        start = time.perf_counter()
+        try:
+            result = await run()
+        except Exception:
+            logger.warning("warmup step %s failed", name, exc_info=True)
+            report[name] = None
+            return
+        report[name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "result": result}
+
+    await step("db_pool", lambda: database.warm_pool(settings.warmup_db_connections))
+    await step("auth", _warm_auth)
+    cred_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if settings.warmup_vertex_token and cred_path:
+        # 取 token 是阻塞 IO，放到线程里
+        await step("vertex_token", lambda: asyncio.to_thread(lambda: bool(VERTEX.access_token(cred_path))))
+    return report
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    应用工厂。共享资源都在 lifespan 里按 worker 创建 / 释放：
+    - 启动：丢弃从父进程继承的连接池（prefork 时不与父进程共用 socket）、
+      创建 Vertex HTTP session、加载食材别名索引、按 settings 预热、启动后台清理；
+    - 关闭：停止后台清理、关闭 Vertex session、释放连接池、清空进程内缓存。
+    多 worker：uvicorn main:create_app --factory --workers 4（或 gunicorn -k uvicorn.workers.UvicornWorker main:app）。
+
+    限制：每个进程只运行一个 app。数据库引擎、VERTEX、进程内缓存都是模块级单例，
+    并不属于某个 app；同一进程里建多个 app 时，任何一个 app 关闭都会释放其余 app
+    仍在使用的连接池和 Vertex session。
+    """
+    settings = settings or Settings.from_env()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await database.dispose_engines(close=False)
+        VERTEX.start(settings.vertex_http_pool_size)
+        # 食材别名索引：加载失败（例如还没跑 init_db）时 pantry 写入只是不关联 ingredient_id
+        try:
+            await _load_ingredient_index()
+        except Exception:
+            logger.warning("ingredient index not loaded", exc_info=True)
+        app.state.warmup = await warm_up(settings) if settings.warmup else {}
+        compaction = None
+        if settings.pantry_compaction_interval > 0:
+            compaction = asyncio.create_task(
+                compact_pantry_tombstones_forever(interval=settings.pantry_compaction_interval)
+            )
+        try:
+            yield
+        finally:
+            if compaction is not None:
+                # 等任务真正结束再释放连接池：它可能正持有 session
+                compaction.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await compaction
+            VERTEX.close()
+            await database.dispose_engines()
+            for cache in CACHES.values():
+                cache.clear()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    if settings.compression:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            gzip_level=settings.gzip_level,
+            brotli_quality=settings.brotli_quality,
+        )
 
-load_dotenv()
+    app.include_router(generate_rec_router.router)
+    app.include_router(scan_router.router)
+    app.include_router(shopping_list_router.router)
+    app.include_router(user_router.router)
+    app.include_router(preferences_router.router)
+    app.include_router(pantry_router.router)
+    app.include_router(metrics_router.router)
+    return app
 
-app = FastAPI()
 
-app.include_router(generate_rec_router.router)
-app.include_router(scan_router.router)
-app.include_router(shopping_list_router.router)
-app.include_router(user_router.router)
-app.include_router(preferences_router.router)
-app.include_router(pantry_router.router)
+app = create_app()
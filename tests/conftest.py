@@ -1,9 +1,23 @@
 # tests/conftest.py
+import asyncio
 import os
+from dataclasses import replace
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
 from main import app
+from backend.User.database import (
+    SQLITE_PRAGMAS,
+    Base,
+    apply_sqlite_pragmas,
+    get_async_db,
+    track_pool_events,
+    to_async_url,
+)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -15,9 +29,80 @@ def _set_test_env():
     os.environ.setdefault("GCP_LOCATION", "us-central1")
 
 
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    """
+    每个测试前清空进程内缓存（含食材别名索引），避免上一个测试的结果被命中。
+    """
+    from backend.User.utils.cache import CACHES
+    from backend.User.utils.ingredients import INGREDIENT_INDEX
+
+    for cache in CACHES.values():
+        cache.clear()
+    INGREDIENT_INDEX.load([])
+    yield
+
+
+METRICS_TOKEN = "test-metrics-token"
+
+
+@pytest.fixture
+def metrics_headers(monkeypatch):
+    """
+    打开 main.app 的 /metrics/（默认没有 METRICS_TOKEN，接口返回 404），返回需要带上的 header。
+    """
+    monkeypatch.setattr(app.state, "settings", replace(app.state.settings, metrics_token=METRICS_TOKEN))
+    return {"X-Metrics-Token": METRICS_TOKEN}
+
+
 @pytest.fixture
 def client():
     """
     FastAPI TestClient，用来调用 HTTP 接口。
     """
     return TestClient(app)
+
+
+@pytest.fixture
+def db_client(tmp_path):
+    """
+    使用临时 SQLite 文件的 TestClient（真实建表，覆盖 get_async_db）。
+    NullPool：TestClient 每个请求可能跑在不同的事件循环里，不复用连接。
+    """
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+
+    async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+    apply_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+    pool_stats = {"checkouts": 0, "checkins": 0}
+    track_pool_events(async_engine.sync_engine, pool_stats)
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    client = TestClient(app)
+    client.pool_stats = pool_stats
+    client.session_factory = session_factory
+    try:
+        yield client
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+        asyncio.run(async_engine.dispose())
+        sync_engine.dispose()
+
+
+@pytest.fixture
+def auth_headers(db_client):
+    """
+    在临时数据库里注册并登录一个用户，返回 Authorization header。
+    """
+    db_client.post(
+        "/auth/register",
+        json={"name": "Tester", "phone_number": "5550001", "password": "password123"},
+    )
+    resp = db_client.post("/auth/login", data={"username": "5550001", "password": "password123"})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
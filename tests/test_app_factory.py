@@ -0,0 +1,187 @@
+# tests/test_app_factory.py
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from backend.User import database
+from backend.User.config import Settings
+from backend.User.utils.vertex import VERTEX, VertexTokenProvider
+from main import create_app
+
+
+class DummyCreds:
+    """模拟 google-auth 凭证：refresh 后 valid。"""
+
+    refreshes = 0
+
+    def __init__(self):
+        self.token = None
+        self.valid = False
+
+    def refresh(self, request):
+        DummyCreds.refreshes += 1
+        self.token = f"token-{DummyCreds.refreshes}"
+        self.valid = True
+
+
+@pytest.fixture
+def dummy_creds(monkeypatch):
+    from backend.User.utils import vertex
+
+    DummyCreds.refreshes = 0
+    loads = []
+
+    def from_file(path, scopes=None):
+        loads.append(path)
+        return DummyCreds()
+
+    monkeypatch.setattr(vertex.service_account.Credentials, "from_service_account_file", from_file)
+    monkeypatch.setattr(vertex.google_auth_requests, "Request", lambda session=None: object())
+    return loads
+
+
+@pytest.fixture
+def offline_lifespan(tmp_path, monkeypatch):
+    """
+    lifespan 不连 .env 里配置的数据库：连接池预热改连临时 SQLite，跳过加载食材索引。
+    """
+    engine = database.make_async_engine(database.to_async_url(f"sqlite:///{tmp_path / 'lifespan.db'}"))
+    warm_pool = database.warm_pool
+
+    async def warm_tmp_pool(connections, target=None):
+        return await warm_pool(connections, engine)
+
+    async def no_index():
+        return 0
+
+    monkeypatch.setattr(database, "warm_pool", warm_tmp_pool)
+    monkeypatch.setattr(main, "_load_ingredient_index", no_index)
+    yield
+    asyncio.run(engine.dispose())
+
+
+@pytest.mark.usefixtures("offline_lifespan")
+class TestCreateApp:
+    def test_factory_builds_independent_apps(self):
+        settings = Settings(warmup=False, pantry_compaction_interval=0)
+        first, second = create_app(settings), create_app(settings)
+        assert first is not second
+        assert first.state.settings is settings
+        paths = set(first.openapi()["paths"])
+        assert {"/auth/login", "/pantry/", "/metrics/"} <= paths
+
+    def test_metrics_disabled_without_token(self):
+        client = TestClient(create_app(Settings(warmup=False, pantry_compaction_interval=0)))
+        assert client.get("/metrics/").status_code == 404
+        assert client.get("/metrics/", headers={"X-Metrics-Token": ""}).status_code == 404
+
+    def test_metrics_require_matching_token(self):
+        settings = Settings(warmup=False, pantry_compaction_interval=0, metrics_token="secret")
+        client = TestClient(create_app(settings))
+        assert client.get("/metrics/").status_code == 401
+        assert client.get("/metrics/", headers={"X-Metrics-Token": "wrong"}).status_code == 401
+        resp = client.get("/metrics/", headers={"X-Metrics-Token": "secret"})
+        assert resp.status_code == 200
+        assert "db_pool" in resp.json()
+
+    def test_lifespan_warms_up_and_releases_resources(self, tmp_path, monkeypatch, dummy_creds):
+        monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", str(tmp_path / "sa.json"))
+        app = create_app(Settings(warmup_db_connections=2, pantry_compaction_interval=0, metrics_token="t"))
+
+        with TestClient(app) as client:
+            report = app.state.warmup
+            assert report["auth"]["result"] is True
+            assert report["vertex_token"]["result"] is True
+            assert report["db_pool"]["result"] == 2
+            assert VERTEX.http is not None
+            # 预取过 token：请求路径上直接命中缓存，不再读 key 文件 / 刷新
+            assert VERTEX.access_token(str(tmp_path / "sa.json")) == "token-1"
+            assert DummyCreds.refreshes == 1
+            assert client.get("/metrics/", headers={"X-Metrics-Token": "t"}).status_code == 200
+
+        assert VERTEX.http is None
+        assert dummy_creds == [str(tmp_path / "sa.json")]
+
+    def test_warmup_failure_does_not_block_startup(self, monkeypatch):
+        async def broken(connections, target=None):
+            raise OSError("database unavailable")
+
+        monkeypatch.setattr(database, "warm_pool", broken)
+        app = create_app(Settings(warmup_vertex_token=False, pantry_compaction_interval=0, metrics_token="t"))
+        with TestClient(app) as client:
+            assert app.state.warmup["db_pool"] is None
+            assert client.get("/metrics/", headers={"X-Metrics-Token": "t"}).status_code == 200
+
+    def test_shutdown_waits_for_compaction_before_disposing(self, monkeypatch):
+        events = []
+
+        async def compaction(interval):
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                await asyncio.sleep(0)  # 模拟收尾（关闭 session）
+                events.append("compaction stopped")
+                raise
+
+        dispose = database.dispose_engines
+
+        async def recording_dispose(close=True):
+            if close:
+                events.append("engines disposed")
+            await dispose(close=close)
+
+        monkeypatch.setattr(main, "compact_pantry_tombstones_forever", compaction)
+        monkeypatch.setattr(database, "dispose_engines", recording_dispose)
+        with TestClient(create_app(Settings(warmup=False, pantry_compaction_interval=60))):
+            pass
+        assert events == ["compaction stopped", "engines disposed"]
+
+    def test_warmup_disabled(self):
+        app = create_app(Settings(warmup=False, pantry_compaction_interval=0))
+        with TestClient(app):
+            assert app.state.warmup == {}
+
+
+class TestWarmPool:
+    def test_pre_opens_connections_up_to_pool_size(self, tmp_path):
+        import asyncio
+
+        from sqlalchemy.pool import NullPool
+
+        url = database.to_async_url(f"sqlite:///{tmp_path / 'warm.db'}")
+        pooled = database.make_async_engine(url)
+        unpooled = database.create_async_engine(url, poolclass=NullPool)
+
+        async def run():
+            try:
+                opened = await database.warm_pool(50, pooled)
+                return opened, pooled.sync_engine.pool.checkedin(), await database.warm_pool(2, unpooled)
+            finally:
+                await pooled.dispose()
+                await unpooled.dispose()
+
+        opened, idle, unpooled_opened = asyncio.run(run())
+        assert opened == database.DB_POOL_SIZE
+        assert idle == database.DB_POOL_SIZE
+        assert unpooled_opened == 0
+
+
+class TestVertexTokenProvider:
+    def test_refreshes_only_when_invalid(self, dummy_creds):
+        provider = VertexTokenProvider()
+        assert provider.token("/sa.json") == "token-1"
+        assert provider.token("/sa.json") == "token-1"
+        assert DummyCreds.refreshes == 1
+
+        provider._creds.valid = False  # 过期
+        assert provider.token("/sa.json") == "token-2"
+        assert dummy_creds == ["/sa.json"]
+
+    def test_reset_reloads_credentials(self, dummy_creds):
+        provider = VertexTokenProvider()
+        provider.token("/sa.json")
+        provider.reset()
+        provider.token("/sa.json")
+        assert dummy_creds == ["/sa.json", "/sa.json"]
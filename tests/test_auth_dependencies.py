@@ -1,53 +1,60 @@
 # tests/test_auth_dependencies.py
+import asyncio
+
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi import HTTPException
 
 from backend.User.utils.security import create_access_token
+from backend.User import database
 from backend.User.utils import auth_dependencies
 from backend.User.models.user import User
 
 
 class TestGetDb:
-    def test_get_db_yields_session(self):
-        """Test that get_db yields a session and closes it"""
-        with patch.object(auth_dependencies, 'SessionLocal') as mock_session_local:
-            mock_db = MagicMock()
-            mock_session_local.return_value = mock_db
-            
-            gen = auth_dependencies.get_db()
-            db = next(gen)
-            
-            assert db == mock_db
-            
-            # Finish the generator
-            try:
-                next(gen)
-            except StopIteration:
-                pass
-            
-            mock_db.close.assert_called_once()
+    def test_get_async_db_yields_session(self):
+        """get_async_db yields one session and closes it when the request ends"""
+        with patch.object(database, 'AsyncSessionLocal') as mock_session_local:
+            mock_db = AsyncMock()
+            mock_session_local.return_value.__aenter__.return_value = mock_db
+
+            async def run():
+                gen = database.get_async_db()
+                db = await gen.__anext__()
+                with pytest.raises(StopAsyncIteration):
+                    await gen.__anext__()
+                return db
+
+            assert asyncio.run(run()) == mock_db
+            mock_session_local.return_value.__aexit__.assert_awaited_once()
+
+    def test_auth_and_routes_share_dependency(self):
+        """get_current_user depends on the same get_async_db the routes use"""
+        import inspect
+
+        default = inspect.signature(auth_dependencies.get_current_user).parameters["db"].default
+        assert default.dependency is database.get_async_db
 
 
 class TestGetCurrentUser:
     def test_get_current_user_success(self):
         """Test successful user retrieval from token"""
         mock_db = MagicMock()
-        mock_user = User(id=1, phone_number="1234567890", name="Test")
+        mock_user = User(id=1, phone_number="1234567890", name="Test", token_version=0)
         
-        # Create a valid token
+        # Legacy token: only sub (phone number)
         token = create_access_token({"sub": "1234567890"})
         
-        with patch.object(auth_dependencies.user_crud, 'get_user_by_username', return_value=mock_user):
-            result = auth_dependencies.get_current_user(token=token, db=mock_db)
-            assert result == mock_user
+        with patch.object(auth_dependencies.user_crud, 'get_user_by_username_async', AsyncMock(return_value=mock_user)):
+            result = asyncio.run(auth_dependencies.get_current_user(token=token, db=mock_db))
+            assert result == auth_dependencies.user_crud.Principal(1, "1234567890", 0)
 
     def test_get_current_user_invalid_token(self):
         """Test that invalid token raises 401"""
         mock_db = MagicMock()
         
         with pytest.raises(HTTPException) as exc_info:
-            auth_dependencies.get_current_user(token="invalid.token.here", db=mock_db)
+            asyncio.run(auth_dependencies.get_current_user(token="invalid.token.here", db=mock_db))
         
         assert exc_info.value.status_code == 401
 
@@ -59,7 +66,7 @@ class TestGetCurrentUser:
         token = create_access_token({"role": "user"})
         
         with pytest.raises(HTTPException) as exc_info:
-            auth_dependencies.get_current_user(token=token, db=mock_db)
+            asyncio.run(auth_dependencies.get_current_user(token=token, db=mock_db))
         
         assert exc_info.value.status_code == 401
 
@@ -69,9 +76,32 @@ class TestGetCurrentUser:
         
         token = create_access_token({"sub": "nonexistent"})
         
-        with patch.object(auth_dependencies.user_crud, 'get_user_by_username', return_value=None):
+        with patch.object(auth_dependencies.user_crud, 'get_user_by_username_async', AsyncMock(return_value=None)):
             with pytest.raises(HTTPException) as exc_info:
-                auth_dependencies.get_current_user(token=token, db=mock_db)
+                asyncio.run(auth_dependencies.get_current_user(token=token, db=mock_db))
             
             assert exc_info.value.status_code == 401
 
+    def test_uid_token_hits_principal_cache(self):
+        """Tokens with uid / tv are resolved from the principal cache without any query"""
+        principal = auth_dependencies.user_crud.Principal(5, "555", 2)
+        auth_dependencies.user_crud.PRINCIPAL_CACHE.set((5, 2), principal)
+        mock_db = MagicMock()
+        token = create_access_token({"sub": "555", "uid": 5, "tv": 2})
+
+        result = asyncio.run(auth_dependencies.get_current_user(token=token, db=mock_db))
+
+        assert result is principal
+        mock_db.execute.assert_not_called()
+
+    def test_stale_token_version_raises_401(self):
+        """A token minted before a password change (older tv) is rejected"""
+        row = MagicMock(id=5, phone_number="555", token_version=3)
+        mock_db = MagicMock()
+        mock_db.execute = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=row)))
+        token = create_access_token({"sub": "555", "uid": 5, "tv": 2})
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(auth_dependencies.get_current_user(token=token, db=mock_db))
+
+        assert exc_info.value.status_code == 401
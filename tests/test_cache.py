@@ -0,0 +1,64 @@
+# tests/test_cache.py
+from backend.User.utils import cache as cache_module
+from backend.User.utils.cache import TTLCache
+
+
+class TestTTLCache:
+    def test_get_set(self):
+        c = TTLCache("test_get_set", maxsize=4, ttl=60)
+        assert c.get("a") is None
+        c.set("a", 1)
+        assert c.get("a") == 1
+        assert c.stats()["hits"] == 1
+        assert c.stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        c = TTLCache("test_lru", maxsize=2, ttl=60)
+        c.set("a", 1)
+        c.set("b", 2)
+        c.get("a")  # a 变成最近使用
+        c.set("c", 3)
+        assert c.get("b") is None
+        assert c.get("a") == 1
+        assert c.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        c = TTLCache("test_ttl", maxsize=4, ttl=10)
+        c.set("a", 1)
+        now[0] += 11
+        assert c.get("a") is None
+        assert c.stats()["size"] == 0
+
+    def test_registered_for_metrics(self):
+        c = TTLCache("test_registry")
+        assert cache_module.CACHES["test_registry"] is c
+
+    def test_set_after_invalidation_is_dropped(self):
+        c = TTLCache("test_generation", maxsize=4, ttl=60)
+        generation = c.generation()  # 读库之前
+        c.pop("a")  # 写入方提交后失效
+        c.set("a", "stale", generation)
+        assert c.get("a") is None
+
+        c.set("a", "fresh", c.generation())
+        assert c.get("a") == "fresh"
+        # 别的 key 的失效不影响
+        generation = c.generation()
+        c.pop("b")
+        c.set("a", "fresh2", generation)
+        assert c.get("a") == "fresh2"
+
+    def test_generation_guard_survives_pruning_and_clear(self):
+        c = TTLCache("test_generation_prune", maxsize=2, ttl=60)
+        generation = c.generation()
+        for key in ("a", "b", "c"):  # "a" 的失效记录被挤出，退回保守判断
+            c.pop(key)
+        c.set("a", "stale", generation)
+        assert c.get("a") is None
+
+        generation = c.generation()
+        c.clear()
+        c.set("z", "stale", generation)
+        assert c.get("z") is None
@@ -0,0 +1,210 @@
+# tests/test_compression.py
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.User.config import Settings
+from backend.User.utils import compression
+from backend.User.utils.compression import COMPRESSION_STATS, CompressionMiddleware, CompressionStats
+from main import create_app
+
+BIG = "x" * 5000
+
+
+class FakeBrotli:
+    """brotli 替身（测试环境不一定装了 brotli）：原样输出，只验证协商和分支。"""
+
+    class Compressor:
+        def __init__(self, quality):
+            self.quality = quality
+
+        def process(self, data):
+            return data
+
+        def flush(self):
+            return b""
+
+        def finish(self):
+            return b""
+
+
+def build_app(stats: CompressionStats, **options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return {"text": BIG}
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id, "text": BIG}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"0" * 5000, media_type="image/png")
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(gzip.compress(BIG.encode()), headers={"Content-Encoding": "gzip"}, media_type="text/plain")
+
+    @app.get("/no-transform")
+    def no_transform():
+        return PlainTextResponse(BIG, headers={"Cache-Control": "no-transform"})
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([f"data: {BIG}\n\n", "data: done\n\n"]), media_type="text/event-stream")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(["a" * 100, "b" * 100]), media_type="text/plain")
+
+    app.add_middleware(CompressionMiddleware, stats=stats, **options)
+    return app
+
+
+@pytest.fixture
+def stats():
+    return CompressionStats()
+
+
+@pytest.fixture
+def compressed_client(stats):
+    return TestClient(build_app(stats))
+
+
+class TestNegotiation:
+    def test_picks_highest_q(self, monkeypatch):
+        middleware = CompressionMiddleware(app=None)
+        assert middleware.negotiate("gzip, deflate") == "gzip"
+        assert middleware.negotiate("deflate") is None
+        assert middleware.negotiate("gzip;q=0") is None
+        assert middleware.negotiate("*") == "gzip"
+        assert middleware.negotiate("*, gzip;q=0") is None
+        assert middleware.negotiate("") is None
+
+        monkeypatch.setattr(compression, "brotli", FakeBrotli)
+        assert middleware.negotiate("gzip, br") == "br"
+        assert middleware.negotiate("gzip;q=1, br;q=0.5") == "gzip"
+        assert middleware.negotiate("br;q=0, gzip") == "gzip"
+
+
+class TestCompressionMiddleware:
+    def test_large_response_is_gzipped(self, compressed_client, stats):
+        resp = compressed_client.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.headers["vary"] == "Accept-Encoding"
+        assert int(resp.headers["content-length"]) < len(BIG)
+        assert resp.json() == {"text": BIG}
+
+        route = stats.stats()["/big"]
+        assert route["compressed"] == 1
+        assert route["encodings"] == {"gzip": 1}
+        assert route["bytes_out"] == int(resp.headers["content-length"])
+        assert route["bytes_saved"] > 4000
+        assert route["cpu_ms"] >= 0
+
+    def test_brotli_preferred_when_available(self, compressed_client, stats, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", FakeBrotli)
+        resp = compressed_client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+        assert resp.headers["content-encoding"] == "br"
+        assert stats.stats()["/big"]["encodings"] == {"br": 1}
+
+    def test_stats_keyed_by_route_template(self, compressed_client, stats):
+        compressed_client.get("/items/1", headers={"Accept-Encoding": "gzip"})
+        compressed_client.get("/items/2", headers={"Accept-Encoding": "gzip"})
+        assert stats.stats()["/items/{item_id}"]["compressed"] == 2
+
+    @pytest.mark.parametrize(
+        "path, reason",
+        [
+            ("/small", "small"),
+            ("/image", "excluded"),
+            ("/encoded", "excluded"),
+            ("/no-transform", "excluded"),
+            ("/events", "excluded"),
+        ],
+    )
+    def test_skipped_responses_pass_through(self, compressed_client, stats, path, reason):
+        resp = compressed_client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        # /encoded 自带 gzip，其余不应被加上 Content-Encoding
+        assert resp.headers.get("content-encoding") == ("gzip" if path == "/encoded" else None)
+        assert stats.stats()[path]["skipped"] == {reason: 1}
+        assert stats.stats()[path]["compressed"] == 0
+
+    def test_not_accepted(self, compressed_client, stats):
+        resp = compressed_client.get("/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in resp.headers
+        assert resp.headers["vary"] == "Accept-Encoding"
+        assert stats.stats()["/big"]["skipped"] == {"not_accepted": 1}
+
+    def test_streaming_chunks_are_flushed_individually(self, stats):
+        sent = []
+
+        async def capture(message):
+            sent.append(message)
+
+        requested = False
+
+        async def receive():
+            # 第一次返回请求体，之后一直挂起（StreamingResponse 会持续监听断开）
+            nonlocal requested
+            if requested:
+                await asyncio.Event().wait()
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        app = build_app(stats, minimum_size=10_000)
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "path": "/stream",
+            "raw_path": b"/stream",
+            "root_path": "",
+            "scheme": "http",
+            "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")],
+            "client": ("test", 1),
+            "server": ("test", 80),
+        }
+        asyncio.run(app(scope, receive, capture))
+
+        start = sent[0]
+        headers = dict(start["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+        bodies = [message["body"] for message in sent[1:] if message.get("body")]
+        # 第一块单独就能解出来：没有等整个响应体
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert decompressor.decompress(bodies[0]) == b"a" * 100
+        rest = b"".join(decompressor.decompress(body) for body in bodies[1:])
+        assert rest == b"b" * 100
+        assert stats.stats()["/stream"]["compressed"] == 1
+
+
+class TestAppCompression:
+    def test_create_app_compresses_and_reports(self):
+        COMPRESSION_STATS.reset()
+        settings = Settings(warmup=False, pantry_compaction_interval=0, metrics_token="t")
+        client = TestClient(create_app(settings))
+        resp = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+
+        metrics = client.get("/metrics/", headers={"X-Metrics-Token": "t"}).json()["compression"]
+        assert metrics["openapi"]["compressed"] == 1
+
+    def test_compression_can_be_disabled(self):
+        client = TestClient(create_app(Settings(warmup=False, pantry_compaction_interval=0, compression=False)))
+        resp = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in resp.headers
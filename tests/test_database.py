@@ -0,0 +1,308 @@
+# tests/test_database.py
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.User import database
+from backend.User.database import apply_sqlite_pragmas, sqlite_pragmas_from_env, to_async_url
+
+
+class TestToAsyncUrl:
+    def test_sqlite(self):
+        assert to_async_url("sqlite:////tmp/x.db") == "sqlite+aiosqlite:////tmp/x.db"
+
+    def test_mysql_keeps_query(self):
+        url = to_async_url("mysql+pymysql://u:p@h:3307/db?charset=utf8mb4")
+        assert url == "mysql+aiomysql://u:p@h:3307/db?charset=utf8mb4"
+
+    def test_unknown_driver_unchanged(self):
+        assert to_async_url("postgresql+asyncpg://h/db") == "postgresql+asyncpg://h/db"
+
+
+class TestSqlitePragmas:
+    def test_defaults(self, monkeypatch):
+        for key in ["SQLITE_TUNING", "SQLITE_JOURNAL_MODE", "SQLITE_BUSY_TIMEOUT_MS"]:
+            monkeypatch.delenv(key, raising=False)
+        pragmas = sqlite_pragmas_from_env()
+        assert pragmas["journal_mode"] == "WAL"
+        assert pragmas["synchronous"] == "NORMAL"
+        assert pragmas["temp_store"] == "MEMORY"
+        assert pragmas["foreign_keys"] == "ON"
+
+    def test_env_override_and_disable(self, monkeypatch):
+        monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "1234")
+        assert sqlite_pragmas_from_env()["busy_timeout"] == "1234"
+        monkeypatch.setenv("SQLITE_TUNING", "0")
+        assert sqlite_pragmas_from_env() == {}
+
+    def test_rejects_injected_values(self):
+        engine = create_engine("sqlite://")
+        with pytest.raises(ValueError):
+            apply_sqlite_pragmas(engine, {"journal_mode": "WAL; DROP TABLE users"})
+
+    def test_applied_on_connect(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}")
+        apply_sqlite_pragmas(engine, {"journal_mode": "WAL", "busy_timeout": "4321", "foreign_keys": "ON"})
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 4321
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        engine.dispose()
+
+    def test_applied_on_async_connect(self, tmp_path):
+        async_engine = create_async_engine(to_async_url(f"sqlite:///{tmp_path / 'a.db'}"))
+        apply_sqlite_pragmas(async_engine.sync_engine, {"journal_mode": "WAL", "temp_store": "MEMORY"})
+
+        async def check():
+            async with async_engine.connect() as conn:
+                mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+                temp_store = (await conn.execute(text("PRAGMA temp_store"))).scalar()
+            await async_engine.dispose()
+            return mode, temp_store
+
+        assert asyncio.run(check()) == ("wal", 2)
+
+    def test_module_engines_are_tuned(self):
+        if database.engine.url.get_backend_name() != "sqlite" or not database.SQLITE_PRAGMAS:
+            pytest.skip("default engine is not SQLite")
+        with database.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+
+class TestReplicaSet:
+    def _factory(self, url):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        return async_sessionmaker(database.make_async_engine(to_async_url(url)), expire_on_commit=False)
+
+    def test_round_robin_and_failover(self, tmp_path):
+        broken = tmp_path / "missing" / "nope.db"  # 目录不存在：连接失败
+        replicas = database.ReplicaSet(
+            [self._factory(f"sqlite:///{tmp_path / 'a.db'}"), self._factory(f"sqlite:///{broken}")],
+            retry_after=60,
+        )
+
+        async def pick():
+            db = await replicas.session_for(user_id=None, fresh_for=0)
+            if db is None:
+                return None
+            url = str(db.bind.url)
+            await db.close()
+            return url
+
+        picked = [asyncio.run(pick()) for _ in range(4)]
+        # 坏副本被跳过并进入冷却期，之后不再尝试
+        assert all(url.endswith("a.db") for url in picked)
+        stats = replicas.stats()
+        assert stats["failovers"] == 1 and stats["healthy"] == 1 and stats["replica_reads"] == 4
+
+    def test_recent_writer_is_pinned_to_primary(self, tmp_path):
+        replicas = database.ReplicaSet([self._factory(f"sqlite:///{tmp_path / 'a.db'}")])
+        replicas.record_write(7)
+
+        async def pick(user_id, fresh_for):
+            db = await replicas.session_for(user_id=user_id, fresh_for=fresh_for)
+            if db is not None:
+                await db.close()
+            return db is not None
+
+        assert asyncio.run(pick(7, 5.0)) is False
+        assert asyncio.run(pick(7, 0)) is True  # 路由声明可容忍延迟
+        assert asyncio.run(pick(8, 5.0)) is True
+        assert replicas.stats()["pinned_reads"] == 1
+
+    def test_no_replicas_means_primary(self):
+        replicas = database.ReplicaSet([])
+        assert asyncio.run(replicas.session_for(user_id=1, fresh_for=5.0)) is None
+
+
+class TestReadRouting:
+    @staticmethod
+    def _snapshot_replica(tmp_path):
+        import sqlite3
+
+        # 副本 = 此刻主库的快照，之后不再同步（模拟复制延迟）
+        with sqlite3.connect(tmp_path / "test.db") as src, sqlite3.connect(tmp_path / "replica.db") as dst:
+            src.backup(dst)
+
+    @pytest.fixture
+    def replicas(self, tmp_path, monkeypatch):
+        from backend.User.utils import auth_dependencies
+
+        self._snapshot_replica(tmp_path)
+        replicas = database.ReplicaSet([TestReplicaSet()._factory(f"sqlite:///{tmp_path / 'replica.db'}")])
+        monkeypatch.setattr(database, "READ_REPLICAS", replicas)
+        monkeypatch.setattr(auth_dependencies, "READ_REPLICAS", replicas)
+        return replicas
+
+    def test_reads_go_to_replica_except_right_after_write(self, db_client, auth_headers, tmp_path, replicas):
+        db_client.post("/pantry/", json={"name": "Egg"}, headers=auth_headers)
+        names = [i["name"] for i in db_client.get("/pantry/", headers=auth_headers).json()]
+        assert names == ["Egg"]  # 刚写过：读主库
+        assert replicas.stats()["pinned_reads"] == 1
+
+        self._snapshot_replica(tmp_path)  # 副本追上
+        replicas._last_write.clear()  # 写入窗口已过
+        names = [i["name"] for i in db_client.get("/pantry/", headers=auth_headers).json()]
+        assert names == ["Egg"]
+        assert replicas.stats()["replica_reads"] == 1
+
+    def test_write_on_another_worker_is_not_read_from_lagging_replica(self, db_client, auth_headers, replicas):
+        db_client.post("/pantry/", json={"name": "Egg"}, headers=auth_headers)
+        replicas._last_write.clear()  # 本 worker 没有这次写入的记录（写在别的 worker 上）
+
+        names = [i["name"] for i in db_client.get("/pantry/", headers=auth_headers).json()]
+        assert names == ["Egg"]  # 副本缺这次写入：版本号不一致，读主库
+        stats = replicas.stats()
+        assert (stats["lagging_reads"], stats["replica_reads"], stats["primary_reads"]) == (1, 0, 1)
+
+    def test_lag_tolerant_route_reads_replica(self, db_client, auth_headers, replicas):
+        from backend.User.routers import pantry_router
+        from backend.User.utils.auth_dependencies import get_read_db
+        from main import app
+
+        db_client.post("/pantry/", json={"name": "Egg"}, headers=auth_headers)
+        app.dependency_overrides[pantry_router.read_db] = get_read_db(fresh_for=0)
+        try:
+            assert db_client.get("/pantry/", headers=auth_headers).json() == []
+        finally:
+            app.dependency_overrides.pop(pantry_router.read_db, None)
+        assert replicas.stats()["replica_reads"] == 1
+
+    def test_replica_snapshots_are_not_cached(self, db_client, auth_headers, tmp_path, replicas):
+        from backend.User.routers import preferences_router
+        from backend.User.utils.auth_dependencies import get_read_db
+        from main import app
+
+        db_client.put("/preferences/", json={"diets": ["vegan"]}, headers=auth_headers)
+        # 容忍延迟的读：副本仍落后，读到旧值
+        app.dependency_overrides[preferences_router.read_db] = get_read_db(fresh_for=0)
+        try:
+            assert db_client.get("/preferences/", headers=auth_headers).json()["diets"] == []
+            # 副本追上之后立刻能读到新值：落后的快照没有被缓存
+            self._snapshot_replica(tmp_path)
+            assert db_client.get("/preferences/", headers=auth_headers).json()["diets"] == ["vegan"]
+        finally:
+            app.dependency_overrides.pop(preferences_router.read_db, None)
+
+
+class TestPoolConfig:
+    def test_defaults_are_pessimistic_and_sized(self, tmp_path):
+        from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+        kwargs = database.pool_kwargs(f"sqlite:///{tmp_path / 'x.db'}")
+        assert kwargs["pool_pre_ping"] is True
+        assert kwargs["poolclass"] is QueuePool
+        assert (kwargs["pool_size"], kwargs["max_overflow"]) == (database.DB_POOL_SIZE, database.DB_MAX_OVERFLOW)
+        assert database.pool_kwargs("sqlite+aiosqlite:////tmp/x.db", is_async=True)["poolclass"] is (
+            AsyncAdaptedQueuePool
+        )
+        # 内存库没有可配置的池大小
+        assert "pool_size" not in database.pool_kwargs("sqlite://")
+
+    def test_optimistic_and_invalid_strategy(self, monkeypatch):
+        monkeypatch.setattr(database, "DB_POOL_PRE_PING", "optimistic")
+        assert database.pool_kwargs("mysql+pymysql://u:p@h/db")["pool_pre_ping"] is False
+        monkeypatch.setattr(database, "DB_POOL_PRE_PING", "sometimes")
+        with pytest.raises(ValueError):
+            database.pool_kwargs("mysql+pymysql://u:p@h/db")
+
+    def test_hold_saturation_and_churn_telemetry(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(database, "DB_POOL_SIZE", 1)
+        monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 0)
+        engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}", **database.pool_kwargs(f"sqlite:///{tmp_path / 'p.db'}"))
+        stats = {}
+        database.track_pool_events(engine, stats)
+
+        held = engine.connect()
+        assert stats["connects"] == 1 and stats["connect_ms_max"] > 0
+        assert database.pool_status(engine)["saturation"] == 1.0
+        time.sleep(0.05)
+        held.close()
+        assert stats["checkins"] == 1 and stats["checkout_hold_ms_max"] >= 40
+
+        with engine.connect() as conn:
+            conn.invalidate()
+        with engine.connect():
+            pass
+        assert (stats["connects"], stats["invalidations"]) == (2, 1)
+        engine.dispose()
+
+    def test_session_checkouts_are_tracked(self, tmp_path):
+        from sqlalchemy.orm import Session
+
+        engine = database.make_async_engine(f"sqlite+aiosqlite:///{tmp_path / 's.db'}")
+        stats = {}
+        database.track_pool_events(engine.sync_engine, stats)
+
+        async def run():
+            async with AsyncSession(engine) as db:
+                await db.execute(text("SELECT 1"))
+            await engine.dispose()
+
+        asyncio.run(run())
+        with Session(create_engine(f"sqlite:///{tmp_path / 's.db'}")) as db:
+            database.track_pool_events(db.get_bind(), stats)
+            db.execute(text("SELECT 1"))
+        assert stats["checkouts"] == stats["checkins"] == 2
+        assert stats["checkout_hold_ms_total"] > 0
+
+    def test_pool_timeout_counted_by_request_dependency(self, monkeypatch):
+        from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+        monkeypatch.setattr(database, "POOL_STATS", dict(database.POOL_STATS, timeouts=0))
+
+        async def run():
+            dependency = database.get_async_db()
+            await dependency.__anext__()
+            with pytest.raises(PoolTimeoutError):
+                await dependency.athrow(PoolTimeoutError("QueuePool limit reached"))
+
+        asyncio.run(run())
+        assert database.POOL_STATS["timeouts"] == 1
+
+
+class TestOptimisticReconnect:
+    """DB_POOL_PRE_PING=optimistic：池里的连接已断开时，事务第一条语句换新连接重试一次。"""
+
+    @pytest.fixture
+    def stale_engine(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(database, "DB_POOL_PRE_PING", "optimistic")
+        monkeypatch.setattr(database, "POOL_STATS", dict(database.POOL_STATS, reconnects=0))
+        url = f"sqlite:///{tmp_path / 'r.db'}"
+        engine = create_engine(url, **database.pool_kwargs(url))
+        stats = {}
+        database.track_pool_events(engine, stats)
+        # 池里留一个底层已关闭的连接（相当于服务端超时断开）
+        with engine.connect() as conn:
+            raw = conn.connection.dbapi_connection
+        raw.close()
+        yield engine, stats
+        engine.dispose()
+
+    def test_first_statement_is_retried_on_a_fresh_connection(self, stale_engine):
+        engine, stats = stale_engine
+        with database.ReconnectingSession(engine) as db:
+            assert db.scalar(text("SELECT 1")) == 1
+        assert stats["disconnects"] == 1
+        assert database.POOL_STATS["reconnects"] == 1
+        assert stats["connects"] == 2
+
+    def test_disconnect_mid_transaction_is_raised(self, stale_engine):
+        from sqlalchemy.exc import DBAPIError
+
+        engine, stats = stale_engine
+        with database.ReconnectingSession(engine) as db:
+            db.connection()  # 事务已经开始：不能安全重放
+            with pytest.raises(DBAPIError):
+                db.execute(text("SELECT 1"))
+        assert database.POOL_STATS["reconnects"] == 0
+        assert stats["disconnects"] == 1
+
+    def test_metrics_expose_pool_status(self, client, metrics_headers):
+        pool = client.get("/metrics/", headers=metrics_headers).json()["db_pool"]
+        assert {"connects", "checkout_hold_ms_total", "timeouts", "reconnects"} <= set(pool)
+        assert "saturation" in pool["engines"]["async"]
@@ -0,0 +1,150 @@
+# tests/test_etag.py
+from fastapi.testclient import TestClient
+
+from backend.User.utils.etag import etag_matches, query_digest, weak_etag
+
+
+class TestEtagHelpers:
+    def test_weak_etag_format(self):
+        assert weak_etag("pantry", 1, 7) == 'W/"pantry-1-7"'
+
+    def test_matches_weak_and_strong_forms(self):
+        etag = weak_etag("pantry", 1, 7)
+        assert etag_matches(etag, etag)
+        assert etag_matches('"pantry-1-7"', etag)
+        assert etag_matches('W/"other", W/"pantry-1-7"', etag)
+        assert etag_matches("*", etag)
+
+    def test_query_digest(self):
+        assert query_digest(cursor=None, unit=None) is None
+        assert query_digest(unit="kg", limit=1) == query_digest(limit=1, unit="kg")
+        assert query_digest(unit="kg") != query_digest(unit="g")
+        assert query_digest(unit="kg") != query_digest(name_prefix="kg")
+
+    def test_no_match(self):
+        etag = weak_etag("pantry", 1, 7)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('W/"pantry-1-8"', etag)
+
+
+def _watch_statements(db_client, fragment):
+    """记录测试数据库上包含 fragment 的 SQL 语句。"""
+    from sqlalchemy import event
+
+    engine = db_client.session_factory.kw["bind"].sync_engine
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        if fragment in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    return engine, listener, statements
+
+
+class TestConditionalGet:
+    def _revalidate(self, db_client, url, headers):
+        first = db_client.get(url, headers=headers)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+        assert etag.startswith('W/"')
+        assert first.headers["Cache-Control"] == "private, no-cache"
+        second = db_client.get(url, headers={**headers, "If-None-Match": etag})
+        return etag, second
+
+    def test_pantry_304_without_loading_rows(self, db_client: TestClient, auth_headers):
+        from sqlalchemy import event
+
+        db_client.post("/pantry/", json={"name": "Egg"}, headers=auth_headers)
+        engine, listener, statements = _watch_statements(db_client, "FROM pantry_items")
+        try:
+            etag, resp = self._revalidate(db_client, "/pantry/", auth_headers)
+            assert resp.status_code == 304
+            assert resp.content == b""
+            assert resp.headers["ETag"] == etag
+            # 只有第一次 200 读了条目，304 只查了版本号
+            assert len(statements) == 1
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    def test_pantry_pages_have_distinct_etags(self, db_client: TestClient, auth_headers):
+        for name in ("Egg", "Milk"):
+            db_client.post("/pantry/", json={"name": name}, headers=auth_headers)
+        first = db_client.get("/pantry/?limit=1", headers=auth_headers)
+        cursor = first.headers["X-Next-Cursor"]
+
+        # 第二页带着第一页的 ETag：不能 304，否则客户端会复用第一页的内容
+        second = db_client.get(
+            f"/pantry/?limit=1&cursor={cursor}",
+            headers={**auth_headers, "If-None-Match": first.headers["ETag"]},
+        )
+        assert second.status_code == 200
+        assert second.json()[0]["name"] != first.json()[0]["name"]
+        assert second.headers["ETag"] != first.headers["ETag"]
+
+        again = db_client.get(
+            f"/pantry/?limit=1&cursor={cursor}",
+            headers={**auth_headers, "If-None-Match": second.headers["ETag"]},
+        )
+        assert again.status_code == 304
+
+    def test_pantry_filters_have_distinct_etags(self, db_client: TestClient, auth_headers):
+        db_client.post("/pantry/", json={"name": "Flour", "quantity": "1", "unit": "kg"}, headers=auth_headers)
+        db_client.post("/pantry/", json={"name": "Sugar", "quantity": "500", "unit": "g"}, headers=auth_headers)
+        etag = db_client.get("/pantry/", headers=auth_headers).headers["ETag"]
+
+        for url in ("/pantry/?unit=kg", "/pantry/?name_prefix=Su"):
+            resp = db_client.get(url, headers={**auth_headers, "If-None-Match": etag})
+            assert resp.status_code == 200
+            assert len(resp.json()) == 1
+            assert resp.headers["ETag"] != etag
+
+    def test_pantry_write_changes_etag(self, db_client: TestClient, auth_headers):
+        etag, _ = self._revalidate(db_client, "/pantry/", auth_headers)
+        db_client.post("/pantry/", json={"name": "Milk"}, headers=auth_headers)
+
+        resp = db_client.get("/pantry/", headers={**auth_headers, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert [i["name"] for i in resp.json()] == ["Milk"]
+
+    def test_preferences_304_and_invalidation(self, db_client: TestClient, auth_headers):
+        etag, resp = self._revalidate(db_client, "/preferences/", auth_headers)
+        assert resp.status_code == 304
+
+        db_client.put("/preferences/", json={"diets": ["vegan"]}, headers=auth_headers)
+        resp = db_client.get("/preferences/", headers={**auth_headers, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.json()["diets"] == ["vegan"]
+
+        etag = resp.headers["ETag"]
+        db_client.delete("/preferences/", headers=auth_headers)
+        resp = db_client.get("/preferences/", headers={**auth_headers, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.json()["diets"] == []
+
+    def test_profile_304(self, db_client: TestClient, auth_headers):
+        etag, resp = self._revalidate(db_client, "/auth/me", auth_headers)
+        assert resp.status_code == 304
+
+        first = db_client.get("/auth/me", headers=auth_headers).json()
+        assert first["phone_number"] == "5550001"
+        assert "hashed_password" not in first
+
+    def test_profile_update_changes_version(self, db_client: TestClient, auth_headers):
+        import asyncio
+
+        from backend.User.crud import user_crud
+        from backend.User.schemas.user_schemas import UserUpdate
+
+        etag, _ = self._revalidate(db_client, "/auth/me", auth_headers)
+
+        async def rename():
+            async with db_client.session_factory() as db:
+                user = await user_crud.get_user_by_phone_async(db, "5550001")
+                await user_crud.update_user_async(db, user, UserUpdate(name="Renamed"))
+
+        asyncio.run(rename())
+        resp = db_client.get("/auth/me", headers={**auth_headers, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.json()["name"] == "Renamed"
@@ -83,7 +83,7 @@ def test_generate_recipe_success(client: TestClient, monkeypatch: pytest.MonkeyP
             return _fake_vertex_recipe_response()
 
     monkeypatch.setattr(
-        generate_rec_router.requests, "post",
+        generate_rec_router.VERTEX, "post",
         lambda *a, **k: DummyResponse()
     )
 
@@ -0,0 +1,87 @@
+# tests/test_import_time.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from backend.User.utils.lazy import LazyModule, lazy_import, optional_lazy_import
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 导入 main 的总耗时上限（毫秒）；CI 机器慢时可用环境变量放宽
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+# 只在具体请求里才用到的重依赖：启动时不应被导入
+LAZY_MODULES = (
+    "requests",
+    "google.oauth2.service_account",
+    "google.auth.transport.requests",
+    "jose.jwt",
+    "PIL.Image",
+    "pytesseract",
+)
+
+
+def _importtime(module: str) -> dict:
+    """
+    在全新解释器里 python -X importtime -c "import <module>"，
+    解析 stderr 返回 {模块名: 累计微秒}。
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+@pytest.fixture(scope="module")
+def main_timings():
+    return _importtime("main")
+
+
+class TestImportTime:
+    def test_heavy_dependencies_are_not_imported_at_startup(self, main_timings):
+        assert "main" in main_timings
+        eager = [name for name in LAZY_MODULES if name in main_timings]
+        assert eager == []
+
+    def test_main_import_within_budget(self, main_timings):
+        total_ms = main_timings["main"] / 1000
+        assert total_ms < IMPORT_TIME_BUDGET_MS, (
+            f"import main took {total_ms:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)"
+        )
+
+
+class TestLazyModule:
+    def test_import_deferred_until_attribute_access(self):
+        module = lazy_import("json")
+        assert not module.loaded
+        assert module.dumps([1]) == "[1]"
+        assert module.loaded
+
+    def test_setattr_forwards_to_real_module(self, monkeypatch):
+        import json
+
+        module = lazy_import("json")
+        monkeypatch.setattr(module, "dumps", lambda *a, **k: "patched")
+        assert json.dumps([1]) == "patched"
+        monkeypatch.undo()
+        assert json.dumps([1]) == "[1]"
+
+    def test_optional_missing_package_is_none(self):
+        assert optional_lazy_import("no_such_package_for_tests.sub") is None
+        assert isinstance(optional_lazy_import("json"), LazyModule)
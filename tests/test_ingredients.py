@@ -0,0 +1,94 @@
+# tests/test_ingredients.py
+from backend.User.utils.ingredients import (
+    IngredientIndex,
+    canonical_unit,
+    format_quantity,
+    normalize_name,
+    parse_quantity,
+)
+
+
+class TestIngredientHelpers:
+    def test_normalize_name(self):
+        assert normalize_name("  Onions ") == "onion"
+        assert normalize_name("Tomatoes") == "tomato"
+        assert normalize_name("berries") == "berry"
+        assert normalize_name("Large   Egg") == "large egg"
+        assert normalize_name("glass") == "glass"
+        assert normalize_name("Hummus") == "hummus"
+        assert normalize_name("asparagus") == "asparagus"
+
+    def test_parse_quantity(self):
+        assert parse_quantity(2) == 2.0
+        assert parse_quantity("1.5") == 1.5
+        assert parse_quantity("1/2") == 0.5
+        assert parse_quantity("a pinch") is None
+        assert parse_quantity(None) is None
+        assert parse_quantity(True) is None
+
+    def test_canonical_unit(self):
+        assert canonical_unit("kg", 1.5) == ("g", 1500.0)
+        assert canonical_unit("Pieces", 2.0) == ("pcs", 2.0)
+        assert canonical_unit("bunch", 1.0) == ("bunch", 1.0)
+        assert canonical_unit(None, 3.0) == (None, 3.0)
+
+    def test_format_quantity(self):
+        assert format_quantity(3.0) == 3
+        assert format_quantity(0.25) == 0.25
+        assert format_quantity(None) is None
+
+
+class TestIngredientIndex:
+    def _index(self):
+        index = IngredientIndex()
+        index.load([("egg", 1), ("Eggs", 1), ("鸡蛋", 1), ("bell pepper", 2), ("pepper", 3)])
+        return index
+
+    def test_resolve_normalizes_and_drops_leading_descriptors(self):
+        index = self._index()
+        assert index.resolve("  EGGS ") == 1
+        assert index.resolve("Large free-range eggs") == 1
+        assert index.resolve("鸡蛋") == 1
+        # 整体匹配优先于去掉修饰词
+        assert index.resolve("Fresh bell pepper") == 2
+        assert index.resolve("chopped pepper") == 3
+        # 不在修饰词表里的前缀不去掉
+        assert index.resolve("black pepper") is None
+        assert index.resolve("flour") is None
+        assert index.resolve(None) is None
+
+    def test_compound_names_do_not_match_their_last_word(self):
+        from backend.User.crud.ingredient_crud import SEED_CATALOG
+
+        index = IngredientIndex()
+        index.load(
+            (alias, ingredient_id)
+            for ingredient_id, (name, _category, aliases) in enumerate(SEED_CATALOG, start=1)
+            for alias in (name, *aliases)
+        )
+        for name in (
+            "peanut butter",
+            "coconut milk",
+            "cream cheese",
+            "sweet potato",
+            "cayenne pepper",
+            "ice cream",
+            "sour cream",
+            "egg noodles",
+            "almond flour",
+        ):
+            assert index.resolve(name) is None, name
+        assert index.resolve("Large eggs") == index.resolve("egg")
+        assert index.resolve("whole milk") == index.resolve("milk")
+        assert index.resolve("Unsalted butter") == index.resolve("butter")
+
+    def test_match_key_falls_back_to_normalized_name(self):
+        index = self._index()
+        assert index.match_key("large egg") == index.match_key("Eggs") == 1
+        assert index.match_key("Onions") == "onion"
+
+    def test_load_replaces_previous_aliases(self):
+        index = self._index()
+        index.load([("milk", 9)])
+        assert len(index) == 1
+        assert index.resolve("egg") is None
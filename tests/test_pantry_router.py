@@ -0,0 +1,593 @@
+# tests/test_pantry_router.py
+from fastapi.testclient import TestClient
+
+
+class TestPantryRouter:
+    def test_requires_auth(self, db_client: TestClient):
+        resp = db_client.get("/pantry/")
+        assert resp.status_code == 401
+
+    def test_create_list_update_delete(self, db_client: TestClient, auth_headers):
+        resp = db_client.post(
+            "/pantry/", json={"name": "Egg", "quantity": 6, "unit": "pcs"}, headers=auth_headers
+        )
+        assert resp.status_code == 201
+        item = resp.json()
+        assert item["quantity"] == "6"
+        assert item["added_at"]
+
+        resp = db_client.put(f"/pantry/{item['id']}", json={"quantity": 4}, headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json()["quantity"] == "4"
+
+        items = db_client.get("/pantry/", headers=auth_headers).json()
+        assert [i["name"] for i in items] == ["Egg"]
+
+        resp = db_client.delete(f"/pantry/{item['id']}", headers=auth_headers)
+        assert resp.status_code == 204
+        assert db_client.get("/pantry/", headers=auth_headers).json() == []
+
+    def test_bulk_create_and_clear(self, db_client: TestClient, auth_headers):
+        resp = db_client.post(
+            "/pantry/bulk",
+            json={"items": [{"name": "Milk"}, {"name": "Rice", "quantity": 500, "unit": "g"}]},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 201
+        assert [i["name"] for i in resp.json()] == ["Milk", "Rice"]
+
+        resp = db_client.delete("/pantry/", headers=auth_headers)
+        assert resp.status_code == 204
+        assert db_client.get("/pantry/", headers=auth_headers).json() == []
+
+    def test_update_missing_item_returns_404(self, db_client: TestClient, auth_headers):
+        resp = db_client.put("/pantry/999", json={"name": "X"}, headers=auth_headers)
+        assert resp.status_code == 404
+
+
+class TestPantryBatch:
+    def _create(self, db_client, auth_headers, *names):
+        resp = db_client.post(
+            "/pantry/bulk", json={"items": [{"name": n} for n in names]}, headers=auth_headers
+        )
+        return [item["id"] for item in resp.json()]
+
+    def test_batch_delete_reports_per_item_status(self, db_client: TestClient, auth_headers):
+        a, b, c = self._create(db_client, auth_headers, "A", "B", "C")
+
+        resp = db_client.post(
+            "/pantry/batch/delete", json={"ids": [a, 999, c, a]}, headers=auth_headers
+        )
+        assert resp.status_code == 200
+        assert [(r["id"], r["status"]) for r in resp.json()] == [
+            (a, "deleted"), (999, "not_found"), (c, "deleted"),
+        ]
+        remaining = db_client.get("/pantry/", headers=auth_headers).json()
+        assert [i["id"] for i in remaining] == [b]
+
+    def test_batch_update_applies_partial_updates(self, db_client: TestClient, auth_headers):
+        a, b = self._create(db_client, auth_headers, "A", "B")
+
+        resp = db_client.patch(
+            "/pantry/batch",
+            json={"items": [
+                {"id": a, "quantity": 2, "unit": "kg"},
+                {"id": b, "name": "Bread"},
+                {"id": 999, "name": "Ghost"},
+            ]},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        results = resp.json()
+        assert [r["status"] for r in results] == ["updated", "updated", "not_found"]
+        assert results[0]["item"]["quantity"] == "2"
+        assert results[0]["item"]["name"] == "A"
+        assert results[1]["item"]["name"] == "Bread"
+        assert results[2]["item"] is None
+
+    def test_batch_does_not_touch_other_users_items(self, db_client: TestClient, auth_headers):
+        (mine,) = self._create(db_client, auth_headers, "Mine")
+        db_client.post(
+            "/auth/register",
+            json={"name": "Other", "phone_number": "5550002", "password": "password123"},
+        )
+        token = db_client.post(
+            "/auth/login", data={"username": "5550002", "password": "password123"}
+        ).json()["access_token"]
+        other = {"Authorization": f"Bearer {token}"}
+
+        resp = db_client.patch("/pantry/batch", json={"items": [{"id": mine, "name": "X"}]}, headers=other)
+        assert resp.json()[0]["status"] == "not_found"
+        resp = db_client.post("/pantry/batch/delete", json={"ids": [mine]}, headers=other)
+        assert resp.json()[0]["status"] == "not_found"
+
+        items = db_client.get("/pantry/", headers=auth_headers).json()
+        assert [i["name"] for i in items] == ["Mine"]
+
+    def test_batch_requires_ids(self, db_client: TestClient, auth_headers):
+        resp = db_client.post("/pantry/batch/delete", json={"ids": []}, headers=auth_headers)
+        assert resp.status_code == 422
+
+
+class TestRequestScopedSession:
+    def test_one_connection_per_authenticated_request(self, db_client: TestClient, auth_headers):
+        """鉴权和路由共用一个 session → 每个请求只 checkout 一次连接"""
+        db_client.post("/pantry/", json={"name": "Egg"}, headers=auth_headers)
+
+        before = db_client.pool_stats["checkouts"]
+        resp = db_client.get("/pantry/", headers=auth_headers)
+        assert resp.status_code == 200
+        assert db_client.pool_stats["checkouts"] - before == 1
+
+    def test_cached_principal_skips_user_query(self, db_client: TestClient, auth_headers):
+        import asyncio
+
+        from sqlalchemy import event
+
+        from backend.User.utils.auth_dependencies import get_current_user
+
+        token = auth_headers["Authorization"].split()[1]
+
+        async def authenticate():
+            async with db_client.session_factory() as db:
+                statements = []
+                listener = lambda *args: statements.append(args[2])  # noqa: E731
+                event.listen(db.bind.sync_engine, "before_cursor_execute", listener)
+                try:
+                    principal = await get_current_user(token=token, db=db)
+                    user = await principal.load_user(db)
+                finally:
+                    event.remove(db.bind.sync_engine, "before_cursor_execute", listener)
+                return principal, user, statements
+
+        principal, user, statements = asyncio.run(authenticate())
+        # 首次：按主键查 principal 三列，再按需加载完整 User
+        assert len(statements) == 2 and user.id == principal.id
+        principal, _, statements = asyncio.run(authenticate())
+        # 命中缓存：鉴权本身不发 SQL，只剩 load_user
+        assert len(statements) == 1
+
+
+class TestPantryBulkInsert:
+    def test_bulk_returns_ids_and_added_at_in_order(self, db_client: TestClient, auth_headers, monkeypatch):
+        from backend.User.crud import pantry_crud
+
+        monkeypatch.setattr(pantry_crud, "BULK_INSERT_CHUNK_SIZE", 2)
+        names = [f"item {i}" for i in range(5)]
+
+        before = db_client.pool_stats["checkouts"]
+        resp = db_client.post(
+            "/pantry/bulk", json={"items": [{"name": n} for n in names]}, headers=auth_headers
+        )
+        assert resp.status_code == 201
+        created = resp.json()
+        assert [i["name"] for i in created] == names
+        assert all(i["id"] and i["added_at"] for i in created)
+        assert len({i["id"] for i in created}) == 5
+        assert db_client.pool_stats["checkouts"] - before == 1
+
+        listed = db_client.get("/pantry/", headers=auth_headers).json()
+        assert sorted(i["id"] for i in listed) == sorted(i["id"] for i in created)
+
+
+class TestPantryPagination:
+    def _seed(self, db_client, auth_headers, items):
+        db_client.post("/pantry/bulk", json={"items": items}, headers=auth_headers)
+
+    def test_small_pantry_returns_everything_without_cursor(self, db_client: TestClient, auth_headers):
+        self._seed(db_client, auth_headers, [{"name": "A"}, {"name": "B"}])
+
+        resp = db_client.get("/pantry/", headers=auth_headers)
+        assert [i["name"] for i in resp.json()] == ["A", "B"]
+        assert "X-Next-Cursor" not in resp.headers
+
+    def test_cursor_walks_rows_with_identical_added_at(self, db_client: TestClient, auth_headers):
+        """一次 bulk 插入的行 added_at 相同，靠 id 决胜负，翻页不丢不重"""
+        names = [f"item {i}" for i in range(7)]
+        self._seed(db_client, auth_headers, [{"name": n} for n in names])
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            resp = db_client.get("/pantry/", params=params, headers=auth_headers)
+            assert resp.status_code == 200
+            seen.extend(i["name"] for i in resp.json())
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == names
+
+    def test_name_prefix_and_unit_filters(self, db_client: TestClient, auth_headers):
+        self._seed(db_client, auth_headers, [
+            {"name": "Tomato", "unit": "pcs"},
+            {"name": "Tofu", "unit": "g"},
+            {"name": "Rice", "unit": "g"},
+            {"name": "To_go", "unit": "g"},
+        ])
+
+        resp = db_client.get("/pantry/", params={"name_prefix": "To"}, headers=auth_headers)
+        assert [i["name"] for i in resp.json()] == ["Tomato", "Tofu", "To_go"]
+        resp = db_client.get("/pantry/", params={"name_prefix": "To", "unit": "g"}, headers=auth_headers)
+        assert [i["name"] for i in resp.json()] == ["Tofu", "To_go"]
+        # "_" 按字面匹配，不是 LIKE 通配符
+        resp = db_client.get("/pantry/", params={"name_prefix": "To_"}, headers=auth_headers)
+        assert [i["name"] for i in resp.json()] == ["To_go"]
+
+    def test_invalid_cursor_returns_400(self, db_client: TestClient, auth_headers):
+        resp = db_client.get("/pantry/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_limit_is_bounded(self, db_client: TestClient, auth_headers):
+        resp = db_client.get("/pantry/", params={"limit": 100000}, headers=auth_headers)
+        assert resp.status_code == 422
+
+
+class TestPantryIndex:
+    def test_init_db_adds_composite_index_to_existing_table(self, tmp_path):
+        from sqlalchemy import create_engine, inspect
+
+        from backend.init_db import ensure_indexes
+        from backend.User.database import Base
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_pantry_items_user_added_id")
+
+        assert ensure_indexes(engine) == ["ix_pantry_items_user_added_id"]
+        names = {ix["name"] for ix in inspect(engine).get_indexes("pantry_items")}
+        assert "ix_pantry_items_user_added_id" in names
+        assert ensure_indexes(engine) == []
+        engine.dispose()
+
+    def test_init_db_adds_missing_columns(self, tmp_path):
+        from sqlalchemy import create_engine, inspect
+
+        from backend.init_db import ensure_columns
+        from backend.User.database import Base
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_pantry_items_user_change_seq")
+            conn.exec_driver_sql("ALTER TABLE pantry_items DROP COLUMN change_seq")
+            conn.exec_driver_sql("ALTER TABLE pantry_items DROP COLUMN updated_at")
+
+        assert sorted(ensure_columns(engine)) == ["pantry_items.change_seq", "pantry_items.updated_at"]
+        columns = {col["name"] for col in inspect(engine).get_columns("pantry_items")}
+        assert {"change_seq", "updated_at"} <= columns
+        assert ensure_columns(engine) == []
+        engine.dispose()
+
+    def test_page_query_uses_composite_index(self, tmp_path):
+        from sqlalchemy import create_engine
+
+        from backend.User.crud import pantry_crud
+        from backend.User.database import Base
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'plan.db'}")
+        Base.metadata.create_all(engine)
+        stmt = pantry_crud._page_items_stmt(1, 50)
+        sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+        with engine.connect() as conn:
+            plan = " ".join(str(row[-1]) for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+        assert "ix_pantry_items_user_added_id" in plan
+        assert "TEMP B-TREE" not in plan
+        engine.dispose()
+
+
+class TestPantryVersionUpsert:
+    def test_version_bump_is_a_dialect_upsert(self):
+        from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+        from backend.User.crud import pantry_crud
+
+        compiled = {
+            name: str(pantry_crud._upsert_version_stmt(name, 1).compile(dialect=dialect))
+            for name, dialect in (
+                ("sqlite", sqlite.dialect()),
+                ("postgresql", postgresql.dialect()),
+                ("mysql", mysql.dialect()),
+            )
+        }
+        assert "ON CONFLICT (user_id) DO UPDATE" in compiled["sqlite"]
+        assert "ON CONFLICT (user_id) DO UPDATE" in compiled["postgresql"]
+        assert "ON DUPLICATE KEY UPDATE" in compiled["mysql"]
+        assert pantry_crud._upsert_version_stmt("oracle", 1) is None
+
+    def test_first_write_is_a_single_upsert(self, db_client: TestClient, auth_headers):
+        from sqlalchemy import event
+
+        engine = db_client.session_factory.kw["bind"].sync_engine
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if "pantry_versions" in statement and not statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            db_client.post("/pantry/", json={"name": "Egg"}, headers=auth_headers)
+            db_client.post("/pantry/", json={"name": "Milk"}, headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        # 首次写入和之后的写入都是同一条 upsert，没有"UPDATE 0 行再 INSERT"的窗口
+        assert len(statements) == 2
+        assert all("ON CONFLICT" in statement for statement in statements)
+
+    def test_concurrent_first_writes_get_distinct_versions(self, db_client: TestClient, auth_headers):
+        # SQLite 本身串行化写事务，这里验证的是结果；主键冲突的竞态只会在 MySQL / PostgreSQL 上出现
+        import asyncio
+
+        from backend.User.crud import pantry_crud
+
+        user_id = db_client.get("/auth/me", headers=auth_headers).json()["id"]
+
+        async def write(n):
+            async with db_client.session_factory() as db:
+                return (await pantry_crud.create_item_async(db, user_id=user_id, name=f"item {n}")).change_seq
+
+        async def race():
+            seqs = await asyncio.gather(*(write(n) for n in range(8)))
+            async with db_client.session_factory() as db:
+                return seqs, await pantry_crud.get_version_async(db, user_id)
+
+        seqs, version = asyncio.run(race())
+        assert sorted(seqs) == list(range(1, 9))
+        assert version == 8
+
+
+class TestPantryChanges:
+    def _changes(self, db_client, auth_headers, since=None):
+        params = {"since": since} if since is not None else {}
+        resp = db_client.get("/pantry/changes", params=params, headers=auth_headers)
+        assert resp.status_code == 200
+        return resp.json()
+
+    def test_initial_sync_returns_everything(self, db_client: TestClient, auth_headers):
+        db_client.post("/pantry/bulk", json={"items": [{"name": "A"}, {"name": "B"}]}, headers=auth_headers)
+
+        body = self._changes(db_client, auth_headers)
+        assert body["reset"] is True
+        assert [i["name"] for i in body["items"]] == ["A", "B"]
+        assert body["cursor"] == "1"
+
+    def test_delta_contains_only_changes(self, db_client: TestClient, auth_headers):
+        ids = [i["id"] for i in db_client.post(
+            "/pantry/bulk", json={"items": [{"name": n} for n in "ABCD"]}, headers=auth_headers
+        ).json()]
+        cursor = self._changes(db_client, auth_headers)["cursor"]
+
+        # 没有变化的轮询：空结果，游标不变
+        body = self._changes(db_client, auth_headers, cursor)
+        assert body == {"cursor": cursor, "reset": False, "items": [], "deleted": [], "next_page": None}
+
+        db_client.put(f"/pantry/{ids[0]}", json={"quantity": 2}, headers=auth_headers)
+        db_client.delete(f"/pantry/{ids[1]}", headers=auth_headers)
+        db_client.post("/pantry/batch/delete", json={"ids": [ids[2]]}, headers=auth_headers)
+        new = db_client.post("/pantry/", json={"name": "E"}, headers=auth_headers).json()
+
+        body = self._changes(db_client, auth_headers, cursor)
+        assert body["reset"] is False
+        assert [i["name"] for i in body["items"]] == ["A", "E"]
+        assert body["items"][0]["quantity"] == "2"
+        assert body["items"][0]["updated_at"]
+        assert sorted(body["deleted"]) == sorted(ids[1:3])
+        assert new["id"] not in body["deleted"]
+
+        cursor = body["cursor"]
+        db_client.delete("/pantry/", headers=auth_headers)
+        body = self._changes(db_client, auth_headers, cursor)
+        assert body["items"] == []
+        assert sorted(body["deleted"]) == sorted([ids[0], ids[3], new["id"]])
+
+    def test_compacted_cursor_forces_reset(self, db_client: TestClient, auth_headers):
+        import asyncio
+        from datetime import timedelta
+
+        from backend.User.crud import pantry_crud
+
+        ids = [i["id"] for i in db_client.post(
+            "/pantry/bulk", json={"items": [{"name": "A"}, {"name": "B"}]}, headers=auth_headers
+        ).json()]
+        stale = self._changes(db_client, auth_headers)["cursor"]
+        db_client.delete(f"/pantry/{ids[0]}", headers=auth_headers)
+        fresh = self._changes(db_client, auth_headers, stale)["cursor"]
+
+        async def compact():
+            async with db_client.session_factory() as db:
+                # 负的保留时长 → 截止时间在未来，所有 tombstone 都算过期
+                return await pantry_crud.compact_tombstones_async(db, timedelta(minutes=-1))
+
+        assert asyncio.run(compact()) == 1
+
+        body = self._changes(db_client, auth_headers, stale)
+        assert body["reset"] is True
+        assert [i["name"] for i in body["items"]] == ["B"]
+        # 已经同步过删除的客户端不受影响
+        assert self._changes(db_client, auth_headers, fresh)["reset"] is False
+
+    def test_invalid_since_returns_400(self, db_client: TestClient, auth_headers):
+        resp = db_client.get("/pantry/changes", params={"since": "abc"}, headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_future_cursor_forces_reset(self, db_client: TestClient, auth_headers):
+        assert self._changes(db_client, auth_headers, "99")["reset"] is True
+
+    def test_reset_snapshot_is_paged(self, db_client: TestClient, auth_headers):
+        ids = [i["id"] for i in db_client.post(
+            "/pantry/bulk", json={"items": [{"name": n} for n in "ABCDE"]}, headers=auth_headers
+        ).json()]
+
+        resp = db_client.get("/pantry/changes", params={"limit": 2}, headers=auth_headers)
+        body = resp.json()
+        assert body["reset"] is True
+        assert [i["name"] for i in body["items"]] == ["A", "B"]
+        cursor = body["cursor"]
+        names = [i["name"] for i in body["items"]]
+
+        # 翻页期间的写入：不影响后续页的 cursor，出现在下一次增量里
+        db_client.put(f"/pantry/{ids[0]}", json={"quantity": 3}, headers=auth_headers)
+        db_client.delete(f"/pantry/{ids[3]}", headers=auth_headers)
+
+        while body["next_page"]:
+            body = db_client.get(
+                "/pantry/changes", params={"limit": 2, "page": body["next_page"]}, headers=auth_headers
+            ).json()
+            assert body["reset"] is True
+            assert body["cursor"] == cursor
+            assert len(body["items"]) <= 2
+            names += [i["name"] for i in body["items"]]
+        assert names == ["A", "B", "C", "E"]
+
+        body = self._changes(db_client, auth_headers, cursor)
+        assert body["reset"] is False
+        assert [i["name"] for i in body["items"]] == ["A"]
+        assert body["deleted"] == [ids[3]]
+
+    def test_small_pantry_snapshot_has_no_next_page(self, db_client: TestClient, auth_headers):
+        db_client.post("/pantry/", json={"name": "A"}, headers=auth_headers)
+        assert self._changes(db_client, auth_headers)["next_page"] is None
+
+    def test_invalid_page_returns_400(self, db_client: TestClient, auth_headers):
+        for page in ("abc", "1.!!", "x.abc"):
+            resp = db_client.get("/pantry/changes", params={"page": page}, headers=auth_headers)
+            assert resp.status_code == 400
+
+
+class TestPantryQuantities:
+    def _seed(self, db_client, auth_headers):
+        db_client.post("/pantry/bulk", json={"items": [
+            {"name": "Flour", "quantity": "1.5", "unit": "kg"},
+            {"name": "flour", "quantity": 250, "unit": "g"},
+            {"name": "Milk", "quantity": "1/2", "unit": "l"},
+            {"name": "Eggs", "quantity": 2, "unit": "pcs"},
+            {"name": "Salt", "quantity": "a pinch"},
+        ]}, headers=auth_headers)
+
+    def test_totals_are_summed_in_canonical_units(self, db_client: TestClient, auth_headers):
+        self._seed(db_client, auth_headers)
+
+        resp = db_client.get("/pantry/totals", headers=auth_headers)
+        assert resp.status_code == 200
+        totals = {(t["name"], t["unit"]): (t["total"], t["items"]) for t in resp.json()}
+        assert totals == {
+            ("eggs", "pcs"): (2.0, 1),
+            ("flour", "g"): (1750.0, 2),
+            ("milk", "ml"): (500.0, 1),
+        }
+
+        resp = db_client.get("/pantry/totals", params={"name_prefix": "Fl"}, headers=auth_headers)
+        assert [t["name"] for t in resp.json()] == ["flour"]
+
+    def test_low_stock_converts_threshold_unit(self, db_client: TestClient, auth_headers):
+        self._seed(db_client, auth_headers)
+
+        resp = db_client.get("/pantry/low-stock", params={"threshold": 1, "unit": "l"}, headers=auth_headers)
+        assert [i["name"] for i in resp.json()] == ["Milk"]
+        resp = db_client.get("/pantry/low-stock", params={"threshold": 2}, headers=auth_headers)
+        assert [i["name"] for i in resp.json()] == ["Eggs"]
+        # 原始字符串保持不变，供展示
+        assert resp.json()[0]["quantity"] == "2"
+
+    def test_batch_update_keeps_parsed_columns_in_sync(self, db_client: TestClient, auth_headers):
+        self._seed(db_client, auth_headers)
+        eggs = db_client.get("/pantry/", params={"name_prefix": "Eggs"}, headers=auth_headers).json()[0]
+
+        db_client.patch("/pantry/batch", json={"items": [{"id": eggs["id"], "quantity": 12}]}, headers=auth_headers)
+        resp = db_client.get("/pantry/low-stock", params={"threshold": 2}, headers=auth_headers)
+        assert resp.json() == []
+
+    def test_backfill_fills_existing_rows(self, tmp_path):
+        from sqlalchemy import create_engine, select
+        from sqlalchemy.orm import Session
+
+        from backend.User.crud import pantry_crud
+        from backend.User.database import Base
+        from backend.User.models.pantry_item import PantryItem
+        from backend.User.models.user import User
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), {"id": 1, "name": "u", "phone_number": "1", "hashed_password": "x"})
+            # 模拟解析列上线前的数据：直接写表，不经过 CRUD
+            conn.execute(PantryItem.__table__.insert(), [
+                {"user_id": 1, "name": "Rice", "quantity": "2", "unit": "kg"},
+                {"user_id": 1, "name": "Salt", "quantity": "some", "unit": None},
+                {"user_id": 1, "name": "Bread", "quantity": None, "unit": None},
+            ])
+
+        with Session(engine) as db:
+            assert pantry_crud.backfill_amounts(db, batch_size=1) == 2
+            rows = db.execute(
+                select(PantryItem.name, PantryItem.quantity_value, PantryItem.unit_canonical, PantryItem.updated_at)
+                .order_by(PantryItem.id)
+            ).all()
+        assert [tuple(r[:3]) for r in rows] == [
+            ("Rice", 2000.0, "g"), ("Salt", None, None), ("Bread", None, None),
+        ]
+        engine.dispose()
+
+
+class TestIngredientCatalog:
+    """食材目录：写入时按别名索引解析 ingredient_id。"""
+
+    def _session(self, tmp_path):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+
+        # db_client 用的是同一个 tmp_path 下的 test.db
+        return Session(create_engine(f"sqlite:///{tmp_path / 'test.db'}"))
+
+    def _ingredient_ids(self, db):
+        from sqlalchemy import select
+
+        from backend.User.models.pantry_item import PantryItem
+
+        db.expire_all()
+        return dict(db.execute(select(PantryItem.name, PantryItem.ingredient_id)).all())
+
+    def test_seed_catalog_is_idempotent(self, db_client: TestClient, tmp_path):
+        from backend.User.crud import ingredient_crud
+
+        with self._session(tmp_path) as db:
+            added = ingredient_crud.seed_catalog(db)
+            assert added == len(ingredient_crud.SEED_CATALOG)
+            assert ingredient_crud.seed_catalog(db) == 0
+            assert ingredient_crud.reload_index(db) > added
+
+    def test_writes_resolve_ingredient_id(self, db_client: TestClient, auth_headers, tmp_path):
+        from backend.User.crud import ingredient_crud
+        from backend.User.utils.ingredients import INGREDIENT_INDEX
+
+        with self._session(tmp_path) as db:
+            ingredient_crud.seed_catalog(db)
+            ingredient_crud.reload_index(db)
+            egg = INGREDIENT_INDEX.resolve("egg")
+
+            db_client.post("/pantry/", json={"name": "Large Eggs"}, headers=auth_headers)
+            db_client.post("/pantry/bulk", json={"items": [{"name": "鸡蛋"}, {"name": "Dragonfruit"}]}, headers=auth_headers)
+            ids = self._ingredient_ids(db)
+            assert ids == {"Large Eggs": egg, "鸡蛋": egg, "Dragonfruit": None}
+
+            items = {i["name"]: i["id"] for i in db_client.get("/pantry/", headers=auth_headers).json()}
+            db_client.put(f"/pantry/{items['Dragonfruit']}", json={"name": "Whole milk"}, headers=auth_headers)
+            db_client.patch("/pantry/batch", json={"items": [{"id": items["鸡蛋"], "name": "Tofu"}]}, headers=auth_headers)
+            ids = self._ingredient_ids(db)
+            assert ids["Whole milk"] == INGREDIENT_INDEX.resolve("milk")
+            assert ids["Tofu"] == INGREDIENT_INDEX.resolve("tofu")
+
+    def test_backfill_links_existing_rows(self, db_client: TestClient, auth_headers, tmp_path):
+        from backend.User.crud import ingredient_crud, pantry_crud
+        from backend.User.utils.ingredients import INGREDIENT_INDEX
+
+        # 索引为空时写入：ingredient_id 为 NULL
+        db_client.post("/pantry/bulk", json={"items": [{"name": "Onions"}, {"name": "Stardust"}]}, headers=auth_headers)
+        with self._session(tmp_path) as db:
+            ingredient_crud.seed_catalog(db)
+            ingredient_crud.reload_index(db)
+            assert pantry_crud.backfill_ingredient_ids(db, batch_size=1) == 1
+            assert self._ingredient_ids(db) == {"Onions": INGREDIENT_INDEX.resolve("onion"), "Stardust": None}
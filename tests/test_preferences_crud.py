@@ -10,7 +10,9 @@ from backend.User.models.preferences import UserPreference
 class TestPreferencesCrud:
     @pytest.fixture
     def mock_db(self):
-        return MagicMock(spec=Session)
+        db = MagicMock(spec=Session)
+        db.info = {}
+        return db
 
     def test_get_preferences(self, mock_db):
         pref = UserPreference(id=1, user_id=1, diets=["vegan"], allergens=["nuts"])
@@ -65,3 +67,87 @@ class TestPreferencesCrud:
         mock_db.delete.assert_not_called()
         mock_db.commit.assert_not_called()
 
+    def test_get_snapshot_reads_through_cache(self, mock_db):
+        mock_db.execute.return_value.first.return_value = (3, ["vegan"], None, 30, "easy")
+
+        first = preferences_crud.get_snapshot(mock_db, user_id=1)
+        second = preferences_crud.get_snapshot(mock_db, user_id=1)
+
+        assert first == preferences_crud.PreferencesSnapshot(3, ["vegan"], [], 30, "easy")
+        assert second is first
+        mock_db.execute.assert_called_once()
+        mock_db.commit.assert_not_called()
+
+    def test_get_snapshot_from_replica_is_not_cached(self, mock_db):
+        mock_db.info["replica"] = True
+        mock_db.execute.return_value.first.return_value = (3, ["vegan"], None, 30, "easy")
+
+        preferences_crud.get_snapshot(mock_db, user_id=1)
+        preferences_crud.get_snapshot(mock_db, user_id=1)
+
+        assert preferences_crud.PREFERENCES_CACHE.get(1) is None
+        assert mock_db.execute.call_count == 2
+
+    def test_snapshot_read_racing_a_write_is_not_cached(self, mock_db):
+        def read_then_writer_commits(stmt):
+            # 读到旧行之后、写回缓存之前，另一个请求提交并失效
+            preferences_crud.PREFERENCES_CACHE.pop(1)
+            return MagicMock(first=MagicMock(return_value=(3, ["vegan"], None, 30, "easy")))
+
+        mock_db.execute.side_effect = read_then_writer_commits
+        preferences_crud.get_snapshot(mock_db, user_id=1)
+
+        assert preferences_crud.PREFERENCES_CACHE.get(1) is None
+
+    def test_upsert_invalidates_snapshot(self, mock_db):
+        preferences_crud.PREFERENCES_CACHE.set(1, preferences_crud.PreferencesSnapshot(0, [], [], None, None))
+        mock_db.scalar.return_value = UserPreference(id=1, user_id=1)
+
+        preferences_crud.upsert_preferences(mock_db, user_id=1, diets=["vegan"])
+
+        assert preferences_crud.PREFERENCES_CACHE.get(1) is None
+
+
+class TestPreferencesUpsert:
+    """原生单语句 upsert（真实 SQLite + 各方言编译结果）。"""
+
+    @pytest.fixture
+    def db(self, tmp_path):
+        from sqlalchemy import create_engine
+
+        from backend.User.database import Base
+        from backend.User.models.user import User
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'prefs.db'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), {"id": 1, "name": "u", "phone_number": "1", "hashed_password": "x"})
+        with Session(engine) as session:
+            yield session
+        engine.dispose()
+
+    def test_insert_then_partial_update(self, db):
+        from sqlalchemy import event
+
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        prefs = preferences_crud.upsert_preferences(db, user_id=1, diets=["vegan"])
+        # upsert ... RETURNING + 版本号 +1，没有前置 SELECT / 事后 refresh
+        assert len(statements) == 2
+        assert "ON CONFLICT" in statements[0] and "RETURNING" in statements[0]
+        assert prefs.diets == ["vegan"] and prefs.allergens == []
+
+        prefs = preferences_crud.upsert_preferences(db, user_id=1, difficulty="easy")
+        assert (prefs.diets, prefs.difficulty) == (["vegan"], "easy")
+        assert db.query(UserPreference).count() == 1
+        assert preferences_crud.get_snapshot(db, user_id=1).version == 2
+
+    def test_mysql_and_postgresql_statements(self):
+        from sqlalchemy.dialects import mysql, postgresql
+
+        mysql_sql = str(preferences_crud._upsert_stmt("mysql", 1, {"diets": ["x"]}).compile(dialect=mysql.dialect()))
+        assert "ON DUPLICATE KEY UPDATE" in mysql_sql and "allergens =" not in mysql_sql
+        pg_sql = str(preferences_crud._upsert_stmt("postgresql", 1, {"diets": ["x"]}).compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (user_id) DO UPDATE" in pg_sql
+        assert preferences_crud._upsert_stmt("oracle", 1, {}) is None
@@ -0,0 +1,56 @@
+# tests/test_preferences_router.py
+from fastapi.testclient import TestClient
+
+
+class TestPreferencesRouter:
+    def test_get_defaults(self, db_client: TestClient, auth_headers):
+        resp = db_client.get("/preferences/", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "diets": [],
+            "allergens": [],
+            "max_cooking_time": None,
+            "difficulty": None,
+        }
+
+    def test_update_then_get(self, db_client: TestClient, auth_headers):
+        resp = db_client.put(
+            "/preferences/",
+            json={"diets": ["vegan"], "difficulty": "easy"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["diets"] == ["vegan"]
+
+        resp = db_client.get("/preferences/", headers=auth_headers)
+        assert resp.json()["difficulty"] == "easy"
+
+    def test_delete_resets_to_defaults(self, db_client: TestClient, auth_headers):
+        db_client.put("/preferences/", json={"allergens": ["nuts"]}, headers=auth_headers)
+        resp = db_client.delete("/preferences/", headers=auth_headers)
+        assert resp.status_code == 204
+        assert db_client.get("/preferences/", headers=auth_headers).json()["allergens"] == []
+
+    def test_get_miss_does_not_write(self, db_client: TestClient, auth_headers):
+        from backend.User.crud import preferences_crud
+
+        etag = db_client.get("/preferences/", headers=auth_headers).headers["ETag"]
+        preferences_crud.PREFERENCES_CACHE.clear()
+        # 未命中也只读：版本号不变，ETag 仍然有效
+        resp = db_client.get("/preferences/", headers={**auth_headers, "If-None-Match": etag})
+        assert resp.status_code == 304
+
+    def test_cache_hit_and_write_invalidation(self, db_client: TestClient, auth_headers, metrics_headers):
+        def counters():
+            stats = db_client.get("/metrics/", headers=metrics_headers).json()["caches"]["preferences"]
+            return stats["hits"], stats["misses"]
+
+        hits, misses = counters()
+        db_client.get("/preferences/", headers=auth_headers)
+        db_client.get("/preferences/", headers=auth_headers)
+        assert counters() == (hits + 1, misses + 1)
+
+        db_client.put("/preferences/", json={"diets": ["vegan"]}, headers=auth_headers)
+        assert db_client.get("/preferences/", headers=auth_headers).json()["diets"] == ["vegan"]
+        db_client.delete("/preferences/", headers=auth_headers)
+        assert db_client.get("/preferences/", headers=auth_headers).json()["diets"] == []
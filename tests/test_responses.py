@@ -0,0 +1,40 @@
+# tests/test_responses.py
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.testclient import TestClient
+
+from backend.routers import generate_rec_router, metrics_router, scan_router, shopping_list_router
+from backend.User.routers import pantry_router, preferences_router, user_router
+
+ROUTERS = (
+    generate_rec_router,
+    metrics_router,
+    scan_router,
+    shopping_list_router,
+    pantry_router,
+    preferences_router,
+    user_router,
+)
+
+
+class TestResponseSerialization:
+    def test_json_routes_use_response_model_fast_path(self):
+        """
+        返回 JSON 的路由都要有 response model（显式 response_model 或 -> dict 这类返回值标注），
+        并使用默认响应类：FastAPI 只有在这种情况下才直接用 Pydantic dump_json 输出字节，
+        否则先 jsonable_encoder 递归转换一遍。
+        """
+        for module in ROUTERS:
+            for route in module.router.routes:
+                if route.status_code == 204:
+                    continue
+                assert route.response_model is not None, route.path
+                assert isinstance(route.response_class, DefaultPlaceholder), route.path
+
+    def test_shopping_list_plan_response(self, client: TestClient):
+        resp = client.post(
+            "/shopping-list/plan",
+            json={"recipes": [{"ingredients": ["2 eggs"]}], "pantry_ingredients": []},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/json"
+        assert resp.json()["to_buy"]
@@ -33,7 +33,7 @@ class TestGenerateRecipeRouterExtra:
                 }
         
         monkeypatch.setattr(
-            generate_rec_router.requests, "post", lambda *a, **k: DummyResponse()
+            generate_rec_router.VERTEX, "post", lambda *a, **k: DummyResponse()
         )
         
         payload = {"ingredients": ["rice"]}
@@ -59,7 +59,7 @@ class TestGenerateRecipeRouterExtra:
                 return {"error": "Internal server error"}
         
         monkeypatch.setattr(
-            generate_rec_router.requests, "post", lambda *a, **k: ErrorResponse()
+            generate_rec_router.VERTEX, "post", lambda *a, **k: ErrorResponse()
         )
         
         payload = {"ingredients": ["chicken", "rice"]}
@@ -104,7 +104,7 @@ class TestScanRouterExtra:
                     "candidates": [{"content": {"parts": [{"text": ingredients_json}]}}]
                 }
         
-        monkeypatch.setattr(scan_router.requests, "post", lambda *a, **k: DummyResponse())
+        monkeypatch.setattr(scan_router.VERTEX, "post", lambda *a, **k: DummyResponse())
         
         # PNG file
         files = {"file": ("test.png", b"\x89PNG\r\n\x1a\n" + b"fake", "image/png")}
@@ -146,7 +146,7 @@ class TestScanRouterExtra:
                     "candidates": [{"content": {"parts": [{"text": ingredients_json}]}}]
                 }
         
-        monkeypatch.setattr(scan_router.requests, "post", lambda *a, **k: DummyResponse())
+        monkeypatch.setattr(scan_router.VERTEX, "post", lambda *a, **k: DummyResponse())
         
         files = {"file": ("fridge.jpg", b"fake-image-data", "image/jpeg")}
         resp = client.post("/scan/ingredients", files=files)
@@ -182,7 +182,7 @@ class TestShoppingListRouterExtra:
                 }
         
         monkeypatch.setattr(
-            shopping_list_router.requests, "post", lambda *a, **k: DummyResponse()
+            shopping_list_router.VERTEX, "post", lambda *a, **k: DummyResponse()
         )
         
         payload = {
@@ -218,7 +218,7 @@ class TestShoppingListRouterExtra:
                 }
         
         monkeypatch.setattr(
-            shopping_list_router.requests, "post", lambda *a, **k: DummyResponse()
+            shopping_list_router.VERTEX, "post", lambda *a, **k: DummyResponse()
         )
         
         payload = {
@@ -268,7 +268,7 @@ class TestShoppingListRouterExtra:
                 }
         
         monkeypatch.setattr(
-            shopping_list_router.requests, "post", lambda *a, **k: DummyResponse()
+            shopping_list_router.VERTEX, "post", lambda *a, **k: DummyResponse()
         )
         
         payload = {
@@ -316,7 +316,7 @@ class TestScanRouterErrors:
             def json(self):
                 return {"error": "failed"}
         
-        monkeypatch.setattr(scan_router.requests, "post", lambda *a, **k: ErrorResponse())
+        monkeypatch.setattr(scan_router.VERTEX, "post", lambda *a, **k: ErrorResponse())
         
         files = {"file": ("test.jpg", b"fake-image", "image/jpeg")}
         resp = client.post("/scan/ingredients", files=files)
@@ -353,7 +353,7 @@ class TestGenerateRecipeWithPreferences:
                 }
         
         monkeypatch.setattr(
-            generate_rec_router.requests, "post", lambda *a, **k: DummyResponse()
+            generate_rec_router.VERTEX, "post", lambda *a, **k: DummyResponse()
         )
         
         payload = {
@@ -390,7 +390,7 @@ class TestGenerateRecipeWithPreferences:
                 }
         
         monkeypatch.setattr(
-            generate_rec_router.requests, "post", lambda *a, **k: DummyResponse()
+            generate_rec_router.VERTEX, "post", lambda *a, **k: DummyResponse()
         )
         
         payload = {
@@ -422,7 +422,7 @@ class TestShoppingListAdditional:
                 return {"error": "failed"}
         
         monkeypatch.setattr(
-            shopping_list_router.requests, "post", lambda *a, **k: ErrorResponse()
+            shopping_list_router.VERTEX, "post", lambda *a, **k: ErrorResponse()
         )
         
         payload = {
@@ -457,7 +457,7 @@ class TestShoppingListAdditional:
                 }
         
         monkeypatch.setattr(
-            shopping_list_router.requests, "post", lambda *a, **k: DummyResponse()
+            shopping_list_router.VERTEX, "post", lambda *a, **k: DummyResponse()
         )
         
         payload = {
@@ -513,7 +513,7 @@ class TestScanAdditional:
                     "candidates": [{"content": {"parts": [{"text": ingredients_json}]}}]
                 }
         
-        monkeypatch.setattr(scan_router.requests, "post", lambda *a, **k: DummyResponse())
+        monkeypatch.setattr(scan_router.VERTEX, "post", lambda *a, **k: DummyResponse())
         
         # JPEG file with fake data
         files = {"file": ("veggies.jpg", b"\xff\xd8\xff\xe0" + b"fake-jpeg-data", "image/jpeg")}
@@ -78,7 +78,7 @@ def test_scan_ingredients_success(client: TestClient, monkeypatch: pytest.Monkey
         def json(self):
             return _fake_vertex_scan_response()
 
-    monkeypatch.setattr(scan_router.requests, "post", lambda *a, **k: DummyResponse())
+    monkeypatch.setattr(scan_router.VERTEX, "post", lambda *a, **k: DummyResponse())
 
     # 3. 发送一个带文件的请求
     files = {
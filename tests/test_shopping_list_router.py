@@ -81,7 +81,7 @@ def test_generate_shopping_list_success(client: TestClient, monkeypatch: pytest.
     def fake_post(url, headers=None, json=None, timeout=None):
         return DummyResponse(status_code=200)
 
-    monkeypatch.setattr(shopping_list_router.requests, "post", fake_post)
+    monkeypatch.setattr(shopping_list_router.VERTEX, "post", fake_post)
 
     # 3. 发送一个正常的请求
     payload = {
@@ -113,3 +113,280 @@ def test_generate_shopping_list_success(client: TestClient, monkeypatch: pytest.
     # 调试字段也顺便看一下
     assert "shopping_list_raw" in data
     assert "raw_vertex" in data
+
+
+def test_generate_shopping_list_uses_server_pantry(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """
+    带 token 且省略 pantry_ingredients 时，由服务端从数据库读取 pantry。
+    """
+    from backend.routers import shopping_list_router
+
+    monkeypatch.setattr(shopping_list_router, "_get_vertex_access_token", lambda: "fake-token")
+
+    class DummyUser:
+        id = 7
+
+    async def fake_get_current_user(token, db):
+        return DummyUser()
+
+    async def fake_get_version(db, user_id):
+        return 1
+
+    monkeypatch.setattr(shopping_list_router, "get_current_user", fake_get_current_user)
+    monkeypatch.setattr(shopping_list_router.pantry_crud, "get_version_async", fake_get_version)
+
+    loaded = []
+
+    async def fake_list_ingredient_dicts(db, user_id):
+        loaded.append(user_id)
+        return [{"name": "egg", "quantity": "2", "unit": "pcs", "notes": None}]
+
+    monkeypatch.setattr(
+        shopping_list_router.pantry_crud, "list_ingredient_dicts_async", fake_list_ingredient_dicts
+    )
+
+    sent = {}
+
+    class DummyResponse:
+        status_code = 200
+
+        def json(self):
+            return _fake_vertex_response_json()
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        sent["payload"] = json
+        return DummyResponse()
+
+    monkeypatch.setattr(shopping_list_router.VERTEX, "post", fake_post)
+
+    resp = client.post(
+        "/shopping-list/generate",
+        json={"recipe_ingredients": [{"name": "large egg", "quantity": 3, "unit": "pcs"}]},
+        headers={"Authorization": "Bearer some-token"},
+    )
+    assert resp.status_code == 200
+    assert loaded == [7]
+    pantry_part = sent["payload"]["contents"][0]["parts"][1]["text"]
+    assert '"egg"' in pantry_part
+
+
+def test_generate_shopping_list_without_pantry_requires_token(client: TestClient):
+    """
+    未登录且省略 pantry_ingredients 时仍返回 400。
+    """
+    resp = client.post(
+        "/shopping-list/generate",
+        json={"recipe_ingredients": [{"name": "egg"}]},
+    )
+    assert resp.status_code == 400
+
+
+def test_generate_shopping_list_cached_until_pantry_changes(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, metrics_headers
+):
+    """
+    同一 recipe + 同一 pantry version 只调用一次 Vertex；pantry version 变化后重新生成。
+    """
+    from backend.routers import shopping_list_router
+
+    monkeypatch.setattr(shopping_list_router, "_get_vertex_access_token", lambda: "fake-token")
+
+    class DummyUser:
+        id = 7
+
+    version = {"value": 3}
+
+    async def fake_get_current_user(token, db):
+        return DummyUser()
+
+    async def fake_list_ingredient_dicts(db, user_id):
+        return []
+
+    async def fake_get_version(db, user_id):
+        return version["value"]
+
+    monkeypatch.setattr(shopping_list_router, "get_current_user", fake_get_current_user)
+    monkeypatch.setattr(
+        shopping_list_router.pantry_crud, "list_ingredient_dicts_async", fake_list_ingredient_dicts
+    )
+    monkeypatch.setattr(shopping_list_router.pantry_crud, "get_version_async", fake_get_version)
+
+    calls = []
+
+    class DummyResponse:
+        status_code = 200
+
+        def json(self):
+            return _fake_vertex_response_json()
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        calls.append(url)
+        return DummyResponse()
+
+    monkeypatch.setattr(shopping_list_router.VERTEX, "post", fake_post)
+
+    headers = {"Authorization": "Bearer some-token"}
+    first = client.post(
+        "/shopping-list/generate",
+        json={"recipe_ingredients": [{"name": "Large Egg", "quantity": 3}]},
+        headers=headers,
+    )
+    # 大小写 / 空白不同但归一化后相同 → 命中缓存
+    second = client.post(
+        "/shopping-list/generate",
+        json={"recipe_ingredients": [{"name": " large egg", "quantity": 3}]},
+        headers=headers,
+    )
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(calls) == 1
+
+    version["value"] = 4  # 任何 pantry 写入都会让 version + 1
+    client.post(
+        "/shopping-list/generate",
+        json={"recipe_ingredients": [{"name": "Large Egg", "quantity": 3}]},
+        headers=headers,
+    )
+    assert len(calls) == 2
+
+    stats = client.get("/metrics/", headers=metrics_headers).json()["caches"]["shopping_list"]
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 2
+
+
+def test_plan_merges_recipes_without_model_call(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """
+    多个菜谱的同名食材合并；pantry 里能精确匹配的在本地相减，全部本地解决时不调用 Vertex。
+    """
+    from backend.routers import shopping_list_router
+
+    def fail_post(*args, **kwargs):
+        raise AssertionError("Vertex should not be called")
+
+    monkeypatch.setattr(shopping_list_router.VERTEX, "post", fail_post)
+
+    payload = {
+        "recipes": [
+            {"title": "Omelette", "ingredients": [
+                {"name": "Eggs", "quantity": 3, "unit": "pcs"},
+                {"name": "onion", "amount": 1, "unit": "pcs"},
+            ]},
+            {"title": "Soup", "ingredients": [
+                {"name": "onion", "quantity": "2", "unit": "pieces"},
+                {"name": "milk", "quantity": 0.5, "unit": "l"},
+            ]},
+        ],
+        "pantry_ingredients": [
+            {"name": "egg", "quantity": "6", "unit": "pcs"},
+            {"name": "Milk", "quantity": 200, "unit": "ml"},
+        ],
+    }
+
+    resp = client.post("/shopping-list/plan", json=payload)
+    assert resp.status_code == 200
+    to_buy = {item["name"]: item for item in resp.json()["to_buy"]}
+
+    assert "Eggs" not in to_buy  # pantry 里 6 个，足够
+    assert to_buy["milk"]["quantity"] == 300
+    assert to_buy["milk"]["unit"] == "ml"
+    assert to_buy["onion"]["quantity"] == 3
+    assert to_buy["onion"]["matched_recipe"] == ["onion"]
+
+
+def test_plan_matches_pantry_through_ingredient_aliases(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """
+    食材目录加载后，'large egg' / '鸡蛋' 与 pantry 里的 'Eggs' 按 ingredient_id 匹配。
+    """
+    from backend.routers import shopping_list_router
+    from backend.User.utils.ingredients import INGREDIENT_INDEX
+
+    def fail_post(*args, **kwargs):
+        raise AssertionError("Vertex should not be called")
+
+    monkeypatch.setattr(shopping_list_router.VERTEX, "post", fail_post)
+    INGREDIENT_INDEX.load([("egg", 1), ("鸡蛋", 1)])
+
+    payload = {
+        "recipes": [
+            {"title": "Cake", "ingredients": [{"name": "large egg", "quantity": 2, "unit": "pcs"}]},
+            {"title": "蒸蛋", "ingredients": [{"name": "鸡蛋", "quantity": 3, "unit": "pcs"}]},
+        ],
+        "pantry_ingredients": [{"name": "Eggs", "quantity": 4, "unit": "pcs"}],
+    }
+
+    resp = client.post("/shopping-list/plan", json=payload)
+    assert resp.status_code == 200
+    to_buy = resp.json()["to_buy"]
+    assert len(to_buy) == 1
+    assert to_buy[0]["quantity"] == 1
+    assert to_buy[0]["matched_recipe"] == ["large egg", "鸡蛋"]
+
+
+def test_plan_does_not_match_compound_pantry_names(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """
+    pantry 里的 peanut butter / coconut milk 不能当作菜谱要的 butter / milk。
+    """
+    from backend.routers import shopping_list_router
+    from backend.User.utils.ingredients import INGREDIENT_INDEX
+
+    sent = []
+
+    def fake_generate(project_id, location, pantry, recipe_ingredients):
+        sent.append(recipe_ingredients)
+        return {"to_buy": [], "shopping_list_raw": "", "raw_vertex": {}}
+
+    monkeypatch.setattr(shopping_list_router, "_generate_to_buy", fake_generate)
+    INGREDIENT_INDEX.load([("butter", 1), ("milk", 2)])
+
+    payload = {
+        "recipes": [{"ingredients": [{"name": "butter", "quantity": 50, "unit": "g"}, "milk"]}],
+        "pantry_ingredients": [{"name": "peanut butter", "quantity": 200, "unit": "g"}, "coconut milk"],
+    }
+
+    resp = client.post("/shopping-list/plan", json=payload)
+    assert resp.status_code == 200
+    assert [item["name"] for item in sent[0]] == ["butter", "milk"]
+
+
+def test_plan_calls_model_once_for_unmatched(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """
+    剩下的食材和剩下的 pantry 一起只交给 Vertex 一次。
+    """
+    from backend.routers import shopping_list_router
+
+    monkeypatch.setattr(shopping_list_router, "_get_vertex_access_token", lambda: "fake-token")
+
+    sent = []
+
+    class DummyResponse:
+        status_code = 200
+
+        def json(self):
+            return _fake_vertex_response_json()
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        sent.append(json)
+        return DummyResponse()
+
+    monkeypatch.setattr(shopping_list_router.VERTEX, "post", fake_post)
+
+    payload = {
+        "recipes": [
+            {"ingredients": [{"name": "large egg", "quantity": 2, "unit": "pcs"}]},
+            {"ingredients": [{"name": "large egg", "quantity": 1, "unit": "pcs"}, "salt"]},
+        ],
+        "pantry_ingredients": [{"name": "egg", "quantity": 2, "unit": "pcs"}, "salt"],
+    }
+
+    resp = client.post("/shopping-list/plan", json=payload)
+    assert resp.status_code == 200
+    assert len(sent) == 1
+    recipe_part = sent[0]["contents"][0]["parts"][2]["text"]
+    assert '"quantity": 3' in recipe_part  # 2 + 1 已在本地合并
+    assert "salt" not in recipe_part  # 精确匹配，本地已解决
+    assert resp.json()["to_buy"][0]["name"] == "egg"
+
+
+def test_plan_requires_pantry_when_anonymous(client: TestClient):
+    resp = client.post("/shopping-list/plan", json={"recipes": []})
+    assert resp.status_code == 400
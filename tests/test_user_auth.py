@@ -51,6 +51,31 @@ class TestPasswordHashing:
         normalized = _normalize_password(short)
         assert normalized == b"abc"
 
+    def test_cost_is_configurable_and_detected(self, monkeypatch):
+        from backend.User.utils import security
+
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+        hashed = get_password_hash("pw")
+        assert hashed.split("$")[2] == "04"
+        assert security.needs_rehash(hashed) is False
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+        assert security.needs_rehash(hashed) is True
+        assert security.needs_rehash("invalid-hash") is False
+
+    def test_async_hashing_rejects_when_queue_full(self, monkeypatch):
+        import asyncio
+
+        from backend.User.utils import security
+
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+        hashed = asyncio.run(security.get_password_hash_async("pw"))
+        assert asyncio.run(security.verify_password_async("pw", hashed)) is True
+
+        monkeypatch.setattr(security, "PASSWORD_HASH_MAX_PENDING", 0)
+        with pytest.raises(security.PasswordHasherBusy):
+            asyncio.run(security.verify_password_async("pw", hashed))
+        assert security.password_hasher_stats()["pending"] == 0
+
 
 class TestJWT:
     def test_create_access_token(self):
@@ -133,7 +158,8 @@ class TestUserCrud:
         assert len(result) == 0
 
     def test_create_user_with_hashed_password_success(self, mock_db):
-        mock_db.scalar.return_value = None  # No existing user
+        created = User(id=1, phone_number="1234567890")
+        mock_db.scalars.return_value.one.return_value = created
         
         user_in = UserCreate(
             name="Test User",
@@ -143,15 +169,30 @@ class TestUserCrud:
             allergen="nuts"
         )
         
-        user_crud.create_user_with_hashed_password(mock_db, user_in, "hashed_password")
+        result = user_crud.create_user_with_hashed_password(mock_db, user_in, "hashed_password")
         
+        # 不预先查询手机号：一条 INSERT ... RETURNING 后直接提交
+        assert result is created
+        mock_db.scalar.assert_not_called()
+        mock_db.scalars.assert_called_once()
+        mock_db.commit.assert_called_once()
+        mock_db.refresh.assert_not_called()
+
+    def test_create_user_without_returning_refreshes(self, mock_db):
+        mock_db.get_bind.return_value.dialect.insert_returning = False
+        user_in = UserCreate(name="Test", phone_number="1234567890", password="testpass123")
+
+        user_crud.create_user_with_hashed_password(mock_db, user_in, "hash")
+
         mock_db.add.assert_called_once()
+        mock_db.flush.assert_called_once()
         mock_db.commit.assert_called_once()
         mock_db.refresh.assert_called_once()
 
     def test_create_user_duplicate_phone_raises(self, mock_db):
-        existing_user = User(id=1, phone_number="1234567890")
-        mock_db.scalar.return_value = existing_user
+        from sqlalchemy.exc import IntegrityError
+
+        mock_db.scalars.side_effect = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
         
         user_in = UserCreate(
             name="Test",
@@ -161,6 +202,7 @@ class TestUserCrud:
         
         with pytest.raises(ValueError, match="Phone number already registered"):
             user_crud.create_user_with_hashed_password(mock_db, user_in, "hash")
+        mock_db.rollback.assert_called_once()
 
     def test_create_user_simple(self, mock_db):
         user_in = UserCreate(
@@ -192,6 +234,25 @@ class TestUserCrud:
         
         assert user.hashed_password == "newhashed"
 
+    def test_update_user_password_revokes_tokens(self, mock_db):
+        user = User(id=1, name="User", phone_number="123", hashed_password="old", token_version=4)
+        user_crud.PRINCIPAL_CACHE.set((1, 4), user_crud.Principal(1, "123", 4))
+        mock_db.scalar.return_value = None
+
+        user_crud.update_user(mock_db, user, UserUpdate(password="newhashed"))
+
+        # 缓存条目失效，token_version 在 SQL 里 + 1
+        assert user_crud.PRINCIPAL_CACHE.get((1, 4)) is None
+        assert "token_version" in str(user.token_version)
+
+    def test_update_user_name_keeps_token_version(self, mock_db):
+        user = User(id=1, name="User", phone_number="123", token_version=4)
+        mock_db.scalar.return_value = None
+
+        user_crud.update_user(mock_db, user, UserUpdate(name="New"))
+
+        assert user.token_version == 4
+
     def test_update_user_phone_conflict(self, mock_db):
         user = User(id=1, phone_number="111")
         other_user = User(id=2, phone_number="222")
@@ -217,6 +278,39 @@ class TestUserCrud:
         mock_db.delete.assert_called_once_with(user)
         mock_db.commit.assert_called_once()
 
+    def _recache_during_commit(self, mock_db, key):
+        """模拟提交过程中另一个请求读到旧行并重新写入缓存。"""
+        stale = user_crud.Principal(1, "123", 4)
+        mock_db.commit.side_effect = lambda: user_crud.PRINCIPAL_CACHE.set(key, stale)
+
+    def test_update_user_invalidates_principal_after_commit(self, mock_db):
+        user = User(id=1, name="User", phone_number="123", token_version=4)
+        mock_db.scalar.return_value = None
+        self._recache_during_commit(mock_db, (1, 4))
+
+        user_crud.update_user(mock_db, user, UserUpdate(phone_number="456"))
+        assert user_crud.PRINCIPAL_CACHE.get((1, 4)) is None
+
+    def test_delete_user_invalidates_principal_after_commit(self, mock_db):
+        user = User(id=1, phone_number="123", token_version=4)
+        self._recache_during_commit(mock_db, (1, 4))
+
+        user_crud.delete_user(mock_db, user)
+        assert user_crud.PRINCIPAL_CACHE.get((1, 4)) is None
+
+    def test_principal_read_racing_delete_is_not_cached(self, mock_db):
+        user = User(id=1, phone_number="123", token_version=4)
+        row = MagicMock(id=1, phone_number="123", token_version=4)
+
+        def read_then_delete_commits(stmt):
+            # 读到旧行之后、写回缓存之前，delete_user 提交并失效
+            user_crud.delete_user(MagicMock(spec=Session), user)
+            return MagicMock(first=MagicMock(return_value=row))
+
+        mock_db.execute.side_effect = read_then_delete_commits
+        assert user_crud.get_principal(mock_db, 1, 4) is not None  # 本次请求照常通过
+        assert user_crud.PRINCIPAL_CACHE.get((1, 4)) is None
+
 
 # ==================== Pantry CRUD Tests ====================
 
@@ -237,6 +331,15 @@ class TestPantryCrud:
         result = pantry_crud.list_items(mock_db, user_id=1)
         assert len(result) == 0
 
+    def test_list_ingredient_dicts(self, mock_db):
+        mock_db.execute.return_value.mappings.return_value = iter([
+            {"name": "Egg", "quantity": "6", "unit": "pcs", "notes": None},
+        ])
+
+        result = pantry_crud.list_ingredient_dicts(mock_db, user_id=1)
+        assert result == [{"name": "Egg", "quantity": "6", "unit": "pcs", "notes": None}]
+        mock_db.execute.assert_called_once()
+
     def test_get_item(self, mock_db):
         item = PantryItem(id=1, user_id=1, name="Egg")
         mock_db.scalar.return_value = item
@@ -256,16 +359,82 @@ class TestPantryCrud:
         mock_db.commit.assert_called_once()
         mock_db.refresh.assert_called_once()
 
+    def test_get_version(self, mock_db):
+        mock_db.scalar.return_value = 5
+        assert pantry_crud.get_version(mock_db, user_id=1) == 5
+
+    def test_get_version_defaults_to_zero(self, mock_db):
+        mock_db.scalar.return_value = None
+        assert pantry_crud.get_version(mock_db, user_id=1) == 0
+
+    def test_create_item_bumps_version(self, mock_db):
+        mock_db.execute.return_value.rowcount = 1
+
+        pantry_crud.create_item(mock_db, user_id=1, name="Milk")
+
+        mock_db.execute.assert_called_once()  # UPDATE pantry_versions ...
+        mock_db.add.assert_called_once()  # 只有 PantryItem，没有新的 PantryVersion
+
+    def test_first_write_inserts_version_row(self, mock_db):
+        mock_db.execute.return_value.rowcount = 0
+
+        pantry_crud.delete_item(mock_db, PantryItem(id=1, user_id=1))
+
+        added = mock_db.add.call_args_list[0][0][0]
+        assert added.user_id == 1
+        assert added.version == 1
+        # 删除同时写 tombstone，change_seq 即新版本号
+        tombstone = mock_db.add.call_args_list[1][0][0]
+        assert (tombstone.item_id, tombstone.change_seq) == (1, 1)
+
     def test_bulk_create_items(self, mock_db):
         items_data = [
             {"name": "Egg", "quantity": 6},
             {"name": "Milk", "quantity": 1}
         ]
         
+        mock_db.scalar.return_value = 3
+        mock_db.scalars.return_value = [PantryItem(id=1), PantryItem(id=2)]
+
         pantry_crud.bulk_create_items(mock_db, user_id=1, items=items_data)
-        mock_db.add_all.assert_called_once()
+        # 一条 INSERT ... RETURNING，不再 add_all + 逐行 refresh
+        mock_db.scalars.assert_called_once()
+        rows = mock_db.scalars.call_args[0][1]
+        assert rows == [
+            {"name": "Egg", "quantity": 6, "ingredient_id": None, "quantity_value": 6.0,
+             "unit_canonical": None, "user_id": 1, "change_seq": 3},
+            {"name": "Milk", "quantity": 1, "ingredient_id": None, "quantity_value": 1.0,
+             "unit_canonical": None, "user_id": 1, "change_seq": 3},
+        ]
+        mock_db.add_all.assert_not_called()
+        mock_db.refresh.assert_not_called()
         mock_db.commit.assert_called_once()
 
+    def test_bulk_create_items_without_returning(self, mock_db, monkeypatch):
+        """MySQL：分块多行 INSERT，最后按本次 change_seq 一次 SELECT 读回"""
+        mock_db.get_bind.return_value.dialect.insert_executemany_returning = False
+        mock_db.scalars.return_value = [PantryItem(id=i) for i in (10, 12, 13)]
+        monkeypatch.setattr(pantry_crud, "BULK_INSERT_CHUNK_SIZE", 2)
+
+        created = pantry_crud.bulk_create_items(
+            mock_db, user_id=1, items=[{"name": "A"}, {"name": "B"}, {"name": "C"}]
+        )
+        # 2 个分块各一条 INSERT，外加一次 version 更新
+        assert mock_db.execute.call_count == 3
+        assert [item.id for item in created] == [10, 12, 13]
+        stmt = mock_db.scalars.call_args.args[0]
+        assert "change_seq" in str(stmt) and "LIMIT" not in str(stmt)
+        mock_db.commit.assert_called_once()
+
+    def test_bulk_create_items_without_returning_checks_row_count(self, mock_db):
+        mock_db.get_bind.return_value.dialect.insert_executemany_returning = False
+        mock_db.scalars.return_value = [PantryItem(id=10)]
+
+        with pytest.raises(RuntimeError):
+            pantry_crud.bulk_create_items(mock_db, user_id=1, items=[{"name": "A"}, {"name": "B"}])
+        mock_db.rollback.assert_called_once()
+        mock_db.commit.assert_not_called()
+
     def test_bulk_create_items_empty(self, mock_db):
         result = pantry_crud.bulk_create_items(mock_db, user_id=1, items=[])
         assert result == []
@@ -288,16 +457,58 @@ class TestPantryCrud:
         mock_db.commit.assert_called_once()
 
     def test_clear_items(self, mock_db):
-        items = [PantryItem(id=1), PantryItem(id=2)]
-        mock_db.scalars.return_value = iter(items)
-        
-        pantry_crud.clear_items(mock_db, user_id=1)
-        
-        assert mock_db.delete.call_count == 2
+        mock_db.execute.return_value.rowcount = 2
+
+        assert pantry_crud.clear_items(mock_db, user_id=1) == 2
+
+        # 版本号 + 一条 INSERT ... SELECT 写 tombstone + 一条 DELETE ... WHERE user_id = ?，
+        # 不加载、不逐行删除
+        statements = [str(call[0][0]) for call in mock_db.execute.call_args_list]
+        assert len(statements) == 3
+        assert statements[1].startswith("INSERT INTO pantry_tombstones")
+        assert "SELECT" in statements[1]
+        assert statements[2].startswith("DELETE FROM pantry_items")
+        mock_db.scalars.assert_not_called()
+        mock_db.delete.assert_not_called()
+        mock_db.commit.assert_called_once()
+
+    def test_delete_items_skips_unowned_ids(self, mock_db):
+        mock_db.scalars.return_value = iter([1])
+
+        assert pantry_crud.delete_items(mock_db, user_id=1, item_ids=[1, 2]) == [1]
+        # version 更新 + tombstone INSERT ... SELECT + 一条 DELETE
+        assert mock_db.execute.call_count == 3
         mock_db.commit.assert_called_once()
 
-    def test_clear_items_none(self, mock_db):
+    def test_delete_items_none_owned(self, mock_db):
         mock_db.scalars.return_value = iter([])
-        pantry_crud.clear_items(mock_db, user_id=1)
-        mock_db.delete.assert_not_called()
-        mock_db.commit.assert_called_once()
\ No newline at end of file
+
+        assert pantry_crud.delete_items(mock_db, user_id=1, item_ids=[5]) == []
+        mock_db.execute.assert_not_called()
+        mock_db.commit.assert_not_called()
+
+    def test_update_params_merges_and_filters(self):
+        params = pantry_crud._update_params(
+            [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}, {"id": 1, "unit": "kg"}, {"id": 3}],
+            owned={1: ("2", "g"), 3: (None, None)},
+        )
+        # 只改了 unit：用当前 quantity 重新计算解析列
+        assert params == [
+            {"id": 1, "name": "A", "unit": "kg", "quantity_value": 2000.0, "unit_canonical": "g", "ingredient_id": None}
+        ]
+
+    def test_create_item_fills_parsed_amount(self, mock_db):
+        mock_db.scalar.return_value = 2
+
+        item = pantry_crud.create_item(mock_db, user_id=1, name="Flour", quantity="1.5", unit="kg")
+
+        assert item.quantity == "1.5"
+        assert item.quantity_value == 1500.0
+        assert item.unit_canonical == "g"
+
+    def test_update_item_recomputes_parsed_amount(self, mock_db):
+        item = PantryItem(id=1, user_id=1, name="Milk", quantity="1", unit="l")
+
+        pantry_crud.update_item(mock_db, item, quantity="1/2")
+
+        assert (item.quantity_value, item.unit_canonical) == (500.0, "ml")
@@ -1,6 +1,6 @@
 # tests/test_user_router.py
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 
 from backend.User.utils.security import get_password_hash
@@ -17,15 +17,15 @@ class TestUserRouterLogin:
         mock_user.phone_number = "1234567890"
         mock_user.hashed_password = get_password_hash("password123")
         mock_user.name = "Test User"
+        mock_user.token_version = 0
         
-        def mock_get_db():
-            mock_db = MagicMock()
-            yield mock_db
-        
-        monkeypatch.setattr(user_router, "get_db", mock_get_db)
         monkeypatch.setattr(
-            "backend.User.crud.user_crud.get_user_by_phone",
-            lambda db, phone_number: mock_user
+            "backend.User.crud.user_crud.get_user_by_phone_async",
+            AsyncMock(return_value=mock_user)
+        )
+        monkeypatch.setattr(
+            "backend.User.crud.refresh_token_crud.issue_refresh_token_async",
+            AsyncMock(return_value="refresh-token")
         )
         
         resp = client.post(
@@ -36,6 +36,7 @@ class TestUserRouterLogin:
         assert resp.status_code == 200
         data = resp.json()
         assert "access_token" in data
+        assert data["refresh_token"] == "refresh-token"
         assert data["token_type"] == "bearer"
 
     def test_login_wrong_password(self, client: TestClient, monkeypatch):
@@ -47,14 +48,9 @@ class TestUserRouterLogin:
         mock_user.phone_number = "1234567890"
         mock_user.hashed_password = get_password_hash("correctpassword")
         
-        def mock_get_db():
-            mock_db = MagicMock()
-            yield mock_db
-        
-        monkeypatch.setattr(user_router, "get_db", mock_get_db)
         monkeypatch.setattr(
-            "backend.User.crud.user_crud.get_user_by_phone",
-            lambda db, phone_number: mock_user
+            "backend.User.crud.user_crud.get_user_by_phone_async",
+            AsyncMock(return_value=mock_user)
         )
         
         resp = client.post(
@@ -68,14 +64,9 @@ class TestUserRouterLogin:
         """Test login with non-existent user"""
         from backend.User.routers import user_router
         
-        def mock_get_db():
-            mock_db = MagicMock()
-            yield mock_db
-        
-        monkeypatch.setattr(user_router, "get_db", mock_get_db)
         monkeypatch.setattr(
-            "backend.User.crud.user_crud.get_user_by_phone",
-            lambda db, phone_number: None
+            "backend.User.crud.user_crud.get_user_by_phone_async",
+            AsyncMock(return_value=None)
         )
         
         resp = client.post(
@@ -98,18 +89,9 @@ class TestUserRouterRegister:
         mock_created_user.preference = None
         mock_created_user.allergen = None
         
-        def mock_get_db():
-            mock_db = MagicMock()
-            yield mock_db
-        
-        monkeypatch.setattr(user_router, "get_db", mock_get_db)
-        monkeypatch.setattr(
-            "backend.User.crud.user_crud.get_user_by_phone",
-            lambda db, phone_number: None  # No existing user
-        )
         monkeypatch.setattr(
-            "backend.User.crud.user_crud.create_user_with_hashed_password",
-            lambda db, user, hashed: mock_created_user
+            "backend.User.crud.user_crud.create_user_with_hashed_password_async",
+            AsyncMock(return_value=mock_created_user)
         )
         
         resp = client.post(
@@ -127,18 +109,9 @@ class TestUserRouterRegister:
         """Test registration with existing phone number"""
         from backend.User.routers import user_router
         
-        existing_user = MagicMock()
-        existing_user.id = 1
-        existing_user.phone_number = "1234567890"
-        
-        def mock_get_db():
-            mock_db = MagicMock()
-            yield mock_db
-        
-        monkeypatch.setattr(user_router, "get_db", mock_get_db)
         monkeypatch.setattr(
-            "backend.User.crud.user_crud.get_user_by_phone",
-            lambda db, phone_number: existing_user
+            "backend.User.crud.user_crud.create_user_with_hashed_password_async",
+            AsyncMock(side_effect=ValueError("Phone number already registered"))
         )
         
         resp = client.post(
@@ -153,3 +126,180 @@ class TestUserRouterRegister:
         assert resp.status_code == 400
         assert "already registered" in resp.json()["detail"]
 
+
+class TestRegistrationConstraint:
+    def test_register_is_a_single_insert(self, db_client: TestClient):
+        from sqlalchemy import event
+
+        engine = db_client.session_factory.kw["bind"].sync_engine
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement.split()[0].upper())
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            resp = db_client.post(
+                "/auth/register", json={"name": "One", "phone_number": "5550100", "password": "password123"}
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert resp.status_code == 200
+        assert resp.json()["phone_number"] == "5550100"
+        assert statements == ["INSERT"]
+
+    def test_duplicate_register_maps_integrity_error_to_400(self, db_client: TestClient):
+        body = {"name": "Dup", "phone_number": "5550101", "password": "password123"}
+        assert db_client.post("/auth/register", json=body).status_code == 200
+        resp = db_client.post("/auth/register", json=body)
+        assert resp.status_code == 400
+        assert "already registered" in resp.json()["detail"]
+        # 失败的事务已回滚，同一会话工厂仍可继续注册
+        assert db_client.post("/auth/register", json=dict(body, phone_number="5550102")).status_code == 200
+
+    def test_concurrent_duplicate_signups_create_one_user(self, db_client: TestClient):
+        import asyncio
+
+        from sqlalchemy import func, select
+
+        from backend.User.crud import user_crud
+        from backend.User.schemas.user_schemas import UserCreate
+
+        user_in = UserCreate(name="Race", phone_number="5550103", password="password123")
+
+        async def register():
+            async with db_client.session_factory() as db:
+                try:
+                    await user_crud.create_user_with_hashed_password_async(db, user_in, "hashed")
+                    return "created"
+                except ValueError:
+                    return "duplicate"
+
+        async def race():
+            results = await asyncio.gather(*(register() for _ in range(8)))
+            async with db_client.session_factory() as db:
+                count = await db.scalar(select(func.count()).select_from(User).where(User.phone_number == "5550103"))
+            return results, count
+
+        results, count = asyncio.run(race())
+        assert results.count("created") == 1
+        assert results.count("duplicate") == 7
+        assert count == 1
+
+
+class TestPasswordHashingAdmission:
+    def test_login_returns_503_when_hasher_saturated(self, db_client: TestClient, auth_headers, monkeypatch):
+        from backend.User.utils import security
+
+        monkeypatch.setattr(security, "PASSWORD_HASH_MAX_PENDING", 0)
+        resp = db_client.post("/auth/login", data={"username": "5550001", "password": "password123"})
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "1"
+
+    def test_login_rehashes_with_new_cost(self, db_client: TestClient, monkeypatch):
+        import asyncio
+
+        from backend.User.crud import user_crud
+        from backend.User.utils import security
+
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+        db_client.post("/auth/register", json={"name": "R", "phone_number": "5550002", "password": "password123"})
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+
+        resp = db_client.post("/auth/login", data={"username": "5550002", "password": "password123"})
+        assert resp.status_code == 200
+
+        async def stored_hash():
+            async with db_client.session_factory() as db:
+                return (await user_crud.get_user_by_phone_async(db, "5550002")).hashed_password
+
+        hashed = asyncio.run(stored_hash())
+        assert hashed.split("$")[2] == "05"
+        # 重算哈希不是改密码：刚签发的 token 仍然有效
+        token = resp.json()["access_token"]
+        assert db_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+
+class TestRefreshTokens:
+    def _login(self, db_client: TestClient, phone="5550003"):
+        db_client.post("/auth/register", json={"name": "F", "phone_number": phone, "password": "password123"})
+        resp = db_client.post("/auth/login", data={"username": phone, "password": "password123"})
+        assert resp.status_code == 200
+        return resp.json()
+
+    def test_refresh_rotates_without_bcrypt(self, db_client: TestClient, monkeypatch):
+        from backend.User.utils import security
+
+        tokens = self._login(db_client)
+        monkeypatch.setattr(security, "_run_bounded", AsyncMock(side_effect=AssertionError("bcrypt called")))
+
+        resp = db_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert resp.status_code == 200
+        rotated = resp.json()
+        assert rotated["refresh_token"] != tokens["refresh_token"]
+        me = db_client.get("/auth/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+        assert me.json()["phone_number"] == "5550003"
+
+    def test_reuse_revokes_whole_family(self, db_client: TestClient):
+        tokens = self._login(db_client)
+        rotated = db_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+        # 旧令牌被重放：拒绝，并且这次登录派生出的新令牌也一起失效
+        assert db_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        assert db_client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+
+    def test_other_sessions_survive_reuse(self, db_client: TestClient):
+        first = self._login(db_client)
+        second = db_client.post("/auth/login", data={"username": "5550003", "password": "password123"}).json()
+        db_client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+        db_client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+
+        assert db_client.post("/auth/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 200
+
+    def test_expired_and_unknown_tokens_rejected(self, db_client: TestClient, monkeypatch):
+        from backend.User.crud import refresh_token_crud
+
+        monkeypatch.setattr(refresh_token_crud, "REFRESH_TOKEN_EXPIRE_DAYS", -1)
+        tokens = self._login(db_client)
+        assert db_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        assert db_client.post("/auth/refresh", json={"refresh_token": "not-a-token"}).status_code == 401
+
+    def test_password_change_invalidates_refresh_tokens(self, db_client: TestClient):
+        import asyncio
+
+        from backend.User.crud import user_crud
+        from backend.User.schemas.user_schemas import UserUpdate
+
+        tokens = self._login(db_client)
+
+        async def change_password():
+            async with db_client.session_factory() as db:
+                user = await user_crud.get_user_by_phone_async(db, "5550003")
+                await user_crud.update_user_async(db, user, UserUpdate(password="x" * 60))
+
+        asyncio.run(change_password())
+        assert db_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    def test_logout_revokes_family(self, db_client: TestClient):
+        tokens = self._login(db_client)
+        assert db_client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 204
+        assert db_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        # 幂等
+        assert db_client.post("/auth/logout", json={"refresh_token": "unknown"}).status_code == 204
+
+    def test_only_hash_is_stored(self, db_client: TestClient):
+        import asyncio
+
+        from sqlalchemy import select
+
+        from backend.User.crud.refresh_token_crud import hash_token
+        from backend.User.models.refresh_token import RefreshToken
+
+        tokens = self._login(db_client)
+
+        async def stored_hashes():
+            async with db_client.session_factory() as db:
+                return list(await db.scalars(select(RefreshToken.token_hash)))
+
+        assert asyncio.run(stored_hashes()) == [hash_token(tokens["refresh_token"])]